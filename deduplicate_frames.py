@@ -5,8 +5,9 @@ import argparse
 import csv
 from typing import Callable
 from webui_utils.simple_log import SimpleLog
-from webui_utils.video_utils import get_duplicate_frames_report, get_duplicate_frames,\
-    compute_report_stats, determine_input_format
+from webui_utils.video_utils import get_duplicate_frames, compute_report_stats,\
+    determine_input_format, group_duplicate_frames, format_duplicate_frames_report
+from webui_utils.frame_difference import FrameDifferences, NativeDecimate
 from webui_utils.file_utils import split_filepath, create_directory
 from webui_utils.color_out import ColorOut
 from webui_utils.mtqdm import Mtqdm
@@ -30,7 +31,7 @@ def main():
     help="Outcome for found duplicate frames: 'report' (default), 'delete', 'autofill', 'tuning'")
     parser.add_argument('--model', default='ours', type=str)
     parser.add_argument('--gpu_ids', type=str, default='0',
-                        help='gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU (FUTURE USE)')
+                        help='gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available')
     parser.add_argument("--time_step", dest="time_step", default=False, action="store_true",
                     help="Use Time Step instead of Binary Search interpolation (Default: False)")
     parser.add_argument("--depth", default=10, type=int,
@@ -41,6 +42,10 @@ def main():
                         help="Maximum threshold for tuning (default 25000)")
     parser.add_argument("--tune_step", default=100, type=int,
                         help="Threshold step for tuning (default 100)")
+    parser.add_argument("--detector", default="ffmpeg", type=str,
+                        help="Duplicate frame detector: 'ffmpeg' (default) or 'native'")
+    parser.add_argument("--cache_path", default=None, type=str,
+                        help="Path to cache measured frame differences for native detector tuning (optional)")
     parser.add_argument("--type", default="png", type=str,
                         help="File type for frame files (Default 'png')")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
@@ -63,7 +68,9 @@ def main():
                       type=args.type,
                       tune_min=args.tune_min,
                       tune_max=args.tune_max,
-                      tune_step=args.tune_step).invoke(args.disposition)
+                      tune_step=args.tune_step,
+                      cache_path=args.cache_path,
+                      detector=args.detector).invoke(args.disposition)
 
 class DeduplicateFrames:
     """Encapsulate logic for Resequence Files feature"""
@@ -78,7 +85,9 @@ class DeduplicateFrames:
                 tune_min : int=0,
                 tune_max : int=25000,
                 tune_step : int=100,
-                type : str="png"):
+                type : str="png",
+                cache_path : str | None=None,
+                detector : str="ffmpeg"):
         self.frame_restorer = frame_restorer
         self.input_path = input_path
         self.output_path = output_path
@@ -90,6 +99,8 @@ class DeduplicateFrames:
         self.tune_max = tune_max
         self.tune_step = tune_step
         self.type = type
+        self.cache_path = cache_path
+        self.detector = detector
 
         if not self.input_path:
             raise ValueError("'input_path' must be specified")
@@ -99,6 +110,46 @@ class DeduplicateFrames:
             raise ValueError("'threshold' must be positive")
         if self.max_dupes < 0:
             raise ValueError("'max_dupes' must be positive")
+        if self.detector not in self.valid_detectors:
+            raise ValueError(
+                    f"'detector' must be one of the values: {','.join(self.valid_detectors)}")
+
+    valid_detectors = ["ffmpeg", "native"]
+
+    def get_duplicate_frames(self):
+        """Find duplicate frames with the chosen detector
+           Returns array of duplicate frame groups, array of frame filenames,
+           array of mpdecimate lines for debugging (empty for the native detector)
+        """
+        if self.detector == "native":
+            decimate = NativeDecimate(self.input_path, self.threshold, self.threshold, 1.0,
+                                      type=self.type, log_fn=self.log_fn)
+            dupe_groups, frame_filenames = decimate.get_duplicate_frames(self.max_dupes)
+            return dupe_groups, frame_filenames, []
+        return get_duplicate_frames(self.input_path, self.threshold, self.max_dupes,
+                                    type=self.type)
+
+    def get_tuning_duplicate_frames(self, thresholds : list):
+        """Find duplicate frames for each tuning threshold with the chosen detector
+           Yields the threshold, array of duplicate frame groups, array of frame filenames
+           The native detector measures the frame differences only once for all thresholds
+        """
+        if self.detector == "native":
+            frame_differences = FrameDifferences(self.input_path, type=self.type,
+                                                 cache_path=self.cache_path, log_fn=self.log_fn)
+            is_dupe_maps = frame_differences.find_duplicates(thresholds)
+            for threshold in thresholds:
+                yield threshold, group_duplicate_frames(is_dupe_maps[threshold],
+                                                        frame_differences.filenames,
+                                                        self.max_dupes),\
+                    frame_differences.filenames
+        else:
+            for threshold in thresholds:
+                dupe_groups, frame_filenames, _ = get_duplicate_frames(self.input_path,
+                                                                        threshold,
+                                                                        self.max_dupes,
+                                                                        type=self.type)
+                yield threshold, dupe_groups, frame_filenames
 
     valid_dispositions = ["report", "delete", "autofill", "tuning"]
 
@@ -135,16 +186,13 @@ class DeduplicateFrames:
                 writer = csv.DictWriter(csvfile, fieldnames = csv_fields)
                 writer.writeheader()
 
+        thresholds = list(range(self.tune_min, self.tune_max+1, self.tune_step))
         try:
-            with Mtqdm().open_bar(total=len(range(self.tune_min, self.tune_max+1, self.tune_step)),
-                                  desc="Tuning") as bar:
-                for threshold in range(self.tune_min, self.tune_max+1, self.tune_step):
-                    message = f"geting duplicates for threshold={threshold}"
+            with Mtqdm().open_bar(total=len(thresholds), desc="Tuning") as bar:
+                for threshold, dupe_groups, frame_filenames in \
+                        self.get_tuning_duplicate_frames(thresholds):
+                    message = f"got duplicates for threshold={threshold}"
                     self.log(message)
-                    dupe_groups, frame_filenames, _ = get_duplicate_frames(self.input_path,
-                                                                            threshold,
-                                                                            self.max_dupes,
-                                                                            type=self.type)
                     stats = compute_report_stats(dupe_groups, frame_filenames)
                     message = f"dupe_percent={stats['dupe_percent']} max_group={stats['max_group']}" +\
                         f" dupe_count={stats['dupe_count']} first_dupe={stats['first_dupe']}"
@@ -191,10 +239,11 @@ class DeduplicateFrames:
 
     def invoke_report(self, suppress_output=False):
         try:
-            self.log("calling 'get_duplicate_frames_report' with" + \
+            self.log(f"calling '{self.detector}' detector with" + \
         f" input_path: {self.input_path} threshold: {self.threshold} max_dupes: {self.max_dupes} ")
-            report = get_duplicate_frames_report(self.input_path, self.threshold, self.max_dupes,
-                                                 type=self.type)
+            dupe_groups, frame_filenames, _ = self.get_duplicate_frames()
+            report = format_duplicate_frames_report(self.input_path, self.threshold, dupe_groups,
+                                                    frame_filenames)
             if self.output_path:
                 _path, _filename, _ext = split_filepath(self.output_path)
                 filename = _filename or "Duplicate Frames Report"
@@ -227,12 +276,9 @@ class DeduplicateFrames:
         create_directory(self.output_path)
 
         try:
-            self.log("invoke_delete() calling 'get_duplicate_frames' with" + \
+            self.log(f"invoke_delete() calling '{self.detector}' detector with" + \
         f" input_path: {self.input_path} threshold: {self.threshold} max_dupes: {self.max_dupes} ")
-            dupe_groups, frame_filenames, mpdecimate_log = get_duplicate_frames(self.input_path,
-                                                                                self.threshold,
-                                                                                self.max_dupes,
-                                                                                type=self.type)
+            dupe_groups, frame_filenames, mpdecimate_log = self.get_duplicate_frames()
             self.log("mpdecimate data received from 'get_duplicate_frames:")
             self.log("/r/n".join(mpdecimate_log))
             self.log(f"beginning processing of {len(dupe_groups)} duplicate groups for deletion")
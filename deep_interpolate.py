@@ -8,6 +8,7 @@ from interpolate import Interpolate
 from webui_utils.simple_log import SimpleLog
 from webui_utils.simple_utils import max_steps, sortable_float_index
 from webui_utils.file_utils import create_directory
+from webui_utils.image_utils import write_frame
 from webui_utils.mtqdm import Mtqdm
 
 def main():
@@ -16,7 +17,7 @@ def main():
     parser.add_argument("--model",
         default="ours", type=str)
     parser.add_argument("--gpu_ids", type=str, default="0",
-        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU")
+        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available")
     parser.add_argument("--img_before", default="images/image0.png", type=str,
         help="Path to before frame image")
     parser.add_argument("--img_after", default="images/image2.png", type=str,
@@ -31,6 +32,8 @@ def main():
         help="Use Time Step instead of Binary Search interpolation (Default: False)")
     parser.add_argument("--type", default="png", type=str,
                         help="File type for frame files (Default 'png')")
+    parser.add_argument("--in_memory", dest="in_memory", default=False, action="store_true",
+        help="Keep split frames in memory, saving only the final frames (Default: False)")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
     args = parser.parse_args()
@@ -39,7 +42,8 @@ def main():
     create_directory(args.output_path)
     engine = InterpolateEngine(args.model, args.gpu_ids, use_time_step=args.time_step)
     interpolater = Interpolate(engine.model, log.log)
-    deep_interpolater = DeepInterpolate(interpolater, args.time_step, log.log)
+    deep_interpolater = DeepInterpolate(interpolater, args.time_step, log.log,
+                                        in_memory=args.in_memory)
     deep_interpolater.split_frames(args.img_before,
                                    args.img_after,
                                    args.depth,
@@ -52,12 +56,19 @@ class DeepInterpolate():
     def __init__(self,
                 interpolater : Interpolate,
                 time_step : bool,
-                log_fn : Callable | None):
+                log_fn : Callable | None,
+                in_memory : bool=False):
         self.interpolater = interpolater
         self.time_step = time_step
         self.log_fn = log_fn
+        self.in_memory = in_memory
         self.split_count = 0
         self.frame_register = []
+        self.split_filepaths = {}
+        self.tensor_register = {}
+        self.original_frames = {}
+        self.padder = None
+        self.save_context = {}
         self.progress = None
         self.output_paths = []
 
@@ -70,13 +81,18 @@ class DeepInterpolate():
                     progress_label="Frame",
                     continued=False,
                     resynthesis=False,
-                    type : str="png"):
-        """Invoke the Frame Interpolation feature"""
+                    type : str="png",
+                    filenames : list | None=None):
+        """Invoke the Frame Interpolation feature
+           filenames: final filenames for the kept frames in order, used instead of
+            integerized base_filename names"""
         self.init_frame_register()
         self.reset_split_manager(num_splits)
         num_steps = max_steps(num_splits)
         self.init_progress(num_splits, num_steps, progress_label)
         output_filepath_prefix = os.path.join(output_path, base_filename)
+        save_context = self._create_save_context(num_splits, output_path, base_filename,
+                                                 continued, resynthesis, type, filenames)
 
         if self.time_step:
             self.interpolater.create_between_frames(before_filepath, after_filepath,
@@ -84,33 +100,38 @@ class DeepInterpolate():
             for path in self.interpolater.output_paths:
                 self.register_frame(path)
             self.interpolater.output_paths = []
+            self._integerize_filenames(output_path, base_filename, continued, resynthesis, type,
+                                       filenames)
+        elif self.in_memory:
+            self._set_up_outer_tensors(before_filepath, after_filepath, save_context)
+            self._recursive_split_tensors(0.0, 1.0)
+            self._save_registered_tensor(1.0)
         else:
-            self._set_up_outer_frames(before_filepath, after_filepath, output_filepath_prefix, type)
+            self._set_up_outer_frames(before_filepath, after_filepath, output_filepath_prefix,
+                                      save_context)
             self._recursive_split_frames(0.0, 1.0, output_filepath_prefix, type)
-        self._integerize_filenames(output_path, base_filename, continued, resynthesis, type)
+            self._integerize_split_frames(save_context)
         self.close_progress()
 
     def _set_up_outer_frames(self,
                             before_file : str,
                             after_file : str,
                             output_filepath_prefix : str,
-                            type : str):
-        """Start with the original frames at 0.0 and 1.0"""
-        img0 = cv2.imread(before_file)
-        img1 = cv2.imread(after_file)
-
-        # create outer 0.0 and 1.0 versions of original frames
-        before_index, after_index = 0.0, 1.0
-        before_file = self.indexed_filepath(output_filepath_prefix, before_index, type)
-        after_file = self.indexed_filepath(output_filepath_prefix, after_index, type)
-
-        cv2.imwrite(before_file, img0)
-        self.register_frame(before_file)
-        # self.log("copied " + before_file)
-
-        cv2.imwrite(after_file, img1)
-        self.register_frame(after_file)
-        # self.log("copied " + after_file)
+                            save_context : dict):
+        """Start with the original frames at 0.0 and 1.0
+           Original frames that won't be kept are split from in place instead of copied"""
+        self.split_filepaths = {}
+        for index, filepath in [(0.0, before_file), (1.0, after_file)]:
+            if self._final_filepath(save_context, index):
+                # create outer versions of original frames that are kept
+                split_filepath = self.indexed_filepath(output_filepath_prefix, index,
+                                                       save_context["type"])
+                write_frame(split_filepath, cv2.imread(filepath))
+                self.register_frame(split_filepath)
+                # self.log("copied " + split_filepath)
+            else:
+                split_filepath = filepath
+            self.split_filepaths[index] = split_filepath
 
     def _recursive_split_frames(self,
                                 first_index : float,
@@ -120,12 +141,13 @@ class DeepInterpolate():
         """Create a new frame between the given frames, and re-enter to split deeper"""
         if self.enter_split():
             mid_index = first_index + (last_index - first_index) / 2.0
-            first_filepath = self.indexed_filepath(filepath_prefix, first_index, type)
-            last_filepath = self.indexed_filepath(filepath_prefix, last_index, type)
+            first_filepath = self.split_filepaths[first_index]
+            last_filepath = self.split_filepaths[last_index]
             mid_filepath = self.indexed_filepath(filepath_prefix, mid_index, type)
 
             self.interpolater.create_between_frame(first_filepath, last_filepath, mid_filepath)
             self.register_frame(mid_filepath)
+            self.split_filepaths[mid_index] = mid_filepath
             self.step_progress()
 
             # deal with two new split regions
@@ -133,8 +155,206 @@ class DeepInterpolate():
             self._recursive_split_frames(mid_index, last_index, filepath_prefix, type)
             self.exit_split()
 
-    def _integerize_filenames(self, output_path, base_name, continued, resynthesis, type):
-        """Keep the interpolated frame files with an index number for sorting"""
+    def _set_up_outer_tensors(self,
+                              before_file : str,
+                              after_file : str,
+                              save_context : dict):
+        """Start with the original frames at 0.0 and 1.0 held in memory as tensors"""
+        img0 = cv2.imread(before_file)
+        img1 = cv2.imread(after_file)
+
+        self.padder = self.interpolater.create_padder(img0)
+        tensor0, tensor1 = self.interpolater.frames_to_tensors(self.padder, img0, img1)
+        self.tensor_register = {0.0 : tensor0, 1.0 : tensor1}
+
+        # the original frames are saved as-is rather than being converted back from tensors
+        self.original_frames = {0.0 : img0, 1.0 : img1}
+
+        self.output_paths = []
+        self.save_context = save_context
+
+    def _create_save_context(self,
+                             num_splits : int,
+                             output_path : str,
+                             base_name : str,
+                             continued : bool,
+                             resynthesis : bool,
+                             type : str,
+                             filenames : list | None=None) -> dict:
+        """The final frame count is known up front so frames can be given their final
+           integerized filenames, or the passed filenames, as soon as they're created"""
+        num_files = 2 ** num_splits + 1
+        return {
+            "output_path" : output_path,
+            "file_prefix" : os.path.join(output_path, base_name),
+            "num_files" : num_files,
+            "num_width" : len(str(num_files)),
+            "continued" : continued,
+            "resynthesis" : resynthesis,
+            "type" : type,
+            "filenames" : filenames}
+
+    def _final_filepath(self, save_context : dict, index : float) -> str | None:
+        """Return the final filepath for the frame at the split position, or None
+           if the frame isn't kept"""
+        num_files = save_context["num_files"]
+        frame_number = round(index * (num_files - 1))
+
+        if save_context["resynthesis"] and (frame_number == 0 or frame_number == num_files - 1):
+            # if a resynthesis process, keep only the interpolated frames
+            return None
+        if save_context["continued"] and frame_number == 0:
+            # if a continuation from a previous set of frames, skip the first frame
+            # to maintain continuity since it's duplicate of the previous round last frame
+            return None
+
+        filenames = save_context["filenames"]
+        if filenames:
+            first_kept = 1 if save_context["resynthesis"] or save_context["continued"] else 0
+            return os.path.join(save_context["output_path"], filenames[frame_number - first_kept])
+        return save_context["file_prefix"]\
+            + str(frame_number).zfill(save_context["num_width"])\
+            + "." + save_context["type"]
+
+    def _recursive_split_tensors(self, first_index : float, last_index : float):
+        """Create a new frame tensor between the given tensors, and re-enter to split deeper
+           On return, all frames from first_index up to but not including last_index are saved
+        """
+        if self.enter_split():
+            mid_index = first_index + (last_index - first_index) / 2.0
+            self.tensor_register[mid_index] = self.interpolater.create_between_tensor(
+                self.tensor_register[first_index], self.tensor_register[last_index])
+            self.step_progress()
+
+            # deal with two new split regions
+            self._recursive_split_tensors(first_index, mid_index)
+            self._recursive_split_tensors(mid_index, last_index)
+            self.exit_split()
+        else:
+            # the first frame has no further use in splitting
+            self._save_registered_tensor(first_index)
+
+    def _save_registered_tensor(self, index : float):
+        """Save the frame at the split position with its final integerized filename
+           and release its tensor"""
+        self._save_split_frame(self.save_context, index, self.tensor_register.pop(index),
+                               self.original_frames.get(index))
+
+    def _save_split_frame(self, save_context : dict, index : float, tensor, original_frame):
+        """Save an in-memory frame at the split position with its final filename
+           The original frame is saved instead of the tensor if provided"""
+        new_filename = self._final_filepath(save_context, index)
+        if not new_filename:
+            return
+
+        frame = original_frame
+        if frame is None:
+            frame = self.interpolater.tensor_to_frame(self.padder, tensor)
+        write_frame(new_filename, frame)
+        self.output_paths.append(new_filename)
+
+    def batch_window(self) -> int:
+        """Return the number of frame pairs that can be split together by split_frames_batch()
+           Batching requires in-memory binary search splitting"""
+        if self.in_memory and not self.time_step:
+            return self.interpolater.batch_size
+        return 1
+
+    def split_frames_batch(self,
+                           jobs : list,
+                           num_splits : int,
+                           output_path : str,
+                           progress_label="Frames",
+                           type : str="png"):
+        """Invoke the Frame Interpolation feature for several frame pairs at once
+           Each job is a dict with 'before_filepath', 'after_filepath', 'base_filename',
+           'continued' and 'resynthesis' keys, and an optional 'filenames' key the same as
+           split_frames(). The jobs are split in step with each other so
+           each split is interpolated for all of the jobs together in one batch, holding only
+           the frames along the current split path the same as in-memory splitting.
+        """
+        num_steps = max_steps(num_splits)
+        self.init_progress(num_splits, num_steps * len(jobs), progress_label)
+        self.reset_split_manager(num_splits)
+        self.output_paths = []
+
+        frames = {}
+        for job in jobs:
+            for filepath in [job["before_filepath"], job["after_filepath"]]:
+                if filepath not in frames:
+                    frames[filepath] = cv2.imread(filepath)
+        self.padder = self.interpolater.create_padder(frames[jobs[0]["before_filepath"]])
+        tensors = {filepath : self.interpolater.frames_to_tensors(self.padder, frame)[0]
+                   for filepath, frame in frames.items()}
+
+        # registered split positions hold a tensor for each job
+        register = {0.0 : [tensors[job["before_filepath"]] for job in jobs],
+                    1.0 : [tensors[job["after_filepath"]] for job in jobs]}
+        del tensors
+        save_contexts = [self._create_save_context(num_splits, output_path,
+                                                   job["base_filename"], job["continued"],
+                                                   job["resynthesis"], type,
+                                                   job.get("filenames")) for job in jobs]
+        original_frames = [{0.0 : frames[job["before_filepath"]],
+                            1.0 : frames[job["after_filepath"]]} for job in jobs]
+
+        self._recursive_split_tensor_batch(register, 0.0, 1.0, save_contexts, original_frames)
+        self._save_registered_tensor_batch(register, 1.0, save_contexts, original_frames)
+        self.close_progress()
+
+    def _recursive_split_tensor_batch(self,
+                                      register : dict,
+                                      first_index : float,
+                                      last_index : float,
+                                      save_contexts : list,
+                                      original_frames : list):
+        """Create new frame tensors between the given tensors for all jobs, and re-enter to
+           split deeper. On return, all frames from first_index up to but not including
+           last_index are saved"""
+        if self.enter_split():
+            mid_index = first_index + (last_index - first_index) / 2.0
+            before_tensors = register[first_index]
+            register[mid_index] = self.interpolater.create_between_tensors(
+                before_tensors, register[last_index],
+                [Interpolate.STD_MIDFRAME] * len(before_tensors))
+            for _ in before_tensors:
+                self.step_progress()
+
+            # deal with two new split regions
+            self._recursive_split_tensor_batch(register, first_index, mid_index, save_contexts,
+                                               original_frames)
+            self._recursive_split_tensor_batch(register, mid_index, last_index, save_contexts,
+                                               original_frames)
+            self.exit_split()
+        else:
+            # the first frames have no further use in splitting
+            self._save_registered_tensor_batch(register, first_index, save_contexts,
+                                               original_frames)
+
+    def _save_registered_tensor_batch(self,
+                                      register : dict,
+                                      index : float,
+                                      save_contexts : list,
+                                      original_frames : list):
+        """Save the frames for all jobs at the split position and release their tensors"""
+        for save_context, tensor, job_frames in zip(save_contexts, register.pop(index),
+                                                    original_frames):
+            self._save_split_frame(save_context, index, tensor, job_frames.get(index))
+
+    def _integerize_split_frames(self, save_context : dict):
+        """Give the frame files created while splitting their final filenames"""
+        self.output_paths = []
+        for index, filepath in sorted(self.split_filepaths.items()):
+            if filepath in self.frame_register:
+                new_filename = self._final_filepath(save_context, index)
+                os.replace(filepath, new_filename)
+                self.output_paths.append(new_filename)
+                # self.log("renamed " + filepath + " to " + new_filename)
+
+    def _integerize_filenames(self, output_path, base_name, continued, resynthesis, type,
+                              filenames=None):
+        """Keep the interpolated frame files with an index number for sorting, or with the
+           passed filenames in order"""
         file_prefix = os.path.join(output_path, base_name)
         frame_files = self.sorted_registered_frames()
         num_files = len(frame_files)
@@ -153,7 +373,10 @@ class DeepInterpolate():
                 os.remove(file)
                 # self.log("continuation - removed uneeded " + file)
             else:
-                new_filename = file_prefix + str(index).zfill(num_width) + "." + type
+                if filenames:
+                    new_filename = os.path.join(output_path, filenames[len(self.output_paths)])
+                else:
+                    new_filename = file_prefix + str(index).zfill(num_width) + "." + type
                 os.replace(file, new_filename)
                 self.output_paths.append(new_filename)
                 # self.log("renamed " + file + " to " + new_filename)
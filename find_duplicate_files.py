@@ -5,11 +5,13 @@ import hashlib
 import os
 import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Callable
 from webui_utils.simple_log import SimpleLog
 from webui_utils.mtqdm import Mtqdm
 from webui_utils.color_out import ColorOut
 from webui_utils.file_utils import create_directory, split_filepath
+from webui_utils.hash_index import HashIndex
 
 def main():
     """Use the Find Duplicate Files feature from the command line"""
@@ -35,18 +37,33 @@ def main():
     parser.add_argument("--defunnel", dest="defunnel", default=False, action="store_true",
         help="Undo a funnel operation")
 
+    parser.add_argument("--threads", default=0, type=int,
+        help="Number of threads for hashing files (default: 0, automatic)")
+    parser.add_argument("--index_path", default=None, type=str,
+        help="If specified, file hashes are kept in this index file for reuse between runs (optional, default None)")
+    parser.add_argument("--prune_index", dest="prune_index", default=False, action="store_true",
+        help="Remove entries for files that no longer exist from the index file")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
     args = parser.parse_args()
 
     log = SimpleLog(args.verbose)
 
+    if args.prune_index:
+        if not args.index_path:
+            ColorOut("Please include the '--index_path' argument when specifying '--prune_index'", "green")
+            return
+        with HashIndex(args.index_path) as index:
+            removed = index.remove_missing()
+        ColorOut(f"Removed {removed} entries from {args.index_path}", "green")
+        return
+
     if args.keepre:
         ColorOut("The '-keepre' feature is not yet implemented", "green")
         return
 
     if args.defunnel:
-        FindDuplicateFiles(args.path, args.path2, args.wild, args.recursive, args.dupepath, args.keep, args.keepre, args.move, log.log).defunnel()
+        FindDuplicateFiles(args.path, args.path2, args.wild, args.recursive, args.dupepath, args.keep, args.keepre, args.move, log.log, args.threads, args.index_path).defunnel()
         return
 
     if args.keep and args.keep not in FindDuplicateFiles.KEEPTYPES:
@@ -62,9 +79,9 @@ def main():
         return
 
     if args.funnel:
-        FindDuplicateFiles(args.path, args.path2, args.wild, args.recursive, args.dupepath, args.keep, args.keepre, args.move, log.log).funnel()
+        FindDuplicateFiles(args.path, args.path2, args.wild, args.recursive, args.dupepath, args.keep, args.keepre, args.move, log.log, args.threads, args.index_path).funnel()
     else:
-        FindDuplicateFiles(args.path, args.path2, args.wild, args.recursive, args.dupepath, args.keep, args.keepre, args.move, log.log).find()
+        FindDuplicateFiles(args.path, args.path2, args.wild, args.recursive, args.dupepath, args.keep, args.keepre, args.move, log.log, args.threads, args.index_path).find()
 
 class FindDuplicateFiles:
     """Encapsulate logic for Find Duplicate Files feature"""
@@ -77,7 +94,9 @@ class FindDuplicateFiles:
                 keep : str,
                 keepre : str,
                 move : bool,
-                log_fn : Callable | None):
+                log_fn : Callable | None,
+                threads : int=0,
+                index_path : str | None=None):
         self.path = path
         self.path2 = path2
         self.wild = wild
@@ -87,6 +106,8 @@ class FindDuplicateFiles:
         self.keepre = keepre
         self.move = move
         self.log_fn = log_fn
+        self.threads = threads or min(32, (os.cpu_count() or 1) + 4)
+        self.index_path = index_path
 
     KEEPTYPES = [
         # 'minfound',
@@ -205,26 +226,7 @@ class FindDuplicateFiles:
         inaccessible_paths = {}
 
         if files:
-            with Mtqdm().open_bar(len(files), desc="Collecting Input Path Data") as bar:
-                for file in files:
-                    file_info = {}
-                    file_info["basename"] = os.path.basename(file)
-                    file_info["abspath"] = os.path.abspath(file)
-                    stats = os.stat(file)
-                    file_info["stats"] = stats
-                    file_info["bytes"] = stats.st_size
-                    file_info["modified"] = stats.st_mtime
-                    file_info["created"] = stats.st_ctime
-
-                    try:
-                        file_info["hash"] = FindDuplicateFiles.compute_file_hash(file)
-                    except Exception as error:
-                        inaccessible_paths[file] = str(error)
-                        self.log(f"\r\nSkipping file {file} due to error: {str(error)}")
-                        continue
-
-                    files_info[file] = file_info
-                    Mtqdm().update_bar(bar)
+            files_info = self.collect_file_info(files, "Collecting Input Path Data")
 
         if files2:
             if path2_files_info_cache:
@@ -232,134 +234,24 @@ class FindDuplicateFiles:
                 self.log(f"Reusing path2 files info cache length {len(path2_files_info_cache)}")
 
             if not files2_info:
-                with Mtqdm().open_bar(len(files2), desc="Collecting Purge Path Data") as bar:
-                    for file in files2:
-                        file_info = {}
-                        file_info["basename"] = os.path.basename(file)
-                        file_info["abspath"] = os.path.abspath(file)
-                        stats = os.stat(file)
-                        file_info["stats"] = stats
-                        file_info["bytes"] = stats.st_size
-                        file_info["modified"] = stats.st_mtime
-                        file_info["created"] = stats.st_ctime
-
-                        try:
-                            file_info["hash"] = FindDuplicateFiles.compute_file_hash(file)
-                        except Exception as error:
-                            inaccessible_paths[file] = str(error)
-                            self.log(f"\r\nSkipping file {file} due to error: {str(error)}")
-                            continue
-
-                        files2_info[file] = file_info
-                        Mtqdm().update_bar(bar)
+                files2_info = self.collect_file_info(files2, "Collecting Purge Path Data")
 
         files_info = files_info | files2_info
         self.log(f"total files info length {len(files_info)}")
 
+        # only files that might be duplicates are hashed, cached hashes are reused
+        self.compute_hashes(files_info, inaccessible_paths)
+        files_info = {name : info for name, info in files_info.items() if "hash" in info}
+        self.log(f"hashed files info length {len(files_info)}")
+
         if inaccessible_paths:
             for path, error in inaccessible_paths.items():
                 if path in files:
                     files.remove(path)
 
         if files_info:
-            result = {}
-
-            hash_result = []
-            hash_files_info = {}
-            dupes = self.find_duplicate_info(files_info, "hash")
-            if dupes:
-                dupe_list = [dupe['info'] for dupe in dupes]
-                dupe_set = sorted(set(dupe_list))
-
-                with Mtqdm().open_bar(len(dupe_set), desc="Scanning for 'hash' Matches") as bar:
-                    for dupe_info in dupe_set:
-                        dupe_result = {}
-                        dupe_result_infos = []
-                        try:
-                            for name, info in files_info.items():
-                                if info["hash"] == dupe_info:
-                                    dupe_result_infos.append(info)
-                                    hash_files_info[name] = info
-                        except Exception as error:
-                            print(error)
-                            Mtqdm().update_bar(bar)
-                            continue
-
-                        dupe_result[dupe_info] = dupe_result_infos
-                        hash_result.append(dupe_result)
-
-                        if(hash_result):
-                            result["hash"] = hash_result
-                        Mtqdm().update_bar(bar)
-
-            bytes_result = []
-            dupes = self.find_duplicate_info(hash_files_info, "bytes")
-            if dupes:
-                dupe_list = [dupe['info'] for dupe in dupes]
-                dupe_set = sorted(set(dupe_list))
-
-                with Mtqdm().open_bar(len(dupe_set), desc=f"Scanning for 'bytes' Matches") as bar:
-                    for dupe_info in dupe_set:
-                        dupe_result = {}
-                        dupe_result_infos = []
-                        try:
-                            for name, info in hash_files_info.items():
-                                if info["bytes"] == dupe_info:
-                                    dupe_result_infos.append(info)
-                        except Exception as error:
-                            print(error)
-                            # print(files_info)
-                            Mtqdm().update_bar(bar)
-                            continue
-
-                        dupe_result[dupe_info] = dupe_result_infos
-                        bytes_result.append(dupe_result)
-
-                        if(bytes_result):
-                            result["bytes"] = bytes_result
-                        Mtqdm().update_bar(bar)
-
-            if result:
-                reports = []
-                kind1_seen = []
-                kind2_seen = []
-
-                kind_keys1 = result.keys()
-                for kind1 in kind_keys1:
-                    kind1_seen.append(kind1)
-                    dupes1 = result[kind1]
-
-                    kind_keys2 = [key for key in result.keys() if key not in kind1_seen]
-                    for kind2 in kind_keys2:
-                        kind2_seen.append(kind2)
-                        dupes2 = result[kind2]
-
-                        with Mtqdm().open_bar(len(dupes1), desc="Matching Duplicates") as bar:
-                            for dupe in dupes1:
-                                kind_values1 = sorted(dupe.keys())
-
-                                for dupe2 in dupes2:
-                                    kind_values2 = sorted(dupe2.keys())
-
-                                    for kind_value in kind_values1:
-                                        entries1 = dupe[kind_value]
-                                        entries_paths1 = [entry['abspath'] for entry in entries1]
-
-                                        for kind_value2 in kind_values2:
-                                            entries2 = dupe2[kind_value2]
-                                            entries_paths2 = [entry['abspath'] for entry in entries2]
-
-                                            common_entries = list(set(entries_paths1).intersection(entries_paths2))
-                                            if len(common_entries) > 1:
-                                                record = {}
-                                                record["kind1"] = kind1
-                                                record["kind2"] = kind2
-                                                record["kindvalue1"] = kind_value
-                                                record["kindvalue2"] = kind_value2
-                                                record["dupes"] = common_entries
-                                                reports.append(record)
-                                Mtqdm().update_bar(bar)
-
+            reports = self.match_duplicates(files_info)
+            if reports:
                 if dupe_path and self.keep:
                     if self.move:
                         create_directory(dupe_path)
@@ -421,6 +313,131 @@ class FindDuplicateFiles:
 
         return moved, files2, files2_info
 
+    def collect_file_info(self, files : list, desc : str) -> dict:
+        """Collect the name, path and stats of each file, without hashing"""
+        files_info = {}
+        with Mtqdm().open_bar(len(files), desc=desc) as bar:
+            for file in files:
+                file_info = {}
+                file_info["basename"] = os.path.basename(file)
+                file_info["abspath"] = os.path.abspath(file)
+                stats = os.stat(file)
+                file_info["stats"] = stats
+                file_info["bytes"] = stats.st_size
+                file_info["modified"] = stats.st_mtime
+                file_info["created"] = stats.st_ctime
+                files_info[file] = file_info
+                Mtqdm().update_bar(bar)
+        return files_info
+
+    # files sharing a size are compared by a hash of this many bytes at their head and tail
+    SAMPLE_SIZE = 64 * 1024
+
+    def compute_hashes(self, files_info : dict, inaccessible_paths : dict) -> None:
+        """
+        Add the 'hash' to files that might be duplicates. Files are grouped by size, then
+        by a hash of a sample of the head and tail, and fully hashed only if those match.
+        Files that can't be read are removed from files_info and added to inaccessible_paths
+        """
+        if self.index_path:
+            with HashIndex(self.index_path) as index:
+                indexed = self.load_indexed_hashes(index, files_info)
+                self._compute_hashes(files_info, inaccessible_paths)
+                self.save_indexed_hashes(index, files_info, indexed)
+        else:
+            self._compute_hashes(files_info, inaccessible_paths)
+
+    def load_indexed_hashes(self, index : HashIndex, files_info : dict) -> dict:
+        """Reuse hashes from the index for files unchanged since they were indexed
+           Returns a dict of name to the (sample, hash) that were loaded"""
+        indexed = {}
+        for name, info in files_info.items():
+            if "sample" in info:
+                # already hashed in this process
+                indexed[name] = (info["sample"], info.get("hash"))
+                continue
+            sample, hash = index.lookup(info["abspath"], info["bytes"], info["stats"].st_mtime_ns)
+            if sample:
+                info["sample"] = sample
+            if hash:
+                info["hash"] = hash
+            indexed[name] = (sample, hash)
+        self.log(f"Reused indexed hashes for {len([v for v in indexed.values() if v[0]])} files")
+        return indexed
+
+    def save_indexed_hashes(self, index : HashIndex, files_info : dict, indexed : dict) -> None:
+        """Store hashes computed in this run in the index"""
+        entries = []
+        for name, info in files_info.items():
+            hashes = (info.get("sample"), info.get("hash"))
+            if hashes[0] and hashes != indexed.get(name):
+                entries.append((info["abspath"], info["bytes"], info["stats"].st_mtime_ns,
+                                *hashes))
+        index.store(entries)
+        self.log(f"Stored hashes for {len(entries)} files in {self.index_path}")
+
+    def _compute_hashes(self, files_info : dict, inaccessible_paths : dict) -> None:
+        by_size = self.group_names(files_info, lambda info: info["bytes"])
+        self.hash_files(files_info, by_size, "sample", FindDuplicateFiles.compute_sample_hash,
+                        "Sampling Files", inaccessible_paths)
+
+        for info in files_info.values():
+            # the sample of a small file is the whole file
+            if "sample" in info and info["bytes"] <= 2 * self.SAMPLE_SIZE:
+                info["hash"] = info["sample"]
+
+        sampled_info = {name : info for name, info in files_info.items() if "sample" in info}
+        by_sample = self.group_names(sampled_info, lambda info: (info["bytes"], info["sample"]))
+        self.hash_files(files_info, by_sample, "hash", FindDuplicateFiles.compute_file_hash,
+                        "Hashing Files", inaccessible_paths)
+
+    def group_names(self, files_info : dict, key_fn : Callable) -> list:
+        """Get the names of files that share a key with at least one other file"""
+        groups = {}
+        for name, info in files_info.items():
+            groups.setdefault(key_fn(info), []).append(name)
+        return [name for names in groups.values() if len(names) > 1 for name in names]
+
+    def hash_files(self,
+                   files_info : dict,
+                   names : list,
+                   kind : str,
+                   hash_fn : Callable,
+                   desc : str,
+                   inaccessible_paths : dict) -> None:
+        """Set files_info[name][kind] using hash_fn on a pool of threads, if not already set"""
+        names = [name for name in names if kind not in files_info[name]]
+        if not names:
+            return
+
+        with Mtqdm().open_bar(len(names), desc=desc) as bar:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                futures = {executor.submit(hash_fn, name) : name for name in names}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        files_info[name][kind] = future.result()
+                    except Exception as error:
+                        inaccessible_paths[name] = str(error)
+                        self.log(f"\r\nSkipping file {name} due to error: {str(error)}")
+                        del files_info[name]
+                    Mtqdm().update_bar(bar)
+
+    @staticmethod
+    def compute_sample_hash(file_path : str, algorithm="sha256") -> str:
+        """Compute the hash of the head and tail of a file, or the whole file if small."""
+        sample_size = FindDuplicateFiles.SAMPLE_SIZE
+        size = os.path.getsize(file_path)
+        if size <= 2 * sample_size:
+            return FindDuplicateFiles.compute_file_hash(file_path, algorithm)
+
+        hash_func = hashlib.new(algorithm)
+        with open(file_path, "rb") as file:
+            hash_func.update(file.read(sample_size))
+            file.seek(-sample_size, os.SEEK_END)
+            hash_func.update(file.read(sample_size))
+        return hash_func.hexdigest()
+
     @staticmethod
     def compute_file_hash(file_path : str, algorithm="sha256") -> str:
         """Compute the hash of a file using the specified algorithm."""
@@ -428,45 +445,42 @@ class FindDuplicateFiles:
 
         try:
             with open(file_path, "rb") as file:
-                while chunk := file.read(8192):  # Read the file in chunks of 8192 bytes
+                while chunk := file.read(1024 * 1024):  # Read the file in chunks of 1 MB
                     hash_func.update(chunk)
 
             return hash_func.hexdigest()
         except PermissionError as error:
             raise error
 
-    # https://stackoverflow.com/questions/9835762/how-do-i-find-the-duplicates-in-a-list-and-create-another-list-with-them
-    @staticmethod
-    def find_duplicates(L : list) -> list:
-        seen = set()
-        seen2 = set()
-        seen_add = seen.add
-        seen2_add = seen2.add
-        for item in L:
-            if item in seen:
-                seen2_add(item)
-            else:
-                seen_add(item)
-        return list(seen2)
-
-    # find duplicates in a dictionary, specifying the dictionary, and the nested dictionary item name to inspect
-    def find_duplicate_info(self, file_info : dict, kind : str) -> list:
-        entries = []
-        for name, info in file_info.items():
-            entries.append(info[kind])
-        dupes = sorted(FindDuplicateFiles.find_duplicates(entries))
-
-        result = []
-        with Mtqdm().open_bar(len(file_info.keys()), desc="Compiling Duplicates") as bar:
-            for name, info in file_info.items():
-                if info[kind] in dupes:
-                    entry = {}
-                    entry["name"] = name
-                    entry["kind"] = kind
-                    entry["info"] = info[kind]
-                    result.append(entry)
+    def match_duplicates(self, files_info : dict) -> list:
+        """
+        Group files with matching hashes, then matching sizes within each hash group
+        returns a list of reports of duplicate absolute paths
+        """
+        by_hash = {}
+        for info in files_info.values():
+            by_hash.setdefault(info["hash"], []).append(info)
+
+        reports = []
+        with Mtqdm().open_bar(len(by_hash), desc="Matching Duplicates") as bar:
+            for hash_value in sorted(by_hash.keys()):
+                infos = by_hash[hash_value]
+                if len(infos) > 1:
+                    by_bytes = {}
+                    for info in infos:
+                        by_bytes.setdefault(info["bytes"], {})[info["abspath"]] = True
+                    for bytes_value in sorted(by_bytes.keys()):
+                        abspaths = list(by_bytes[bytes_value].keys())
+                        if len(abspaths) > 1:
+                            record = {}
+                            record["kind1"] = "hash"
+                            record["kind2"] = "bytes"
+                            record["kindvalue1"] = hash_value
+                            record["kindvalue2"] = bytes_value
+                            record["dupes"] = abspaths
+                            reports.append(record)
                 Mtqdm().update_bar(bar)
-        return result
+        return reports
 
     def abspath_complexity_scores(self, abspaths : list) -> dict:
         result = {}
@@ -24,7 +24,7 @@ def main():
     parser.add_argument('--model',
         default='ours', type=str)
     parser.add_argument('--gpu_ids', type=str, default='0',
-        help='gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU (FUTURE USE)')
+        help='gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available')
     parser.add_argument('--img_before', default="images/image0.png", type=str,
         help="Path to before frame image")
     parser.add_argument('--img_after', default="images/image2.png", type=str,
@@ -60,10 +60,12 @@ class Interpolate:
     def __init__(self,
                 model,
                 log_fn : Callable | None,
-                type : str="png"):
+                type : str="png",
+                batch_size : int=1):
         self.model = model
         self.log_fn = log_fn
         self.type = type
+        self.batch_size = max(1, batch_size)
         self.output_paths = []
 
     def create_between_frame(self,
@@ -76,20 +78,103 @@ class Interpolate:
         I0 = cv2.imread(before_filepath)
         I2 = cv2.imread(after_filepath)
 
-        I0_ = (torch.tensor(I0.transpose(2, 0, 1)).cuda() / 255.).unsqueeze(0)
-        I2_ = (torch.tensor(I2.transpose(2, 0, 1)).cuda() / 255.).unsqueeze(0)
+        padder = self.create_padder(I0)
+        I0_, I2_ = self.frames_to_tensors(padder, I0, I2)
 
-        padder = InputPadder(I0_.shape, divisor=32)
-        I0_, I2_ = padder.pad(I0_, I2_)
-
-        model = self.model["model"]
-        TTA = self.model["TTA"]
-
-        mid = (padder.unpad(model.inference(I0_, I2_, TTA=TTA, fast_TTA=TTA, timestep = time_step))[0].detach().cpu().numpy().transpose(1, 2, 0) * 255.0).astype(np.uint8)
+        mid = self.tensor_to_frame(padder, self.create_between_tensor(I0_, I2_, time_step))
         images = [I0[:, :, ::-1], mid[:, :, ::-1], I2[:, :, ::-1]]
         imsave(middle_filepath, images[1])
         self.output_paths.append(middle_filepath)
 
+    def create_padder(self, frame : np.ndarray):
+        """Create an InputPadder suitable for frames the size of the given frame"""
+        return InputPadder(frame.shape[:2], divisor=32)
+
+    def frames_to_tensors(self, padder, *frames : np.ndarray) -> list:
+        """Convert frames read with cv2.imread() into padded, normalized tensors for inference"""
+        device = self.model["device"]
+        dtype = self.model["dtype"]
+        return [padder.pad(
+            (torch.tensor(frame.transpose(2, 0, 1)).to(device=device, dtype=dtype) / 255.)\
+                .unsqueeze(0)) for frame in frames]
+
+    def tensor_to_frame(self, padder, tensor) -> np.ndarray:
+        """Convert a padded, normalized tensor back into a frame suitable for cv2.imwrite()"""
+        return (padder.unpad(tensor)[0].detach().float().cpu().numpy().transpose(1, 2, 0) * 255.0)\
+            .astype(np.uint8)
+
+    def create_between_tensor(self, before_tensor, after_tensor, time_step : float = STD_MIDFRAME):
+        """Interpolate between two padded, normalized tensors, returning a tensor of the same form
+           The result can be fed back in to interpolate further without leaving the device
+        """
+        model = self.model["model"]
+        TTA = self.model["TTA"]
+        return model.inference(before_tensor, after_tensor, TTA=TTA, fast_TTA=TTA,
+                               timestep=time_step)
+
+    def create_between_tensors(self,
+                               before_tensors : list,
+                               after_tensors : list,
+                               time_steps : list) -> list:
+        """Interpolate between many pairs of padded, normalized tensors of the same size,
+           returning a list of tensors in the same order. Pairs sharing a time step are
+           stacked and run through the model together, up to batch_size pairs at a time
+        """
+        results = [None] * len(before_tensors)
+        time_step_groups = {}
+        for index, time_step in enumerate(time_steps):
+            time_step_groups.setdefault(time_step, []).append(index)
+
+        for time_step, indexes in time_step_groups.items():
+            for start in range(0, len(indexes), self.batch_size):
+                batch = indexes[start:start + self.batch_size]
+                before_batch = torch.cat([before_tensors[index] for index in batch])
+                after_batch = torch.cat([after_tensors[index] for index in batch])
+                preds = self._batch_inference(before_batch, after_batch, time_step)
+                for index, pred in zip(batch, preds):
+                    results[index] = pred.unsqueeze(0)
+        return results
+
+    def _batch_inference(self, before_batch, after_batch, time_step : float):
+        """Run a stacked batch of tensor pairs through the model"""
+        model = self.model["model"]
+        TTA = self.model["TTA"]
+        count = before_batch.shape[0]
+        if count == 1 or not TTA:
+            return model.inference(before_batch, after_batch, TTA=TTA, fast_TTA=TTA,
+                                   timestep=time_step)
+
+        # the model's fast TTA handles only a batch size of one, so do the equivalent here
+        # by inferring the flipped pairs in the same batch, then averaging the results
+        preds = model.inference(torch.cat((before_batch, before_batch.flip(2).flip(3))),
+                                torch.cat((after_batch, after_batch.flip(2).flip(3))),
+                                timestep=time_step)
+        return (preds[:count] + preds[count:].flip(2).flip(3)) / 2.
+
+    def create_between_frame_batch(self,
+                                   before_filepaths : list,
+                                   after_filepaths : list,
+                                   middle_filepaths : list,
+                                   time_steps : list):
+        """Invoke the Frame Interpolation feature for many frame pairs at once
+           The frames must all be the same size
+        """
+        frames = {}
+        for filepath in before_filepaths + after_filepaths:
+            if filepath not in frames:
+                frames[filepath] = cv2.imread(filepath)
+
+        padder = self.create_padder(frames[before_filepaths[0]])
+        tensors = {filepath : self.frames_to_tensors(padder, frame)[0]
+                   for filepath, frame in frames.items()}
+
+        mids = self.create_between_tensors([tensors[filepath] for filepath in before_filepaths],
+                                           [tensors[filepath] for filepath in after_filepaths],
+                                           time_steps)
+        for middle_filepath, mid in zip(middle_filepaths, mids):
+            imsave(middle_filepath, self.tensor_to_frame(padder, mid)[:, :, ::-1])
+            self.output_paths.append(middle_filepath)
+
     def create_between_frames(self,
                             before_filepath : str,
                             after_filepath : str,
@@ -102,11 +187,8 @@ class Interpolate:
         I0 = cv2.imread(before_filepath)
         I2 = cv2.imread(after_filepath)
 
-        I0_ = (torch.tensor(I0.transpose(2, 0, 1)).cuda() / 255.).unsqueeze(0)
-        I2_ = (torch.tensor(I2.transpose(2, 0, 1)).cuda() / 255.).unsqueeze(0)
-
-        padder = InputPadder(I0_.shape, divisor=32)
-        I0_, I2_ = padder.pad(I0_, I2_)
+        padder = self.create_padder(I0)
+        I0_, I2_ = self.frames_to_tensors(padder, I0, I2)
 
         model = self.model["model"]
         TTA = self.model["TTA"]
@@ -120,7 +202,7 @@ class Interpolate:
 
         preds = model.multi_inference(I0_, I2_, TTA=TTA, time_list=[(i+1)*(1./set_count) for i in range(set_count - 1)], fast_TTA=TTA)
         for pred in preds:
-            images.append((padder.unpad(pred).detach().cpu().numpy().transpose(1, 2, 0) * 255.0).astype(np.uint8)[:, :, ::-1])
+            images.append((padder.unpad(pred).detach().float().cpu().numpy().transpose(1, 2, 0) * 255.0).astype(np.uint8)[:, :, ::-1])
         images.append(I2[:, :, ::-1])
 
         with Mtqdm().open_bar(total=len(images), desc="Saving") as bar:
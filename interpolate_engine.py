@@ -1,5 +1,6 @@
 """EMA-VFI Engine Encapsulation Class"""
 import sys
+import torch
 
 '''==========import from our code=========='''
 sys.path.append('.')
@@ -9,42 +10,58 @@ from Trainer import Model # pylint: disable=import-error
 class InterpolateEngine:
     """Singleton class encapsulating the EMA-VFI engine and related logic"""
     # model should be "ours" or "ours_small", or your own trained model
-    # gpu_ids is for *future use*
+    # gpu_ids selects the device: "-1" for CPU, "auto" (or empty) to use CUDA if available,
+    #   otherwise the first listed CUDA device index is used, ex: "0" or "1,2"
     # if use_time_step is True "_t" is appended to the model name
     def __new__(cls, model : str, gpu_ids : str, use_time_step : bool=False):
-        if not hasattr(cls, 'instance'):
-            cls.instance = super(InterpolateEngine, cls).__new__(cls)
-            cls.instance.init(model, gpu_ids, use_time_step)
-        elif cls.instance.model_name != model or cls.instance.use_time_step != use_time_step:
-            cls.instance = super(InterpolateEngine, cls).__new__(cls)
-            cls.instance.init(model, gpu_ids, use_time_step)
+        if not hasattr(cls, 'instance') or cls.instance.model_name != model\
+                or cls.instance.use_time_step != use_time_step or cls.instance.gpu_ids != gpu_ids:
+            # keep the current instance if the new one fails to initialize
+            instance = super(InterpolateEngine, cls).__new__(cls)
+            instance.init(model, gpu_ids, use_time_step)
+            cls.instance = instance
         return cls.instance
 
     def init(self, model : str, gpu_ids: str, use_time_step):
         """Iniitalize the class by calling into EMA-VFI code"""
-        gpu_id_array = self.init_device(gpu_ids)
+        self.gpu_ids = gpu_ids
+        self.device = self.init_device(gpu_ids)
         self.model_name = model
         self.use_time_step = use_time_step
-        self.model = self.init_model(model, gpu_id_array, use_time_step)
+        self.model = self.init_model(model, self.device, use_time_step)
 
-    def init_device(self, gpu_ids : str):
-        """for *future use*"""
-        str_ids = gpu_ids.split(',')
-        gpu_ids = []
-        for str_id in str_ids:
-            _id = int(str_id)
+    def init_device(self, gpu_ids : str) -> torch.device:
+        """Choose the torch device to run the model on"""
+        gpu_ids = str(gpu_ids).strip().lower()
+        if not gpu_ids or gpu_ids == "auto":
+            if torch.cuda.is_available():
+                gpu_ids = "0"
+            else:
+                gpu_ids = "-1"
+
+        ids = []
+        for str_id in gpu_ids.split(','):
+            try:
+                _id = int(str_id)
+            except ValueError:
+                raise RuntimeError(f"Error initializing EMA-VFI device: invalid gpu_ids '{gpu_ids}'")
             if _id >= 0:
-                gpu_ids.append(_id)
-        # for *future use*
-        # if len(gpu_ids) > 0:
-        #     torch.cuda.set_device(gpu_ids[0])
-        # cudnn.benchmark = True
-        return gpu_ids
+                ids.append(_id)
+
+        if not ids:
+            return torch.device("cpu")
+
+        if not torch.cuda.is_available():
+            raise RuntimeError(
+    f"Error initializing EMA-VFI device: CUDA device {ids[0]} requested but CUDA is not available")
+
+        # only a single device is used
+        torch.cuda.set_device(ids[0])
+        torch.backends.cudnn.benchmark = True
+        return torch.device("cuda", ids[0])
 
-    def init_model(self, model, gpu_id_array, use_time_step):
+    def init_model(self, model, device, use_time_step):
         """EMA-VFI code from demo_2x.py"""
-        # for *future use*
-        # device = torch.device('cuda' if len(gpu_id_array) != 0 else 'cpu')
         '''==========Model setting=========='''
         TTA = True
         if model == 'ours_small':
@@ -61,10 +78,41 @@ class InterpolateEngine:
                 depth = [2, 2, 2, 4, 4]
             )
         try:
-            model = Model(-1)
+            model = DeviceModel(-1, device)
             model.load_model()
             model.eval()
             model.device()
-            return {"model" : model, "TTA" : TTA}
+            dtype = next(model.net.parameters()).dtype
+            return {"model" : model, "TTA" : TTA, "device" : device, "dtype" : dtype}
         except AssertionError as error:
             raise RuntimeError(f"Error initializing EMA-VFI model: {error}")
+
+class DeviceModel(Model):
+    """EMA-VFI Model that is placed on a chosen device instead of always on CUDA"""
+    def __init__(self, local_rank, target_device : torch.device):
+        # set before calling into the base class, which calls device()
+        self.target_device = target_device
+        super().__init__(local_rank)
+
+    def device(self):
+        """Move the network to the chosen device"""
+        self.net.to(self.target_device)
+
+    def load_model(self, name=None, rank=0):
+        """Load the saved weights, mapping them onto the chosen device if not using CUDA"""
+        if self.target_device.type == "cuda":
+            super().load_model(name, rank)
+            return
+
+        # same as the base class, which can load the CUDA-saved weights only onto CUDA
+        def convert(param):
+            return {
+                k.replace("module.", ""): v
+                for k, v in param.items()
+                if "module." in k and 'attn_mask' not in k and 'HW' not in k
+            }
+        if rank <= 0:
+            if name is None:
+                name = self.name
+            self.net.load_state_dict(
+                convert(torch.load(f'ckpt/{name}.pkl', map_location=self.target_device)))
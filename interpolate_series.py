@@ -14,7 +14,7 @@ def main():
     parser.add_argument("--model",
         default="ours", type=str)
     parser.add_argument("--gpu_ids", type=str, default="0",
-        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU")
+        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available")
     parser.add_argument("--input_path", default="images", type=str,
         help="Input path for frames to interpolate")
     parser.add_argument("--depth", default=2, type=int,
@@ -29,6 +29,13 @@ def main():
         help="Use Time Step instead of Binary Search interpolation (Default: False)")
     parser.add_argument("--type", default="png", type=str,
                         help="File type for frame files (Default 'png')")
+    parser.add_argument("--in_memory", dest="in_memory", default=False, action="store_true",
+        help="Keep split frames in memory, saving only the final frames (Default: False)")
+    parser.add_argument("--batch_size", default=1, type=int,
+        help="Maximum frame pairs to interpolate together (Default: 1)")
+    parser.add_argument("--interframes_only", dest="interframes_only", default=False,
+        action="store_true",
+        help="Keep only the created frames, numbered in sequence from 1 (Default: False)")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
     args = parser.parse_args()
@@ -36,13 +43,14 @@ def main():
     log = SimpleLog(args.verbose)
     create_directory(args.output_path)
     engine = InterpolateEngine(args.model, args.gpu_ids, use_time_step=args.time_step)
-    interpolater = Interpolate(engine.model, log.log)
-    deep_interpolater = DeepInterpolate(interpolater, args.time_step, log.log)
+    interpolater = Interpolate(engine.model, log.log, batch_size=args.batch_size)
+    deep_interpolater = DeepInterpolate(interpolater, args.time_step, log.log,
+                                        in_memory=args.in_memory)
     series_interpolater = InterpolateSeries(deep_interpolater, log.log)
 
     file_list = get_files(args.input_path, extension=args.type)
     series_interpolater.interpolate_series(file_list, args.output_path, args.depth,
-        args.base_filename, args.offset, type=args.type)
+        args.base_filename, args.offset, type=args.type, interframes_only=args.interframes_only)
 
 class InterpolateSeries():
     """Encapsulate logic for the Video Inflation feature"""
@@ -58,11 +66,20 @@ class InterpolateSeries():
                             num_splits : int,
                             base_filename : str,
                             offset : int = 1,
-                            type : str="png"):
-        """Invoke the Video Inflation feature"""
+                            type : str="png",
+                            interframes_only : bool=False):
+        """Invoke the Video Inflation feature
+           interframes_only: keep only the frames created between each pair, named with
+            base_filename and a series index starting at 1"""
         file_list = sorted(file_list)
         count = len(file_list)
         num_width = len(str(count))
+        num_interframes = 2 ** num_splits - 1
+        interframe_width = len(str((count - offset) * num_interframes))
+
+        # frame pairs are split together in windows when the deep interpolater supports it
+        batch_window = self.deep_interpolater.batch_window()
+        jobs = []
 
         pbar_desc = "Frames" if num_splits < 2 else "Total"
         with Mtqdm().open_bar(total=count - offset, desc=pbar_desc) as bar:
@@ -73,7 +90,9 @@ class InterpolateSeries():
 
                 # if the offset is > 1 treat this as a resynthesis of frames
                 # and inform the deep interpolator to not keep the real frames
-                resynthesis = offset > 1
+                resynthesis = offset > 1 or interframes_only
+                if interframes_only:
+                    continued = False
 
                 before_file = file_list[frame]
                 after_file = file_list[frame + offset]
@@ -83,6 +102,27 @@ class InterpolateSeries():
                 base_index = frame + (1 if resynthesis else 0)
                 filename = base_filename + "[" + str(base_index).zfill(num_width) + "]"
 
+                # created frames are saved directly with their final series filenames
+                filenames = None
+                if interframes_only:
+                    first_index = frame * num_interframes + 1
+                    filenames = [base_filename + str(index).zfill(interframe_width) + "." + type
+                                 for index in range(first_index, first_index + num_interframes)]
+
+                if batch_window > 1:
+                    jobs.append({
+                        "frame" : frame,
+                        "before_filepath" : before_file,
+                        "after_filepath" : after_file,
+                        "base_filename" : filename,
+                        "continued" : continued,
+                        "resynthesis" : resynthesis,
+                        "filenames" : filenames})
+                    if len(jobs) >= batch_window or frame == count - offset - 1:
+                        self._split_frames_batch(jobs, num_splits, output_path, type, bar)
+                        jobs = []
+                    continue
+
                 inner_bar_desc = f"Frame #{frame}"
                 # self.log(f"creating inflated frames for frame files {before_file} - {after_file}")
                 self.deep_interpolater.split_frames(before_file,
@@ -93,9 +133,21 @@ class InterpolateSeries():
                                                     progress_label=inner_bar_desc,
                                                     continued=continued,
                                                     resynthesis=resynthesis,
-                                                    type=type)
+                                                    type=type,
+                                                    filenames=filenames)
                 Mtqdm().update_bar(bar)
 
+    def _split_frames_batch(self, jobs : list, num_splits : int, output_path : str, type : str,
+                            bar):
+        """Split a window of frame pairs together"""
+        inner_bar_desc = f"Frames #{jobs[0]['frame']}-{jobs[-1]['frame']}"
+        self.deep_interpolater.split_frames_batch(jobs,
+                                                  num_splits,
+                                                  output_path,
+                                                  progress_label=inner_bar_desc,
+                                                  type=type)
+        Mtqdm().update_bar(bar, len(jobs))
+
     def log(self, message):
         """Logging"""
         if self.log_fn:
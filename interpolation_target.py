@@ -8,6 +8,7 @@ import cv2
 from interpolate_engine import InterpolateEngine
 from interpolate import Interpolate
 from webui_utils.simple_log import SimpleLog
+from webui_utils.image_utils import write_frame
 from webui_utils.simple_utils import float_range_in_range, sortable_float_index
 from webui_utils.file_utils import create_directory, split_filepath
 from webui_utils.mtqdm import Mtqdm
@@ -18,7 +19,7 @@ def main():
     parser.add_argument("--model",
         default="ours", type=str)
     parser.add_argument("--gpu_ids", type=str, default="0",
-        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU (FUTURE USE)")
+        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available")
     parser.add_argument("--img_before", default="images/image0.png", type=str,
         help="Path to before frame image")
     parser.add_argument("--img_after", default="images/image2.png", type=str,
@@ -97,6 +98,77 @@ class TargetInterpolate():
         self._isolate_target_frame(keep_samples)
         self.close_progress()
 
+    def split_frames_batch(self,
+                           jobs : list,
+                           num_splits : int,
+                           output_path : str,
+                           progress_label="Search"):
+        """Invoke the Frame Search feature for several frame pairs at once, keeping the split
+           frames in memory. Each job is a dict with 'before_filepath', 'after_filepath',
+           'min_target', 'max_target' and 'base_filename' keys. The searches still going at
+           each depth are interpolated together in batches across all of the jobs.
+        """
+        self.init_progress(num_splits, num_splits, progress_label)
+        frames = {}
+        for job in jobs:
+            for filepath in [job["before_filepath"], job["after_filepath"]]:
+                if filepath not in frames:
+                    frames[filepath] = cv2.imread(filepath)
+        padder = self.interpolater.create_padder(frames[jobs[0]["before_filepath"]])
+        tensors = {filepath : self.interpolater.frames_to_tensors(padder, frame)[0]
+                   for filepath, frame in frames.items()}
+
+        # each search holds its current split range, and is found at the last frame created
+        searches = [{"job" : job,
+                     "first" : (0.0, tensors[job["before_filepath"]]),
+                     "last" : (1.0, tensors[job["after_filepath"]]),
+                     "found" : (1.0, None)} for job in jobs]
+        active = searches
+        for _ in range(num_splits):
+            if not active:
+                break
+            mids = self.interpolater.create_between_tensors(
+                [search["first"][1] for search in active],
+                [search["last"][1] for search in active],
+                [Interpolate.STD_MIDFRAME] * len(active))
+
+            still_active = []
+            for search, mid in zip(active, mids):
+                first_index, last_index = search["first"][0], search["last"][0]
+                mid_index = first_index + (last_index - first_index) / 2.0
+                search["found"] = (mid_index, mid)
+                min_target = search["job"]["min_target"]
+                max_target = search["job"]["max_target"]
+
+                # no more work if the mid point entirely within the target range
+                if float_range_in_range(mid_index, mid_index, min_target, max_target):
+                    continue
+                # continue into the half that gets closer to the target range
+                if float_range_in_range(min_target, max_target, first_index, mid_index,
+                    use_midpoint=True):
+                    search["last"] = (mid_index, mid)
+                    still_active.append(search)
+                elif float_range_in_range(min_target, max_target, mid_index, last_index,
+                    use_midpoint=True):
+                    search["first"] = (mid_index, mid)
+                    still_active.append(search)
+            active = still_active
+            self.step_progress()
+
+        for search in searches:
+            job = search["job"]
+            found_index, found_tensor = search["found"]
+            if found_tensor is None:
+                frame = frames[job["after_filepath"]]
+            else:
+                frame = self.interpolater.tensor_to_frame(padder, found_tensor)
+            float_index = sortable_float_index(found_index)
+            found_file = os.path.join(output_path,
+                                      f"{job['base_filename']}@{float_index}.{self.type}")
+            write_frame(found_file, frame)
+            self.output_paths.append(found_file)
+        self.close_progress()
+
     def _set_up_outer_frames(self,
                             before_file,
                             after_file,
@@ -18,7 +18,7 @@ def main():
     parser.add_argument("--model", default="ours",
         type=str)
     parser.add_argument("--gpu_ids", type=str, default="0",
-        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU (FUTURE USE)")
+        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available")
     parser.add_argument("--input_path", default="images", type=str,
         help="Input path for PNGs to interpolate")
     parser.add_argument("--original_fps", default=25, type=int,
@@ -35,6 +35,8 @@ def main():
         help="Duplicate frames to fill instead of using interpolation (Default: False)")
     parser.add_argument("--time_step", dest="time_step", default=False, action="store_true",
         help="Use Time Step instead of Binary Search interpolation (Default: False)")
+    parser.add_argument("--batch_size", default=1, type=int,
+        help="Maximum frame pairs to interpolate together (Default: 1)")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
     args = parser.parse_args()
@@ -42,7 +44,7 @@ def main():
     log = SimpleLog(args.verbose)
     create_directory(args.output_path)
     engine = InterpolateEngine(args.model, args.gpu_ids, use_time_step=args.time_step)
-    interpolater = Interpolate(engine.model, log.log)
+    interpolater = Interpolate(engine.model, log.log, batch_size=args.batch_size)
     target_interpolater = TargetInterpolate(interpolater, log.log)
     series_resampler = ResampleSeries(interpolater, target_interpolater, args.time_step, log.log)
 
@@ -99,6 +101,15 @@ class ResampleSeries():
         sample_set = superset[::sample_rate]
         num_width = len(str(len(superset)))
 
+        # time step renders are interpolated together in windows, batched by time step,
+        # and binary searches are split together in windows, batched by search depth
+        if self.time_step:
+            batch_window = self.interpolater.batch_size * len(searches)
+        else:
+            batch_window = self.interpolater.batch_size
+        pending_renders = []
+        pending_searches = []
+
         with Mtqdm().open_bar(total=len(sample_set), desc="Resamples") as bar:
             for sample in sample_set:
                 frame = sample["frame"]
@@ -120,11 +131,32 @@ class ResampleSeries():
                         time = sortable_float_index(search)
                         output_filepath = os.path.join(output_path, f"{filename}@{time}.png")
                         self.log(f"rendering {output_filepath} from {before_file}")
-                        self.interpolater.create_between_frame(before_file, after_file, output_filepath,
-                                                            time_step=search)
+                        if batch_window > 1:
+                            pending_renders.append((before_file, after_file, output_filepath,
+                                                    search))
+                            if len(pending_renders) >= batch_window:
+                                self._render_batch(pending_renders)
+                                pending_renders = []
+                        else:
+                            self.interpolater.create_between_frame(before_file, after_file,
+                                                                   output_filepath,
+                                                                   time_step=search)
                     else:
                         self.log(f"searching {before_file} for frame time {search}")
                         filename = f"{base_filename}[{frame_number}]"
+                        if batch_window > 1:
+                            pending_searches.append({
+                                "before_filepath" : before_file,
+                                "after_filepath" : after_file,
+                                "min_target" : search,
+                                "max_target" : search,
+                                "base_filename" : filename})
+                            if len(pending_searches) >= batch_window:
+                                self.target_interpolater.split_frames_batch(
+                                    pending_searches, depth, output_path)
+                                pending_searches = []
+                            Mtqdm().update_bar(bar)
+                            continue
                         self.target_interpolater.split_frames(before_file,
                                                                 after_file,
                                                                 depth,
@@ -135,6 +167,11 @@ class ResampleSeries():
                                                                 progress_label="Search")
                 Mtqdm().update_bar(bar)
 
+            if pending_renders:
+                self._render_batch(pending_renders)
+            if pending_searches:
+                self.target_interpolater.split_frames_batch(pending_searches, depth, output_path)
+
             if self.time_step:
                 self.output_paths.extend(self.interpolater.output_paths)
                 self.interpolater.output_paths = []
@@ -142,6 +179,12 @@ class ResampleSeries():
                 self.output_paths.extend(self.target_interpolater.output_paths)
                 self.target_interpolater.output_paths = []
 
+    def _render_batch(self, renders : list):
+        """Render a window of (before file, after file, output file, time step) together"""
+        before_files, after_files, output_filepaths, time_steps = zip(*renders)
+        self.interpolater.create_between_frame_batch(list(before_files), list(after_files),
+                                                     list(output_filepaths), list(time_steps))
+
     def log(self, message):
         """Logging"""
         if self.log_fn:
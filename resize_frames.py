@@ -2,6 +2,8 @@
 import os
 import glob
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 from typing import Callable
 from webui_utils.simple_log import SimpleLog
@@ -36,6 +38,8 @@ def main():
 
     parser.add_argument("--type", default="png", type=str,
                         help="File type for frame files (Default 'png')")
+    parser.add_argument("--threads", default=0, type=int,
+        help="Threads for each of reading, resizing and writing frames (default=0 - one per CPU)")
 
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
@@ -53,6 +57,7 @@ def main():
                  args.crop_offset_x,
                  args.crop_offset_y,
                  args.crop_type,
+                 args.threads,
                  ).resize(type=args.type)
 
 class ResizeFrames:
@@ -68,7 +73,8 @@ class ResizeFrames:
                 crop_height : int=-1,
                 crop_offset_x : int=-1,
                 crop_offset_y : int=-1,
-                crop_type : str="none"):
+                crop_type : str="none",
+                threads : int=0):
         self.input_path = input_path
         self.output_path = output_path
         self.scale_width = scale_width
@@ -80,6 +86,7 @@ class ResizeFrames:
         self.crop_offset_x = crop_offset_x
         self.crop_offset_y = crop_offset_y
         self.crop_type = crop_type
+        self.threads = threads or os.cpu_count() or 1
 
     def get_scale_type(self, scale_type : str) -> int:
         try:
@@ -111,53 +118,79 @@ class ResizeFrames:
             raise ValueError("scale_height must be provided")
 
         files = sorted(glob.glob(os.path.join(self.input_path, "*." + type)))
-        num_files = len(files)
         create_directory(self.output_path)
         scale_type = self.get_scale_type(self.scale_type)
         crop_type = self.get_crop_type(self.crop_type)
 
-        with Mtqdm().open_bar(len(files), desc="Resizing") as bar:
-            for index, file in enumerate(files):
-                image = cv2.imread(file)
-
-                if params_fn:
-                    scale_width, \
-                    scale_height, \
-                    crop_offset_x, \
-                    crop_offset_y = params_fn(index, params_context)
-                else:
-                    scale_width = self.scale_width
-                    scale_height = self.scale_height
-                    crop_offset_x = self.crop_offset_x
-                    crop_offset_y = self.crop_offset_y
-
-                crop_width = self.crop_width
-                crop_height = self.crop_height
-
-                if scale_type:
-                    size = (scale_width, scale_height)
-                    image = cv2.resize(image, size, interpolation=scale_type)
-
-                if crop_type:
-                    if crop_width < 0:
-                        crop_width = scale_width
-                    if crop_height < 0:
-                        crop_height = scale_height
-                    if crop_offset_x < 0:
-                        crop_offset_x = int((scale_width - crop_width) / 2.0)
-                    if crop_offset_y < 0:
-                        crop_offset_y = int((scale_height - crop_height) / 2.0)
-                    min_x = int(crop_offset_x)
-                    min_y = int(crop_offset_y)
-                    max_x = int(min_x + crop_width)
-                    max_y = int(min_y + crop_height)
-
-                    image = image[min_y:max_y, min_x:max_x]
-
-                _, filename, ext = split_filepath(file)
-                output_filepath = os.path.join(self.output_path, f"{filename}{ext}")
-                cv2.imwrite(output_filepath, image)
-                Mtqdm().update_bar(bar)
+        def read(file):
+            return cv2.imread(file)
+
+        def process(index, read_future):
+            return self.resize_frame(read_future.result(), index, scale_type, crop_type,
+                                     params_fn, params_context)
+
+        def write(file, process_future):
+            _, filename, ext = split_filepath(file)
+            output_filepath = os.path.join(self.output_path, f"{filename}{ext}")
+            cv2.imwrite(output_filepath, process_future.result())
+
+        # frames are read ahead, resized and written by separate pools of threads, with
+        # a bounded number of frames in flight. Each stage waits only on earlier stages.
+        max_pending = self.threads * 4
+        with ThreadPoolExecutor(max_workers=self.threads) as read_pool,\
+             ThreadPoolExecutor(max_workers=self.threads) as process_pool,\
+             ThreadPoolExecutor(max_workers=self.threads) as write_pool:
+            pending = deque()
+            with Mtqdm().open_bar(len(files), desc="Resizing") as bar:
+                for index, file in enumerate(files):
+                    read_future = read_pool.submit(read, file)
+                    process_future = process_pool.submit(process, index, read_future)
+                    pending.append(write_pool.submit(write, file, process_future))
+                    if len(pending) >= max_pending:
+                        pending.popleft().result()
+                        Mtqdm().update_bar(bar)
+                while pending:
+                    pending.popleft().result()
+                    Mtqdm().update_bar(bar)
+
+    def resize_frame(self, image, index : int, scale_type : int, crop_type : bool,
+                     params_fn : Callable | None=None, params_context : any=None):
+        """Resize and crop a single frame
+           scale_type and crop_type are from get_scale_type() and get_crop_type()"""
+        if params_fn:
+            scale_width, \
+            scale_height, \
+            crop_offset_x, \
+            crop_offset_y = params_fn(index, params_context)
+        else:
+            scale_width = self.scale_width
+            scale_height = self.scale_height
+            crop_offset_x = self.crop_offset_x
+            crop_offset_y = self.crop_offset_y
+
+        crop_width = self.crop_width
+        crop_height = self.crop_height
+
+        if scale_type:
+            size = (scale_width, scale_height)
+            image = cv2.resize(image, size, interpolation=scale_type)
+
+        if crop_type:
+            if crop_width < 0:
+                crop_width = scale_width
+            if crop_height < 0:
+                crop_height = scale_height
+            if crop_offset_x < 0:
+                crop_offset_x = int((scale_width - crop_width) / 2.0)
+            if crop_offset_y < 0:
+                crop_offset_y = int((scale_height - crop_height) / 2.0)
+            min_x = int(crop_offset_x)
+            min_y = int(crop_offset_y)
+            max_x = int(min_x + crop_width)
+            max_y = int(min_y + crop_height)
+
+            image = image[min_y:max_y, min_x:max_x]
+        return image
 
     def log(self, message : str) -> None:
         """Logging"""
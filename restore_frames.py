@@ -17,7 +17,7 @@ def main():
     parser.add_argument("--model",
         default="ours", type=str)
     parser.add_argument("--gpu_ids", type=str, default="0",
-        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU (FUTURE USE)")
+        help="gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU, auto for CUDA if available")
     parser.add_argument("--img_before", default="images/image0.png", type=str,
         help="Path to image file before the damaged frames")
     parser.add_argument("--img_after", default="images/image2.png", type=str,
@@ -5,7 +5,7 @@ from typing import Callable
 from webui_utils.simple_log import SimpleLog
 from webui_utils.file_utils import create_directory, is_safe_path
 from webui_utils.video_utils import validate_input_path, details_from_group_name, slice_video, \
-    determine_input_pattern, slice_video_frames
+    determine_input_pattern, slice_video_frames, FFmpegJobPool, sliced_filename, split_audio
 from webui_utils.mtqdm import Mtqdm
 from ffmpy import FFRuntimeError
 
@@ -36,6 +36,8 @@ def main():
                         help="GIF frame rate (default 0.0 = same as input FPS)")
     parser.add_argument("--gif_end_delay", default=0.0, type=float,
                         help="GIF seconds delay after last frame (default 0.0)")
+    parser.add_argument("--max_jobs", default=1, type=int,
+                        help="Maximum concurrent FFmpeg processes, 0 = CPU count (default 1)")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
     args = parser.parse_args()
@@ -53,7 +55,7 @@ def main():
                 args.gif_high_quality,
                 args.gif_fps,
                 args.gif_end_delay,
-                log.log).slice()
+                log.log).slice(max_jobs=args.max_jobs)
 
 class SliceVideo:
     """Encapsulate logic for Split Scenes feature"""
@@ -106,9 +108,17 @@ class SliceVideo:
             raise ValueError(f"'gif_factor' must be >= 1")
 
     def _slice_group(self, group_name):
-        first_index, last_index, num_width = details_from_group_name(group_name)
-        output_path = self.output_path or os.path.join(self.group_path, group_name)
+        try:
+            ffmpeg_cmd = self._slice_group_cmd(group_name)
+            self.log(f"FFmpeg command line: '{ffmpeg_cmd}'")
+            return None
+        except FFRuntimeError as error:
+            message = f"FFRuntimeError {error}"
+            self.log(message)
+            return message
 
+    def _trimmed_range(self, group_name):
+        first_index, last_index, num_width = details_from_group_name(group_name)
         first_index += self.edge_trim
         if first_index < 0:
             first_index = 0
@@ -119,28 +129,26 @@ class SliceVideo:
         # The combine_video_audio() function will trim to the shortest stream
         if last_index <= first_index:
             last_index = first_index + 1
+        return first_index, last_index, num_width
 
-        try:
-            ffmpeg_cmd = slice_video(self.input_path,
-                        self.fps,
-                        output_path,
-                        num_width,
-                        first_index,
-                        last_index,
-                        self.type,
-                        self.mp4_quality,
-                        self.gif_factor,
-                        self.output_scale,
-                        self.gif_high_quality,
-                        self.gif_fps,
-                        self.gif_end_delay,
-                        global_options=self.global_options)
-            self.log(f"FFmpeg command line: '{ffmpeg_cmd}'")
-            return None
-        except FFRuntimeError as error:
-            message = f"FFRuntimeError {error}"
-            self.log(message)
-            return message
+    def _slice_group_cmd(self, group_name):
+        first_index, last_index, num_width = self._trimmed_range(group_name)
+        output_path = self.output_path or os.path.join(self.group_path, group_name)
+
+        return slice_video(self.input_path,
+                    self.fps,
+                    output_path,
+                    num_width,
+                    first_index,
+                    last_index,
+                    self.type,
+                    self.mp4_quality,
+                    self.gif_factor,
+                    self.output_scale,
+                    self.gif_high_quality,
+                    self.gif_fps,
+                    self.gif_end_delay,
+                    global_options=self.global_options)
 
     # slice from a pre-grouped set of frame files
     def _slice_frame_group(self, group_name, slice_name, type : str="png"):
@@ -190,22 +198,48 @@ class SliceVideo:
             self.log(message)
             return message
 
-    def slice(self, ignore_errors=False):
+    def slice(self, ignore_errors=False, max_jobs=1):
+        """max_jobs: maximum concurrent FFmpeg processes, 0 to use the CPU count"""
         group_names = validate_input_path(self.group_path, -1)
         if self.output_path:
             create_directory(self.output_path)
 
         pbar_desc = f"Slice {self.type}"
-        errors = []
-        with Mtqdm().open_bar(total=len(group_names), desc=pbar_desc) as bar:
+        with FFmpegJobPool(max_jobs, self.log_fn) as pool:
             for group_name in group_names:
-                error = self._slice_group(group_name)
-                if error:
-                    errors.append({group_name : error})
-                    if not ignore_errors:
-                        raise RuntimeError(error)
-                Mtqdm().update_bar(bar)
-        return errors
+                pool.submit(group_name, self._slice_group_cmd, group_name)
+            return pool.wait(desc=pbar_desc, stop_on_error=not ignore_errors)
+
+    def split_audio(self, sample_rate : int, channels : int=2):
+        """Create the WAV file for every group from a single decoding of the input's audio
+           sample_rate: sample rate of the WAV files
+           channels: number of audio channels of the WAV files"""
+        if self.type != "wav":
+            raise ValueError("split_audio() requires type 'wav'")
+        group_names = validate_input_path(self.group_path, -1)
+        if self.output_path:
+            create_directory(self.output_path)
+
+        segments = []
+        for group_name in group_names:
+            first_index, last_index, num_width = self._trimmed_range(group_name)
+            output_path = self.output_path or os.path.join(self.group_path, group_name)
+            filename = sliced_filename(self.input_path, num_width, first_index, last_index,
+                                       self.type)
+            segments.append((os.path.join(output_path, filename),
+                             first_index / self.fps,
+                             (last_index + 1) / self.fps))
+
+        with Mtqdm().open_bar(total=1, desc="Split Audio") as bar:
+            try:
+                ffmpeg_cmd = split_audio(self.input_path, segments, sample_rate, channels,
+                                         global_options=self.global_options)
+                self.log(f"FFmpeg command line: '{ffmpeg_cmd}'")
+            except FFRuntimeError as error:
+                message = f"FFRuntimeError {error}"
+                self.log(message)
+                raise RuntimeError(message)
+            Mtqdm().update_bar(bar)
 
     def slice_group(self, group_name, ignore_errors=False):
         validate_input_path(self.group_path, -1)
@@ -7,6 +7,7 @@ from typing import Callable
 from webui_utils.simple_log import SimpleLog
 from webui_utils.file_utils import create_directory, is_safe_path, split_filepath
 from webui_utils.video_utils import get_detected_scenes, get_detected_breaks, scene_list_to_ranges
+from webui_utils.frame_signals import FrameSignalIndex
 from webui_utils.mtqdm import Mtqdm
 from resequence_files import ResequenceFiles
 
@@ -51,7 +52,8 @@ class SplitScenes:
                 scene_threshold : float,
                 break_duration : float,
                 break_ratio : float,
-                log_fn : Callable | None):
+                log_fn : Callable | None,
+                signals : FrameSignalIndex | None=None):
         self.input_path = input_path
         self.output_path = output_path
         self.file_ext = file_ext
@@ -61,6 +63,7 @@ class SplitScenes:
         self.break_ratio = break_ratio
         self.dry_run = False
         self.log_fn = log_fn
+        self.signals = signals
         valid_types = ["scene", "break"]
 
         if not is_safe_path(self.input_path):
@@ -74,9 +77,17 @@ class SplitScenes:
         files = sorted(glob.glob(os.path.join(self.input_path, f"*.{self.file_ext}")))
         num_files = len(files)
         num_width = len(str(num_files))
-        self.log(f"calling `get_detected_scenes` with input path '{self.input_path}'" +\
-                 f" threshold '{self.scene_threshold}'")
-        scenes = get_detected_scenes(self.input_path, float(self.scene_threshold), type=format)
+        if self.signals and len(self.signals) == num_files:
+            self.log(f"using frame signals with threshold '{self.scene_threshold}'")
+            scenes = self.signals.scenes(float(self.scene_threshold))
+        else:
+            self.log(f"calling `get_detected_scenes` with input path '{self.input_path}'" +\
+                     f" threshold '{self.scene_threshold}'")
+            with Mtqdm().open_bar(total=1, desc="FFmpeg") as bar:
+                Mtqdm().message(bar, "Detecting scenes - no ETA")
+                scenes = get_detected_scenes(self.input_path, float(self.scene_threshold),
+                                             type=format)
+                Mtqdm().update_bar(bar)
         # add one more final fake detection past the end to include frames past the last detection
         scenes.append(num_files+1)
         ranges = scene_list_to_ranges(scenes, num_files)
@@ -119,10 +130,18 @@ class SplitScenes:
         files = sorted(glob.glob(os.path.join(self.input_path, f"*.{self.file_ext}")))
         num_files = len(files)
         num_width = len(str(num_files))
-        self.log(f"calling `get_detected_breaks` with input path '{self.input_path}'" +\
-                 f" duration '{self.break_duration}' ratio '{self.break_ratio}'")
-        scenes = get_detected_breaks(self.input_path, float(self.break_duration),
-                                     float(self.break_ratio), type=format)
+        if self.signals and len(self.signals) == num_files:
+            self.log(f"using frame signals with duration '{self.break_duration}'" +\
+                     f" ratio '{self.break_ratio}'")
+            scenes = self.signals.breaks(float(self.break_duration), float(self.break_ratio))
+        else:
+            self.log(f"calling `get_detected_breaks` with input path '{self.input_path}'" +\
+                     f" duration '{self.break_duration}' ratio '{self.break_ratio}'")
+            with Mtqdm().open_bar(total=1, desc="FFmpeg") as bar:
+                Mtqdm().message(bar, "Detecting breaks - no ETA")
+                scenes = get_detected_breaks(self.input_path, float(self.break_duration),
+                                             float(self.break_ratio), type=format)
+                Mtqdm().update_bar(bar)
         # add one more final fake detection past the end to include frames past the last detection
         scenes.append(num_files+1)
         ranges = scene_list_to_ranges(scenes, num_files)
@@ -141,7 +141,8 @@ class ChangeFPS(TabBase):
                     fill_with_dupes : bool):
         """Change FPS convert button handler"""
         if input_path:
-            interpolater = Interpolate(self.engine.model, self.log)
+            batch_size = self.config.engine_settings["batch_size"]
+            interpolater = Interpolate(self.engine.model, self.log, batch_size=batch_size)
             target_interpolater = TargetInterpolate(interpolater, self.log)
             use_time_step = self.config.engine_settings["use_time_step"]
             series_resampler = ResampleSeries(interpolater, target_interpolater, use_time_step,
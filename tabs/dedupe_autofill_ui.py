@@ -199,6 +199,7 @@ class AutofillFrames(TabBase):
                 output_path, _ = AutoIncrementDirectory(base_output_path).next_directory("run")
 
             type = determine_input_format(input_path)
+            detector = self.config.deduplicate_settings["detector"]
             interpolater = Interpolate(self.engine.model, self.log, type=type)
             target_interpolater = TargetInterpolate(interpolater, self.log, type=type)
             use_time_step = self.config.engine_settings["use_time_step"]
@@ -211,7 +212,8 @@ class AutofillFrames(TabBase):
                                                                 max_dupes,
                                                                 depth,
                                                                 self.log,
-                                                                type=type).invoke_autofill(
+                                                                type=type,
+                                                                detector=detector).invoke_autofill(
                                                                     suppress_output=True)
             report = self.create_autofill_report(input_path,
                                                     output_path,
@@ -63,6 +63,7 @@ class DedupeFrames(TabBase):
                     output_path, _ = AutoIncrementDirectory(base_output_path).next_directory("run")
 
                 type = determine_input_format(input_path)
+                detector = self.config.deduplicate_settings["detector"]
                 # repurpose max_dupes for delete to mean: skip delete on groups larger than this size
                 ignore_over_size = max_dupes
                 max_dupes = 0
@@ -73,7 +74,8 @@ class DedupeFrames(TabBase):
                                                                     max_dupes,
                                                                     None,
                                                                     self.log,
-                                                                    type=type).invoke_delete(
+                                                                    type=type,
+                                                                    detector=detector).invoke_delete(
                                                                         suppress_output=True,
                                                             max_size_for_delete=ignore_over_size)
                 report = self.create_delete_report(input_path,
@@ -58,6 +58,7 @@ class DuplicateFramesReport(TabBase):
         if input_path:
             try:
                 type = determine_input_format(input_path)
+                detector = self.config.deduplicate_settings["detector"]
                 report = DeduplicateFrames(None,
                                             input_path,
                                             None,
@@ -65,7 +66,8 @@ class DuplicateFramesReport(TabBase):
                                             max_dupes,
                                             None,
                                             self.log,
-                                            type=type).invoke_report(suppress_output=True)
+                                            type=type,
+                                            detector=detector).invoke_report(suppress_output=True)
 
                 base_output_path = self.config.directories["output_deduplication"]
                 output_path, run_index = AutoIncrementDirectory(base_output_path).next_directory(
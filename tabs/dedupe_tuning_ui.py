@@ -81,6 +81,7 @@ class DuplicateTuning(TabBase):
             self.log(f"creating duplicate tuning report at {output_filepath}")
             try:
                 type = determine_input_format(input_path)
+                detector = self.config.deduplicate_settings["detector"]
                 DeduplicateFrames(None,
                                   input_path,
                                   output_filepath,
@@ -91,8 +92,9 @@ class DuplicateTuning(TabBase):
                                   type=type,
                                   tune_min=min_threshold,
                                   tune_max=max_threshold,
-                                  tune_step=threshold_step).invoke_tuning(
-                                      suppress_output=True)
+                                  tune_step=threshold_step,
+                                  cache_path=self.config.directories["working"],
+                                  detector=detector).invoke_tuning(suppress_output=True)
 
                 return gr.update(value=[output_filepath], visible=True), \
                        gr.update(value=output_filepath, visible=True), \
@@ -69,7 +69,9 @@ class FrameInterpolation(TabBase):
 
         interpolater = Interpolate(self.engine.model, self.log_fn)
         use_time_step = self.config.engine_settings["use_time_step"]
-        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log_fn)
+        in_memory = self.config.engine_settings["in_memory_splits"]
+        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log_fn,
+                                            in_memory=in_memory)
         base_output_path = self.config.directories["output_interpolation"]
         output_path, run_index = AutoIncrementDirectory(base_output_path).next_directory("run")
         output_basename = "interpolated_frames"
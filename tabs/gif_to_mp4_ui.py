@@ -325,7 +325,8 @@ class GIFtoMP4(TabBase):
                                 output_path : str,
                                 inflate_factor: int,
                                 precision : int):
-        interpolater = Interpolate(self.engine.model, self.log)
+        batch_size = self.config.engine_settings["batch_size"]
+        interpolater = Interpolate(self.engine.model, self.log, batch_size=batch_size)
         target_interpolater = TargetInterpolate(interpolater, self.log)
         use_time_step = self.config.engine_settings["use_time_step"]
         series_resampler = ResampleSeries(interpolater, target_interpolater, use_time_step,
@@ -337,9 +338,12 @@ class GIFtoMP4(TabBase):
                                 input_path : str,
                                 output_path : str,
                                 inflate_factor: int):
-        interpolater = Interpolate(self.engine.model, self.log)
+        batch_size = self.config.engine_settings["batch_size"]
+        interpolater = Interpolate(self.engine.model, self.log, batch_size=batch_size)
         use_time_step = self.config.engine_settings["use_time_step"]
-        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log)
+        in_memory = self.config.engine_settings["in_memory_splits"]
+        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log,
+                                            in_memory=in_memory)
         series_interpolater = InterpolateSeries(deep_interpolater, self.log)
 
         file_list = get_files(input_path)
@@ -14,7 +14,6 @@ from interpolate_engine import InterpolateEngine
 from interpolate import Interpolate
 from deep_interpolate import DeepInterpolate
 from interpolate_series import InterpolateSeries
-from resequence_files import ResequenceFiles
 from tabs.tab_base import TabBase
 
 # TODO support two-pass-first-pass-only
@@ -123,53 +122,26 @@ class ResynthesizeVideo(TabBase):
     def one_pass_resynthesis(self, input_path, output_path, output_basename, engine):
         file_list = sorted(get_files(input_path, extension="png"))
         self.log(f"beginning series of frame recreations at {output_path}")
-        engine.interpolate_series(file_list, output_path, 1, "interframe", offset=2)
-
-        self.log(f"auto-resequencing recreated frames at {output_path}")
-        ResequenceFiles(output_path, "png", "resynthesized_frame", 1, 1, 1, 0, -1, True,
-                        self.log).resequence()
+        engine.interpolate_series(file_list, output_path, 1, "resynthesized_frame", offset=2,
+                                  interframes_only=True)
 
     def two_pass_resynthesis(self, input_path, output_path, output_basename, engine):
-        interframes_path1 = os.path.join(output_path, "interframes-pass1")
-        interframes_path2 = os.path.join(output_path, "interframes-pass2")
-        interframes_path3 = os.path.join(output_path, "interframes-final")
-        create_directory(interframes_path1)
-        create_directory(interframes_path2)
-        create_directory(interframes_path3)
+        interframes_path = os.path.join(output_path, "interframes-pass1")
+        create_directory(interframes_path)
 
         with Mtqdm().open_bar(total=2, desc="Two-Pass Resynthesis") as bar:
             file_list = sorted(get_files(input_path, extension="png"))
-            self.log(f"beginning pass #1 of series of frame recreations at {interframes_path1}")
-            engine.interpolate_series(file_list, interframes_path1, 1, "interframe")
-
-            self.log(f"selecting odd interframes only at {interframes_path1}")
-            ResequenceFiles(interframes_path1,
-                            "png",
-                            "odd_interframe",
-                            1, 1, # start, step
-                            2, 1, # stride, offset
-                            -1,   # auto-zero fill
-                            False, # rename
-                            self.log,
-                            output_path=interframes_path2).resequence()
+            self.log(f"beginning pass #1 of series of frame recreations at {interframes_path}")
+            engine.interpolate_series(file_list, interframes_path, 1, "odd_interframe",
+                                      interframes_only=True)
             Mtqdm().update_bar(bar)
 
-            file_list = sorted(get_files(interframes_path2, extension="png"))
-            self.log(f"beginning pass #2 of series of frame recreations at {interframes_path2}")
-            engine.interpolate_series(file_list, interframes_path3, 1, "interframe")
-
-            self.log(f"selecting odd interframes only at {interframes_path3}")
-            ResequenceFiles(interframes_path3,
-                            "png",
-                            output_basename,
-                            1, 1, # start, step
-                            2, 1, # stride, offset
-                            -1,   # auto-zero fill
-                            False, # rename
-                            self.log,
-                            output_path=output_path).resequence()
+            file_list = sorted(get_files(interframes_path, extension="png"))
+            self.log(f"beginning pass #2 of series of frame recreations at {output_path}")
+            engine.interpolate_series(file_list, output_path, 1, output_basename,
+                                      interframes_only=True)
             Mtqdm().update_bar(bar)
-            remove_directories([interframes_path1, interframes_path2, interframes_path3])
+            remove_directories([interframes_path])
 
     def resynthesize_video(self, input_path : str, output_path : str | None, resynth_type : str,
                            interactive : bool=True):
@@ -205,9 +177,12 @@ class ResynthesizeVideo(TabBase):
             base_output_path = self.config.directories["output_resynthesis"]
             output_path, _ = AutoIncrementDirectory(base_output_path).next_directory("run")
 
-        interpolater = Interpolate(self.engine.model, self.log)
+        batch_size = self.config.engine_settings["batch_size"]
+        interpolater = Interpolate(self.engine.model, self.log, batch_size=batch_size)
         use_time_step = self.config.engine_settings["use_time_step"]
-        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log)
+        in_memory = self.config.engine_settings["in_memory_splits"]
+        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log,
+                                            in_memory=in_memory)
         series_interpolater = InterpolateSeries(deep_interpolater, self.log)
         output_basename = "resynthesized_frames"
 
@@ -727,9 +727,12 @@ class VideoBlender(TabBase):
                 self.log(f"skipping creating frames, using frames from {source_frames_path}")
 
             if step2_enabled:
-                interpolater = Interpolate(self.engine.model, self.log)
+                batch_size = self.config.engine_settings["batch_size"]
+                interpolater = Interpolate(self.engine.model, self.log, batch_size=batch_size)
                 use_time_step = self.config.engine_settings["use_time_step"]
-                deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log)
+                in_memory = self.config.engine_settings["in_memory_splits"]
+                deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log,
+                                                    in_memory=in_memory)
                 series_interpolater = InterpolateSeries(deep_interpolater, self.log)
                 output_basename = "repair_frame"
                 type = determine_input_format(source_frames_path)
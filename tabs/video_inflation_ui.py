@@ -155,9 +155,12 @@ class VideoInflation(TabBase):
             base_output_path = self.config.directories["output_inflation"]
             output_path, _ = AutoIncrementDirectory(base_output_path).next_directory("run")
 
-        interpolater = Interpolate(self.engine.model, self.log)
+        batch_size = self.config.engine_settings["batch_size"]
+        interpolater = Interpolate(self.engine.model, self.log, batch_size=batch_size)
         use_time_step = self.config.engine_settings["use_time_step"]
-        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log)
+        in_memory = self.config.engine_settings["in_memory_splits"]
+        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log,
+                                            in_memory=in_memory)
         series_interpolater = InterpolateSeries(deep_interpolater, self.log)
 
         output_basename = "interpolated_frames"
@@ -2003,14 +2003,20 @@ class VideoRemixer(TabBase):
 
             # split video into frames, avoid doing again if redoing setup
             # unless the source frames were flagged invalid in the previous step
-            self.log("splitting source video into frames")
             prevent_overwrite = not self.state.source_frames_invalid
-            ffcmd = self.state.ingest.render_source_frames(prevent_overwrite=prevent_overwrite)
-            if not ffcmd:
-                self.log("rendering source frames skipped")
+            # if the source frames won't be kept, decode them directly into scenes instead
+            stream_scenes = remove_source and \
+                not (prevent_overwrite and self.state.ingest.source_frames_present())
+            if stream_scenes:
+                self.log("source video will be split into scenes while decoding")
             else:
-                self.state.save()
-                self.log(f"FFmpeg command: {ffcmd}")
+                self.log("splitting source video into frames")
+                ffcmd = self.state.ingest.render_source_frames(prevent_overwrite=prevent_overwrite)
+                if not ffcmd:
+                    self.log("rendering source frames skipped")
+                else:
+                    self.state.save()
+                    self.log(f"FFmpeg command: {ffcmd}")
 
             self.state.scenes_path = os.path.join(self.state.project_path,
                                                   VideoRemixerState.SCENES_PATH)
@@ -2024,7 +2030,11 @@ class VideoRemixer(TabBase):
             self.state.save()
 
             # split frames into scenes
-            error = self.state.ingest.split_scenes(prevent_overwrite=False, move_files=remove_source)
+            if stream_scenes:
+                error = self.state.ingest.stream_source_scenes()
+            else:
+                error = self.state.ingest.split_scenes(prevent_overwrite=False,
+                                                       move_files=remove_source)
             if error:
                 raise ValueError(f"There was an error splitting the source video: {error}")
 
@@ -2057,7 +2067,8 @@ class VideoRemixer(TabBase):
             self.state.save()
 
         try:
-            self.state.ingest.create_thumbnails()
+            # scenes that weren't split again keep their existing thumbnails
+            self.state.ingest.create_thumbnails(reuse_existing=skip_detection)
         except ValueError as error:
             raise ValueError(f"There was an error creating thumbnails from the source video: {error}")
 
@@ -2802,11 +2813,15 @@ class VideoRemixer(TabBase):
         else:
             return split_percent_alt, split_percent_alt
 
-    def find_break_frame_type(self, frame_file) -> Literal["break", "skip", "find"]:
+    def find_break_frame_type(self, frame_files, frame_index, scene_lightness=None) \
+            -> Literal["break", "skip", "find"]:
         find_break_stride = self.config.remixer_settings["find_break_stride"]
         find_break_threshold = self.config.remixer_settings["find_break_threshold"]
         skip_break_threshold = self.config.remixer_settings["skip_break_threshold"]
-        l = get_average_lightness(frame_file, find_break_stride)
+        if scene_lightness is not None:
+            l = scene_lightness[frame_index]
+        else:
+            l = get_average_lightness(frame_files[frame_index], find_break_stride)
 
         break_type : str
         if l <= find_break_threshold:
@@ -2841,14 +2856,17 @@ class VideoRemixer(TabBase):
         fallback_value = 256
 
         frame_files = self.state.get_split_scene_cache(scene_index)
+        scene_lightness = self.state.ingest.scene_lightness(scene_name)
+        if scene_lightness is not None and len(scene_lightness) != len(frame_files):
+            scene_lightness = None
 
-        frame_file = frame_files[search_frame_index]
-        frame_type, value = self.find_break_frame_type(frame_file)
+        frame_type, value = self.find_break_frame_type(frame_files, search_frame_index,
+                                                       scene_lightness)
         if frame_type == "skip":
             # skip frames until either a break frame or a find frame
             for search_frame_index in range(search_frame_index + 1, last_frame + 1):
-                frame_file = frame_files[search_frame_index]
-                frame_type, value = self.find_break_frame_type(frame_file)
+                frame_type, value = self.find_break_frame_type(frame_files, search_frame_index,
+                                                               scene_lightness)
                 if frame_type == "break" or frame_type == "find":
                     break
 
@@ -2857,8 +2875,8 @@ class VideoRemixer(TabBase):
 
         if frame_type != "break":
             for search_frame_index in range(search_frame_index + 1, last_frame + 1):
-                frame_file = frame_files[search_frame_index]
-                frame_type, value = self.find_break_frame_type(frame_file)
+                frame_type, value = self.find_break_frame_type(frame_files, search_frame_index,
+                                                               scene_lightness)
                 if value < fallback_value:
                     fallback_found_frame = search_frame_index
                     fallback_value = value
@@ -2890,14 +2908,17 @@ class VideoRemixer(TabBase):
         fallback_value = 256
 
         frame_files = self.state.get_split_scene_cache(scene_index)
+        scene_lightness = self.state.ingest.scene_lightness(scene_name)
+        if scene_lightness is not None and len(scene_lightness) != len(frame_files):
+            scene_lightness = None
 
-        frame_file = frame_files[starting_search_frame]
-        frame_type, value = self.find_break_frame_type(frame_file)
+        frame_type, value = self.find_break_frame_type(frame_files, starting_search_frame,
+                                                       scene_lightness)
         if frame_type == "skip":
             # skip frames until either a break frame or a find frame
             for search_frame_index in range(search_frame_index - 1, last_frame - 1, -1):
-                frame_file = frame_files[search_frame_index]
-                frame_type, value = self.find_break_frame_type(frame_file)
+                frame_type, value = self.find_break_frame_type(frame_files, search_frame_index,
+                                                               scene_lightness)
                 if frame_type == "break" or frame_type == "find":
                     break
 
@@ -2906,8 +2927,8 @@ class VideoRemixer(TabBase):
 
         if frame_type != "break":
             for search_frame_index in range(search_frame_index - 1, last_frame - 1, -1):
-                frame_file = frame_files[search_frame_index]
-                frame_type, value = self.find_break_frame_type(frame_file)
+                frame_type, value = self.find_break_frame_type(frame_files, search_frame_index,
+                                                               scene_lightness)
                 if value < fallback_value:
                     fallback_found_frame = search_frame_index
                     fallback_value = value
@@ -1,8 +1,14 @@
 """Upscale Frames Core Code"""
 import argparse
 import os
+import gc
+import math
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 import cv2
+import torch
 from basicsr.archs.rrdbnet_arch import RRDBNet# pylint: disable=import-error
 from basicsr.utils.download_util import load_file_from_url# pylint: disable=import-error
 from realesrgan import RealESRGANer # pylint: disable=import-error
@@ -11,6 +17,7 @@ from webui_utils.simple_log import SimpleLog
 from webui_utils.file_utils import create_directory, get_files, build_series_filename,\
     split_filepath
 from webui_utils.color_out import ColorOut
+from webui_utils.image_utils import write_frame
 from webui_utils.mtqdm import Mtqdm
 
 def main():
@@ -39,6 +46,10 @@ def main():
         help="If tiling > 0, upscale in blocks. Default: 0 (upscale entire image at once)")
     parser.add_argument("--tile_pad", type=int, default=8,
         help="If tiling, overlap among blocks to lessen seams. Default: 8 pixels")
+    parser.add_argument("--tile_budget", type=int, default=0,
+        help="If > 0, most pixels to upscale at once, picking the tile size. Default: 0 (use --tiling)")
+    parser.add_argument("--threads", default=0, type=int,
+        help="Threads for each of reading and writing frames (default=0 - one per CPU)")
     parser.add_argument("--verbose", dest="verbose", default=False, action="store_true",
         help="Show extra details")
     args = parser.parse_args()
@@ -52,54 +63,124 @@ def main():
                              args.fp32,
                              args.tiling,
                              args.tile_pad,
-                             log.log)
+                             log.log,
+                             args.threads,
+                             args.tile_budget)
     upscaler.upscale_series(file_list,
                             args.output_path,
                             args.outscale,
                             args.base_filename,
                             args.output_type)
 
+def out_of_memory(error : Exception) -> bool:
+    """Check if a PyTorch error is from running out of memory"""
+    return "out of memory" in str(error)
+
+class UpscaleModelError(Exception):
+    """A RuntimeError from the upscaling model, raised as another type so that it isn't caught
+       and only printed by Real-ESRGAN's tiled upscaling"""
+
+class GuardedModel():
+    """Wraps an upscaling model so that its errors reach the caller of RealESRGANer.enhance()"""
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return self.model(*args, **kwargs)
+        except RuntimeError as error:
+            raise UpscaleModelError(str(error)) from error
+
 class UpscaleSeries():
     """Encapsulates logic for the Upscale Frames feature"""
+    # loaded upscalers shared by all instances, keyed by their settings, least recently used first
+    cached_upscalers = OrderedDict()
+    cache_lock = threading.Lock()
+    MAX_CACHED_UPSCALERS = 2
+    # smallest tile size to try after running out of memory
+    MIN_TILE_SIZE = 32
+    # tile overlap to use when tiling becomes needed after running out of memory
+    FALLBACK_TILE_PAD = 10
+
     def __init__(self,
                 model_name : str,
                 gpu_ids : str | None,
                 fp32 : bool,
                 tiling : int,
                 tile_pad : int,
-                log_fn : Callable | None):
-        self.upscaler =  self.load_upscaler(model_name, gpu_ids, fp32, tiling, tile_pad)
+                log_fn : Callable | None,
+                threads : int=0,
+                tile_budget : int=0):
+        """tile_budget: if > 0, the most pixels to upscale at once, used to pick the tile size
+            for each series instead of 'tiling'"""
+        self.upscaler, self.upscaler_lock = self.cached_upscaler(model_name, gpu_ids, fp32,
+                                                                 tiling, tile_pad)
         self.log_fn = log_fn
         self.tiling = tiling
+        self.tile_pad = tile_pad or self.FALLBACK_TILE_PAD
+        self.threads = threads or os.cpu_count() or 1
+        self.tile_budget = tile_budget
+        # the tile size in use, chosen from the budget or reduced after running out of memory
+        self.tile_size = None if tile_budget else tiling
 
     def upscale_series(self,
                         file_list : list,
                         output_path : str | None,
                         outscale : float,
                         base_filename : str | None,
-                        output_type : str | None) -> dict:
-        """Invoke the Upscale Frames feature"""
+                        output_type : str | None,
+                        scale_type : int | None=None) -> dict:
+        """Invoke the Upscale Frames feature
+           scale_type: OpenCV interpolation for resizing from the model's native scale to
+            outscale, None to use Real-ESRGAN's own resizing"""
         file_list = sorted(file_list)
         file_count = len(file_list)
         output_dict = {}
 
-        with Mtqdm().open_bar(len(file_list), desc="Upscaling") as bar:
-            for index, filepath in enumerate(file_list):
-                input_path, input_filename, input_type = split_filepath(filepath)
-                outscale_str = str(outscale).replace(".", "-")
-                tiling_str = f"T{self.tiling}" if self.tiling > 0 else ""
-                input_filename = f"{input_filename}[X{outscale_str}{tiling_str}]{input_type}"
-                output_filename = build_series_filename(base_filename, output_type, index, file_count,
-                                                        input_filename)
-                output_path = output_path or input_path
-                output_filepath = os.path.join(output_path, output_filename)
-                # self.log(f"upscaling by {outscale} {filepath} to {output_filepath}")
-
-                if self.upscale_image(filepath, output_filepath, outscale):
-                    output_dict[filepath] = output_filepath
-                else:
-                    output_dict[filepath] = None
-                Mtqdm().update_bar(bar)
+        def read(filepath):
+            return cv2.imread(filepath, cv2.IMREAD_UNCHANGED)
+
+        def process(filepath, read_future):
+            return self.upscale_frame(read_future.result(), filepath, outscale, scale_type)
+
+        def write(filepath, output_filepath, process_future):
+            output = process_future.result()
+            if output is None:
+                return filepath, None
+            write_frame(output_filepath, output)
+            return filepath, output_filepath
+
+        # frames are read ahead and written by pools of threads while the model works on
+        # one frame at a time, with a bounded number of frames in flight
+        max_pending = self.threads * 2
+        with ThreadPoolExecutor(max_workers=self.threads) as read_pool,\
+             ThreadPoolExecutor(max_workers=1) as process_pool,\
+             ThreadPoolExecutor(max_workers=self.threads) as write_pool:
+            pending = deque()
+            with Mtqdm().open_bar(len(file_list), desc="Upscaling") as bar:
+                for index, filepath in enumerate(file_list):
+                    input_path, input_filename, input_type = split_filepath(filepath)
+                    outscale_str = str(outscale).replace(".", "-")
+                    tiling_str = f"T{self.tiling}" if self.tiling > 0 else ""
+                    input_filename = f"{input_filename}[X{outscale_str}{tiling_str}]{input_type}"
+                    output_filename = build_series_filename(base_filename, output_type, index,
+                                                            file_count, input_filename)
+                    output_path = output_path or input_path
+                    output_filepath = os.path.join(output_path, output_filename)
+                    # self.log(f"upscaling by {outscale} {filepath} to {output_filepath}")
+
+                    read_future = read_pool.submit(read, filepath)
+                    process_future = process_pool.submit(process, filepath, read_future)
+                    pending.append(write_pool.submit(write, filepath, output_filepath,
+                                                     process_future))
+                    if len(pending) >= max_pending:
+                        input_filepath, output_filepath = pending.popleft().result()
+                        output_dict[input_filepath] = output_filepath
+                        Mtqdm().update_bar(bar)
+                while pending:
+                    input_filepath, output_filepath = pending.popleft().result()
+                    output_dict[input_filepath] = output_filepath
+                    Mtqdm().update_bar(bar)
 
         # self.log(f"input and output paths:\n{output_dict}")
         return output_dict
@@ -107,22 +188,132 @@ class UpscaleSeries():
     def upscale_image(self,
                         input_filepath : str,
                         output_filepath : str,
-                        outscale : float) -> bool:
+                        outscale : float,
+                        scale_type : int | None=None) -> bool:
         img = cv2.imread(input_filepath, cv2.IMREAD_UNCHANGED)
+        output = self.upscale_frame(img, input_filepath, outscale, scale_type)
+        if output is None:
+            return False
+        write_frame(output_filepath, output)
+        return True
+
+    def upscale_frame(self,
+                      img,
+                      input_filepath : str,
+                      outscale : float,
+                      scale_type : int | None=None):
+        """Upscale a frame read with cv2.IMREAD_UNCHANGED
+           Returns the upscaled frame, or None if it could not be upscaled"""
         try:
-            output, _ = self.upscaler.enhance(img, outscale=outscale)
-            cv2.imwrite(output_filepath, output)
-            return True
+            output = self.enhance(img, outscale if scale_type is None else None)
+            if scale_type is not None:
+                # resize in memory to the final size
+                height, width = img.shape[:2]
+                size = (int(width * outscale), int(height * outscale))
+                if (output.shape[1], output.shape[0]) != size:
+                    output = cv2.resize(output, size, interpolation=scale_type)
+            return output
         except Exception as error:
             print("\r\n")
             ColorOut(f"Real-ESRGAN Error upscaling file '{input_filepath}'", "red")
             print()
             ColorOut(str(error), "yellow")
             print()
-            return False
+            return None
+
+    def enhance(self, img, outscale : float | None):
+        """Upscale a frame by outscale, or at the model's native scale if None
+           On running out of memory, the frame is retried with smaller tiles and the working
+           tile size is kept for later frames"""
+        height, width = img.shape[:2]
+        if self.tile_size is None:
+            self.tile_size = self.budget_tile_size(width, height)
+            self.log(f"upscaling {width} x {height} frames with tile size {self.tile_size}")
+        while True:
+            try:
+                # the upscaler may be shared with other instances
+                with self.upscaler_lock:
+                    self.upscaler.tile_size = self.tile_size
+                    self.upscaler.tile_pad = self.tile_pad
+                    output, _ = self.upscaler.enhance(img, outscale=outscale)
+                return output
+            except (RuntimeError, UpscaleModelError) as error:
+                if not out_of_memory(error):
+                    raise
+                tile_size = self.smaller_tile_size(width, height)
+                if not tile_size:
+                    raise
+                self.log(
+            f"out of memory upscaling with tile size {self.tile_size}, retrying with {tile_size}")
+                self.tile_size = tile_size
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+
+    def budget_tile_size(self, width : int, height : int) -> int:
+        """Get the largest tile size, 0 for none, upscaling at most tile_budget pixels at once"""
+        if width * height <= self.tile_budget:
+            return 0
+        # tiles are upscaled with padding on each side
+        tile_size = int(math.sqrt(self.tile_budget)) - 2 * self.tile_pad
+        return max(self.MIN_TILE_SIZE, tile_size - tile_size % 8)
+
+    def smaller_tile_size(self, width : int, height : int) -> int:
+        """Get the next smaller tile size to try, 0 if there is none"""
+        tile_size = self.tile_size or max(width, height)
+        tile_size = int(tile_size / 2)
+        tile_size -= tile_size % 8
+        return tile_size if tile_size >= self.MIN_TILE_SIZE else 0
+
+    @classmethod
+    def cached_upscaler(cls,
+                        model_name : str,
+                        gpu_ids : str | None,
+                        fp32 : bool,
+                        tiling : int,
+                        tile_pad : int):
+        """Get a loaded upscaler and the lock for using it, reusing one already loaded with the
+           same model, device and precision. The tiling is set for each use. If loading runs out
+           of memory the cache is cleared and it is retried."""
+        key = (model_name.split('.')[0], str(gpu_ids), fp32)
+        with cls.cache_lock:
+            if key in cls.cached_upscalers:
+                cls.cached_upscalers.move_to_end(key)
+                return cls.cached_upscalers[key]
+
+            if len(cls.cached_upscalers) >= cls.MAX_CACHED_UPSCALERS:
+                while len(cls.cached_upscalers) >= cls.MAX_CACHED_UPSCALERS:
+                    cls.cached_upscalers.popitem(last=False)
+                cls._release_memory()
+            try:
+                upscaler = cls.load_upscaler(model_name, gpu_ids, fp32, tiling, tile_pad)
+            except RuntimeError as error:
+                if not out_of_memory(error):
+                    raise
+                cls._clear_cache()
+                upscaler = cls.load_upscaler(model_name, gpu_ids, fp32, tiling, tile_pad)
+            upscaler.model = GuardedModel(upscaler.model)
+            cls.cached_upscalers[key] = (upscaler, threading.Lock())
+            return cls.cached_upscalers[key]
+
+    @classmethod
+    def clear_cache(cls):
+        """Release all cached upscalers"""
+        with cls.cache_lock:
+            cls._clear_cache()
+
+    @classmethod
+    def _clear_cache(cls):
+        cls.cached_upscalers.clear()
+        cls._release_memory()
+
+    @staticmethod
+    def _release_memory():
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
 
-    def load_upscaler(self,
-                      model_name : str,
+    @staticmethod
+    def load_upscaler(model_name : str,
                       gpu_ids : str | None,
                       fp32 : bool,
                       tiling : int,
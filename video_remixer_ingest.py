@@ -1,17 +1,20 @@
 """Video Remixer UI state management"""
 import os
 import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, TYPE_CHECKING
+from ffmpy import FFRuntimeError
 from webui_utils.file_utils import split_filepath, create_directory, get_directories, get_files,\
     clean_directories, clean_filename
 from webui_utils.simple_utils import shrink
-from webui_utils.video_utils import get_essential_video_details, MP4toPNG, SourceToMP4, \
-    rate_adjusted_count, image_size
+from webui_utils.image_utils import create_scaled_jpg, create_scaled_gif, write_frame
+from webui_utils.video_utils import get_essential_video_details, MP4toPNG, MP4toFrames, \
+    SourceToMP4, rate_adjusted_count, image_size
+from webui_utils.frame_signals import SceneDetector, BreakDetector, FrameSignalIndex
 from webui_utils.mtqdm import Mtqdm
 from split_scenes import SplitScenes
 from split_frames import SplitFrames
-from slice_video import SliceVideo
-from resequence_files import ResequenceFiles
 
 if TYPE_CHECKING:
     from video_remixer import VideoRemixerState
@@ -20,6 +23,7 @@ class VideoRemixerIngest():
     def __init__(self, state : "VideoRemixerState", log_fn : Callable):
         self.state = state
         self.log_fn = log_fn
+        self.signals = None
 
     def log(self, message):
         if self.log_fn:
@@ -28,6 +32,8 @@ class VideoRemixerIngest():
     PROJECT_PATH_PREFIX = "REMIX-"
     FILENAME_FILTER = [" ", "'", "[", "]"]
     FRAMES_PATH = "SOURCE"
+    PENDING_SCENE_PREFIX = "pending-"
+    SIGNALS_FILENAME = "frame_signals.npz"
 
     ## Exports -------------------
 
@@ -54,6 +60,7 @@ class VideoRemixerIngest():
     def ingest_video(self, video_path):
         """Inspect submitted video and collect important details about it for project set up"""
         self.state.source_video = video_path
+        self.signals = None
         path, filename, _ = split_filepath(video_path)
 
         with Mtqdm().open_bar(total=1, desc="FFprobe") as bar:
@@ -81,82 +88,66 @@ class VideoRemixerIngest():
         self.state.crop_offset_y = -1
         self.state.project_fps = float(video_details['frame_rate'])
 
-    # create a scene thumbnail, assumes:
+    # FFmpeg reads an image sequence at this rate unless told otherwise
+    # GIF thumbnails sample frames as if played back at this rate
+    IMAGE_SEQUENCE_FPS = 25
+
+    def thumbnail_scale(self):
+        thumb_scale = self.state.remixer_settings["thumb_scale"]
+        max_thumb_size = self.state.remixer_settings["max_thumb_size"]
+        video_w = self.state.video_details['display_width']
+        video_h = self.state.video_details['display_height']
+        max_frame_dimension = video_w if video_w > video_h else video_h
+        thumb_size = max_frame_dimension * thumb_scale
+        if thumb_size > max_thumb_size:
+            thumb_scale = max_thumb_size / max_frame_dimension
+        return thumb_scale
+
+    def thumbnail_filepath(self, scene_name):
+        if self.state.thumbnail_type == "JPG":
+            ext = "jpg"
+        elif self.state.thumbnail_type == "GIF":
+            ext = "gif"
+        else:
+            raise ValueError(f"thumbnail type '{self.state.thumbnail_type}' is not implemented")
+        return os.path.join(self.state.thumbnail_path, f"thumbnail[{scene_name}].{ext}")
+
+    # create a scene thumbnail from the scene's frame files, assumes:
     # - scenes uncompiled
     # - thumbnail path already exists
     def create_thumbnail(self, scene_name):
         self.state.thumbnail_path = os.path.join(self.state.project_path, self.state.THUMBNAILS_PATH)
         frames_source = os.path.join(self.state.scenes_path, scene_name)
-
-        source_frame_rate = float(self.state.video_details["frame_rate"])
-        source_frame_count = int(self.state.video_details["frame_count"])
-        _, index_width = rate_adjusted_count(source_frame_count, source_frame_rate, self.state.project_fps)
-
-        ResequenceFiles(frames_source, self.state.frame_format, "scene_frame", 0, 1, 1, 0, index_width,
-                        True, self.state.log_fn).resequence()
-
-        thumbnail_filename = f"thumbnail[{scene_name}]"
+        frame_files = sorted(get_files(frames_source, self.state.frame_format))
+        if not frame_files:
+            raise ValueError(f"no frame files found in {frames_source}")
+        thumbnail_filepath = self.thumbnail_filepath(scene_name)
+        thumb_scale = self.thumbnail_scale()
 
         if self.state.thumbnail_type == "JPG":
-            thumb_scale = self.state.remixer_settings["thumb_scale"]
-            max_thumb_size = self.state.remixer_settings["max_thumb_size"]
-            video_w = self.state.video_details['display_width']
-            video_h = self.state.video_details['display_height']
-            max_frame_dimension = video_w if video_w > video_h else video_h
-            thumb_size = max_frame_dimension * thumb_scale
-            if thumb_size > max_thumb_size:
-                thumb_scale = max_thumb_size / max_frame_dimension
-
-            SliceVideo(self.state.source_video,
-                        self.state.project_fps,
-                        self.state.scenes_path,
-                        self.state.thumbnail_path,
-                        thumb_scale,
-                        "jpg",
-                        0,
-                        1,
-                        0,
-                        False,
-                        0.0,
-                        0.0,
-                        self.state.log,
-                        global_options=self.state.global_options).slice_frame_group(scene_name,
-                                                                    slice_name=thumbnail_filename,
-                                                                    type=self.state.frame_format)
-        elif self.state.thumbnail_type == "GIF":
+            mid_frame = int((len(frame_files) - 1) / 2)
+            create_scaled_jpg(frame_files[mid_frame], thumbnail_filepath, thumb_scale)
+        else:
             gif_fps = self.state.remixer_settings["default_gif_fps"]
             gif_factor = self.state.remixer_settings["gif_factor"]
             gif_end_delay = self.state.remixer_settings["gif_end_delay"]
-            thumb_scale = self.state.remixer_settings["thumb_scale"]
-            max_thumb_size = self.state.remixer_settings["max_thumb_size"]
-            video_w = self.state.video_details['display_width']
-            video_h = self.state.video_details['display_height']
-
-            max_frame_dimension = video_w if video_w > video_h else video_h
-            thumb_size = max_frame_dimension * thumb_scale
-            if thumb_size > max_thumb_size:
-                thumb_scale = max_thumb_size / max_frame_dimension
-            self.state.thumbnail_path = os.path.join(self.state.project_path, "THUMBNAILS")
-
-            SliceVideo(self.state.source_video,
-                        self.state.project_fps,
-                        self.state.scenes_path,
-                        self.state.thumbnail_path,
-                        thumb_scale,
-                        "gif",
-                        0,
-                        gif_factor,
-                        0,
-                        False,
-                        gif_fps,
-                        gif_end_delay,
-                        self.state.log,
-                        global_options=self.state.global_options).slice_frame_group(scene_name,
-                                                                    ignore_errors=True,
-                                                                    slice_name=thumbnail_filename,
-                                                                    type=self.state.frame_format)
-        else:
-            raise ValueError(f"thumbnail type '{self.state.thumbnail_type}' is not implemented")
+
+            # the frames FFmpeg keeps when speeding up by gif_factor and resampling to gif_fps
+            frame_step = self.IMAGE_SEQUENCE_FPS * gif_factor / gif_fps
+            gif_frames = []
+            for index in range(len(frame_files)):
+                frame_index = int(round(index * frame_step))
+                if frame_index >= len(frame_files):
+                    break
+                gif_frames.append(frame_files[frame_index])
+            try:
+                create_scaled_gif(gif_frames, thumbnail_filepath, thumb_scale, 1.0 / gif_fps,
+                                  gif_end_delay)
+            except (ValueError, OSError) as error:
+                # fall back to a static thumbnail of the middle frame
+                self.log(f"error creating GIF thumbnail for {scene_name}: {error}")
+                mid_frame = int((len(frame_files) - 1) / 2)
+                create_scaled_gif([frame_files[mid_frame]], thumbnail_filepath, thumb_scale, 0.0)
 
     def consolidate_scenes(self):
         container_data, num_width = VideoRemixerIngest.get_container_data(self.state.scenes_path)
@@ -201,11 +192,15 @@ class VideoRemixerIngest():
 
     ## Internal ------------------
 
+    def source_frames_present(self):
+        frames_path = os.path.join(self.state.project_path, self.FRAMES_PATH)
+        return os.path.exists(frames_path) and get_files(frames_path, self.state.frame_format)
+
     # split video into frames
     def render_source_frames(self, prevent_overwrite=False):
         self.state.frames_path = os.path.join(self.state.project_path, self.FRAMES_PATH)
         if prevent_overwrite:
-            if os.path.exists(self.state.frames_path) and get_files(self.state.frames_path, self.state.frame_format):
+            if self.source_frames_present():
                 return None
 
         video_path = self.state.source_video
@@ -217,6 +212,8 @@ class VideoRemixerIngest():
         self.state.output_pattern = f"source_%0{index_width}d.{self.state.frame_format}"
         frame_rate = self.state.project_fps
         create_directory(self.state.frames_path)
+        # signals computed from any previous source frames no longer apply
+        self.remove_frame_signals()
 
         with Mtqdm().open_bar(total=1, desc="FFmpeg") as bar:
             Mtqdm().message(bar, "Copying source video to frame files - no ETA")
@@ -284,32 +281,28 @@ class VideoRemixerIngest():
                 return None
         try:
             if self.state.split_type == "Scene":
-                with Mtqdm().open_bar(total=1, desc="FFmpeg") as bar:
-                    Mtqdm().message(bar, "Splitting video by detected scene - no ETA")
-                    SplitScenes(self.state.frames_path,
-                                self.state.scenes_path,
-                                self.state.frame_format,
-                                "scene",
-                                self.state.scene_threshold,
-                                0.0,
-                                0.0,
-                                self.state.log_fn).split(type=self.state.frame_format,
-                                                         move_files=move_files)
-                    Mtqdm().update_bar(bar)
+                SplitScenes(self.state.frames_path,
+                            self.state.scenes_path,
+                            self.state.frame_format,
+                            "scene",
+                            self.state.scene_threshold,
+                            0.0,
+                            0.0,
+                            self.state.log_fn,
+                            signals=self.source_frame_signals()).split(
+                                type=self.state.frame_format, move_files=move_files)
 
             elif self.state.split_type == "Break":
-                with Mtqdm().open_bar(total=1, desc="FFmpeg") as bar:
-                    Mtqdm().message(bar, "Splitting video by detected break - no ETA")
-                    SplitScenes(self.state.frames_path,
-                                self.state.scenes_path,
-                                self.state.frame_format,
-                                "break",
-                                0.0,
-                                float(self.state.break_duration),
-                                float(self.state.break_ratio),
-                                self.state.log_fn).split(type=self.state.frame_format,
-                                                         move_files=move_files)
-                    Mtqdm().update_bar(bar)
+                SplitScenes(self.state.frames_path,
+                            self.state.scenes_path,
+                            self.state.frame_format,
+                            "break",
+                            0.0,
+                            float(self.state.break_duration),
+                            float(self.state.break_ratio),
+                            self.state.log_fn,
+                            signals=self.source_frame_signals()).split(
+                                type=self.state.frame_format, move_files=move_files)
             elif self.state.split_type == "Time":
                 # split by seconds
                 SplitFrames(
@@ -340,16 +333,182 @@ class VideoRemixerIngest():
         except RuntimeError as error:
             return error
 
-    def create_thumbnails(self):
+    # decode the source video once, splitting its frames directly into scene directories
+    # replaces render_source_frames() + split_scenes() when the source frames aren't kept
+    def stream_source_scenes(self):
+        self.state.frames_path = os.path.join(self.state.project_path, self.FRAMES_PATH)
+        source_frame_rate = float(self.state.video_details["frame_rate"])
+        source_frame_count = int(self.state.video_details["frame_count"])
+        frame_count, index_width = rate_adjusted_count(source_frame_count, source_frame_rate,
+                                                       self.state.project_fps)
+        width = int(self.state.video_details["content_width"])
+        height = int(self.state.video_details["content_height"])
+        self.state.output_pattern = f"source_%0{index_width}d.{self.state.frame_format}"
+
+        signals = FrameSignalIndex()
+        scene_detector = None
+        break_detector = None
+        split_frames = 0
+        if self.state.split_type == "Scene":
+            scene_detector = SceneDetector(float(self.state.scene_threshold))
+        elif self.state.split_type == "Break":
+            break_detector = BreakDetector(float(self.state.break_duration),
+                                           float(self.state.break_ratio))
+        elif self.state.split_type == "Time":
+            split_frames = int(self.state.split_frames)
+
+        # scenes are written to directories named by first frame, renamed once the count is known
+        scene_starts = [0]
+        def pending_scene_path(first_index):
+            return os.path.join(self.state.scenes_path, f"{self.PENDING_SCENE_PREFIX}{first_index}")
+        def frame_filename(index):
+            return f"source_{str(index).zfill(index_width)}.{self.state.frame_format}"
+
+        workers = os.cpu_count() or 1
+        pending_writes = deque()
+        def drain_writes(limit=0):
+            while len(pending_writes) > limit:
+                pending_writes.popleft().result()
+
+        try:
+            create_directory(pending_scene_path(0))
+            index = 0
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                with Mtqdm().open_bar(total=frame_count, desc="Ingest") as bar:
+                    for frame in MP4toFrames(self.state.source_video,
+                                             self.state.project_fps,
+                                             width,
+                                             height,
+                                             deinterlace=self.state.deinterlace,
+                                             global_options=self.state.global_options):
+                        score, ratio, _ = signals.add(frame)
+                        new_scene_index = None
+                        if scene_detector:
+                            if scene_detector.add(score) and index > scene_starts[-1]:
+                                new_scene_index = index
+                        elif break_detector:
+                            break_index = break_detector.add(ratio)
+                            if break_index is not None and break_index > scene_starts[-1]:
+                                new_scene_index = break_index
+                        elif split_frames:
+                            if index - scene_starts[-1] >= split_frames:
+                                new_scene_index = index
+
+                        if new_scene_index is not None:
+                            from_path = pending_scene_path(scene_starts[-1])
+                            scene_starts.append(new_scene_index)
+                            to_path = pending_scene_path(new_scene_index)
+                            create_directory(to_path)
+                            # a break is found after its later frames have been written
+                            if new_scene_index < index:
+                                drain_writes()
+                                for move_index in range(new_scene_index, index):
+                                    filename = frame_filename(move_index)
+                                    shutil.move(os.path.join(from_path, filename),
+                                                os.path.join(to_path, filename))
+
+                        frame_path = os.path.join(pending_scene_path(scene_starts[-1]),
+                                                  frame_filename(index))
+                        pending_writes.append(executor.submit(write_frame, frame_path, frame))
+                        drain_writes(workers * 4)
+                        index += 1
+                        Mtqdm().update_bar(bar)
+                    drain_writes()
+
+            if index == 0:
+                raise ValueError(f"no frames were decoded from {self.state.source_video}")
+
+            num_width = len(str(index))
+            scene_ends = scene_starts[1:] + [index]
+            for first_index, next_index in zip(scene_starts, scene_ends):
+                scene_name = f"{str(first_index).zfill(num_width)}" +\
+                             f"-{str(next_index - 1).zfill(num_width)}"
+                os.rename(pending_scene_path(first_index),
+                          os.path.join(self.state.scenes_path, scene_name))
+            self.log(f"streamed {index} source frames into {len(scene_starts)} scenes")
+            self.save_frame_signals(signals)
+            return None
+        except ValueError as error:
+            return error
+        except RuntimeError as error:
+            return error
+        except FFRuntimeError as error:
+            return error
+
+    # per-frame signals of the source frames, computed once and kept with the project
+    def frame_signals_path(self):
+        return os.path.join(self.state.project_path, self.SIGNALS_FILENAME)
+
+    def save_frame_signals(self, signals : FrameSignalIndex):
+        signals.save(self.frame_signals_path())
+        self.signals = signals
+
+    def remove_frame_signals(self):
+        self.signals = None
+        if os.path.exists(self.frame_signals_path()):
+            os.remove(self.frame_signals_path())
+
+    def frame_signals(self) -> FrameSignalIndex | None:
+        """Get the saved source frame signals, None if not available"""
+        if self.signals is None and os.path.exists(self.frame_signals_path()):
+            try:
+                self.signals = FrameSignalIndex.load(self.frame_signals_path())
+            except (ValueError, OSError, KeyError) as error:
+                self.log(f"ignoring unreadable frame signals: {error}")
+        return self.signals
+
+    def source_frame_signals(self) -> FrameSignalIndex:
+        """Get signals for the rendered source frames, computing them if needed"""
+        frame_count = len(get_files(self.state.frames_path, self.state.frame_format))
+        signals = self.frame_signals()
+        if signals is None or len(signals) != frame_count:
+            signals = FrameSignalIndex.from_directory(self.state.frames_path,
+                                                      self.state.frame_format)
+            self.save_frame_signals(signals)
+        return signals
+
+    def scene_lightness(self, scene_name : str) -> list | None:
+        """Get the average lightness of each of a scene's frames, None if not available"""
+        signals = self.frame_signals()
+        if signals is None:
+            return None
+        first, last, _ = self.decode_scene_name(scene_name)
+        if last >= len(signals):
+            return None
+        return signals.lightness[first:last + 1]
+
+    # reuse_existing: keep thumbnails made after their scene's frames last changed
+    def create_thumbnails(self, reuse_existing=False):
         self.state.thumbnail_path = os.path.join(self.state.project_path, self.state.THUMBNAILS_PATH)
         create_directory(self.state.thumbnail_path)
-        clean_directories([self.state.thumbnail_path])
         self.state.uncompile_scenes()
 
-        with Mtqdm().open_bar(total=len(self.state.scene_names), desc="Create Thumbnails") as bar:
-            for scene_name in self.state.scene_names:
-                self.create_thumbnail(scene_name)
-                Mtqdm().update_bar(bar)
+        scene_names = self.state.scene_names
+        if reuse_existing:
+            keep_files = [self.thumbnail_filepath(scene_name) for scene_name in scene_names]
+            for thumbnail_file in get_files(self.state.thumbnail_path):
+                if thumbnail_file not in keep_files:
+                    os.remove(thumbnail_file)
+            scene_names = [scene_name for scene_name in scene_names
+                           if not self.thumbnail_current(scene_name)]
+            self.log(f"reusing {len(self.state.scene_names) - len(scene_names)} thumbnails")
+        else:
+            clean_directories([self.state.thumbnail_path])
+
+        workers = os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            with Mtqdm().open_bar(total=len(scene_names), desc="Create Thumbnails") as bar:
+                futures = [executor.submit(self.create_thumbnail, scene_name)
+                           for scene_name in scene_names]
+                for future in futures:
+                    future.result()
+                    Mtqdm().update_bar(bar)
+
+    def thumbnail_current(self, scene_name):
+        thumbnail_filepath = self.thumbnail_filepath(scene_name)
+        scene_path = os.path.join(self.state.scenes_path, scene_name)
+        return os.path.exists(thumbnail_filepath) and os.path.exists(scene_path) and \
+            os.path.getmtime(thumbnail_filepath) >= os.path.getmtime(scene_path)
 
     # shrink low-frame count scenes related code
 
@@ -3,15 +3,20 @@ import os
 import math
 from random import randint
 import shutil
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, TYPE_CHECKING
 import cv2
 import numpy as np
 from webui_utils.file_utils import split_filepath, create_directory, get_directories, get_files,\
     remove_directories, copy_files, simple_sanitize_filename, move_files
-from webui_utils.video_utils import details_from_group_name, PNGtoMP4, combine_video_audio,\
-    combine_videos, PNGtoCustom, image_size
+from webui_utils.video_utils import details_from_group_name, FramesToMP4, combine_video_audio,\
+    combine_videos, FramesToCustom, FFmpegJobPool
 from webui_utils.simple_utils import dummy_args
+from webui_utils.image_utils import write_frame
 from webui_utils.mtqdm import Mtqdm
+from webui_utils.step_scheduler import StepScheduler
 from slice_video import SliceVideo
 from resize_frames import ResizeFrames
 from interpolate import Interpolate
@@ -23,6 +28,11 @@ from upscale_series import UpscaleSeries
 if TYPE_CHECKING:
     from video_remixer import VideoRemixerState
 
+def scene_state_property(name):
+    """Property for processing state carried between scenes, kept apart for each scene worker"""
+    return property(lambda self: getattr(self.scene_state(), name),
+                    lambda self, value: setattr(self.scene_state(), name, value))
+
 class VideoRemixerProcessor():
     def __init__(self, state : "VideoRemixerState", engine : any, engine_settings : dict,
                  realesrgan_settings : dict, global_options : dict, log_fn : Callable):
@@ -32,18 +42,31 @@ class VideoRemixerProcessor():
         self.realesrgan_settings = realesrgan_settings
         self.global_options = global_options
         self.log_fn = log_fn
-        self.saved_view = self.DEFAULT_VIEW
         self.processing_messages = []
-        self.processing_messages_context = {}
-        self.saved_lens_hint = self.DEFAULT_LENS_HINT
-        self.noise_dampening = None
-        self.sticky_block_hints = []
-        self.block_animation_contexts = {}
+        self.shared_scene_state = SceneState()
+        self.worker_local = threading.local()
 
     def log(self, message):
         if self.log_fn:
             self.log_fn(message)
 
+    saved_view = scene_state_property("saved_view")
+    saved_lens_hint = scene_state_property("saved_lens_hint")
+    noise_dampening = scene_state_property("noise_dampening")
+    sticky_block_hints = scene_state_property("sticky_block_hints")
+    block_animation_contexts = scene_state_property("block_animation_contexts")
+    processing_messages_context = scene_state_property("processing_messages_context")
+    undistort_maps = scene_state_property("undistort_maps")
+
+    def scene_state(self) -> "SceneState":
+        """Get the scene state for the current scene worker thread, or the shared state"""
+        return getattr(self.worker_local, "scene_state", self.shared_scene_state)
+
+    def enter_scene_worker(self):
+        """Set up a new scene worker thread with its own scene state and hidden progress bars"""
+        self.worker_local.scene_state = SceneState()
+        Mtqdm().set_thread_quiet(True)
+
     QUADRANT_ZOOM_HINT = "/"
     QUADRANT_GRID_CHAR = "X"
     PERCENT_ZOOM_HINT = "%"
@@ -65,8 +88,6 @@ class VideoRemixerProcessor():
     ANIMATED_BLOCK_MIN_LEN = 5 # 1X-8X
     ANIMATED_LENS_MIN_LEN = 1 # -
     MAX_SELF_FIT_ZOOM = 1000
-    FIXED_UPSCALE_FACTOR = 4.0
-    TEMP_UPSCALE_PATH = "upscaled_frames"
     DEFAULT_DOWNSCALE_TYPE = "area"
     DEFAULT_VIEW = "100%"
     DEFAULT_ANIMATION_SCHEDULE = "L" # linear
@@ -92,6 +113,10 @@ class VideoRemixerProcessor():
     LENS_MIN_UNDISTORT = -1000.0
     LENS_MAX_UNDISTORT = 1000.0
     DEFAULT_LENS_HINT = "0D"
+    UNDISTORT_MAPS_CACHE_SIZE = 32
+    UNDISTORT_PARAM_QUANTUM = 0.01
+    # lossless types only, so quality isn't lost again at each processing step
+    INTERMEDIATE_FRAME_TYPES = ["png", "bmp"]
     NO_ACTION_HINT = "N"
     DEFAULT_BLOCK_VIEW = "100%"
 
@@ -113,6 +138,11 @@ class VideoRemixerProcessor():
         self.state.save()
 
     def process_remix(self, kept_scenes):
+        scene_workers = self.state.remixer_settings["scene_workers"]
+        if scene_workers > 0:
+            self.process_remix_scheduled(kept_scenes, scene_workers)
+            return
+
         if self.resize_needed():
             self.resize_scenes(kept_scenes)
 
@@ -128,6 +158,112 @@ class VideoRemixerProcessor():
         if self.upscale_needed():
             self.upscale_scenes(kept_scenes)
 
+    def process_remix_scheduled(self, kept_scenes, scene_workers):
+        """Process each scene independently, moving it on to its next step as soon as its
+           previous step finishes. GPU steps are serialized through a single worker. Steps
+           that carry hint state from scene to scene plan their frame operators in scene order
+           on their own worker, and the frames are processed on a pool of scene_workers
+           threads."""
+        steps = []
+        if self.resize_needed():
+            steps += self.resize_steps()
+        if self.resynthesize_needed():
+            steps += self.resynthesize_steps()
+        if self.inflate_needed():
+            steps += self.inflate_steps()
+        if self.effects_needed():
+            steps += self.effects_steps()
+        if self.upscale_needed():
+            steps += self.upscale_steps()
+
+        pools = {"cpu" : scene_workers, "gpu" : 1, "resize" : 1, "effects" : 1}
+        StepScheduler(pools, initializer=self.enter_scene_worker, log_fn=self.log_fn).run(
+            kept_scenes, steps, desc="Process Scenes")
+
+    def _scene_step(self, name, pool, operation, fn, ordered=False):
+        def run_step(scene_name):
+            self.processing_messages_context["operation"] = operation
+            fn(scene_name)
+        return {"name" : name, "pool" : pool, "fn" : run_step, "ordered" : ordered}
+
+    def _planned_scene_steps(self, name, pool, operation, plan_fn, apply_fn):
+        """Steps for an operation whose frame operators depend on hint state carried from scene
+           to scene. plan_fn returns the scene's operators and is run in scene order on the
+           named pool. apply_fn takes the scene name and operators and is run on the cpu pool"""
+        planned = {}
+        def plan(scene_name):
+            planned[scene_name] = plan_fn(scene_name)
+
+        def apply(scene_name):
+            apply_fn(scene_name, planned.pop(scene_name))
+
+        return [self._scene_step(f"plan {name}", pool, operation, plan, ordered=True),
+                self._scene_step(name, "cpu", operation, apply)]
+
+    def resize_steps(self):
+        scenes_base_path = self.scenes_source_path(self.state.RESIZE_STEP)
+        output_base_path = self.state.resize_path
+        create_directory(output_base_path)
+        scale_type, crop_type = self.get_project_resize_params()
+
+        def plan(scene_name):
+            return self.resizing_operators(self.state.RESIZE_HINT, scene_name, scale_type,
+                                           crop_type, adjust_for_inflation=False)
+
+        def resize(scene_name, operators):
+            self.apply_scene_operators(scenes_base_path, output_base_path, scene_name,
+                                       operators, "Resizing")
+        # resize hints carry over to following scenes, so scenes are planned in order
+        return self._planned_scene_steps("resize", "resize", "Resize", plan, resize)
+
+    def resynthesize_steps(self):
+        series_interpolater = self.create_series_interpolater()
+        output_basename = "resynthesized_frames"
+        scenes_base_path = self.scenes_source_path(self.state.RESYNTH_STEP)
+        create_directory(self.state.resynthesis_path)
+
+        def resynthesize(scene_name):
+            self.resynthesize_scene(scene_name, scenes_base_path, output_basename,
+                                    series_interpolater)
+        return [self._scene_step("resynthesize", "gpu", "Resynthesize", resynthesize)]
+
+    def inflate_steps(self):
+        series_interpolater = self.create_series_interpolater()
+        scenes_base_path = self.scenes_source_path(self.state.INFLATE_STEP)
+        create_directory(self.state.inflation_path)
+
+        def inflate(scene_name):
+            self.inflate_scene(scene_name, scenes_base_path, series_interpolater)
+        return [self._scene_step("inflate", "gpu", "Inflate", inflate)]
+
+    def effects_steps(self):
+        output_base_path = self.state.effects_path
+        create_directory(output_base_path)
+        scenes_base_path = self.scenes_source_path(self.state.EFFECTS_STEP)
+        scale_type, crop_type = self.get_project_resize_params()
+
+        def plan(scene_name):
+            self.processing_messages_context["scene_name"] = scene_name
+            return self.effects_operators(scene_name, scale_type, crop_type)
+
+        def effects(scene_name, operators):
+            self.apply_scene_operators(scenes_base_path, output_base_path, scene_name,
+                                       operators, "Effects")
+        # block, lens and view hints carry over to following scenes, so scenes are planned in order
+        return self._planned_scene_steps("effects", "effects", "Effects", plan, effects)
+
+    def upscale_steps(self):
+        upscaler = self.get_upscaler()
+        scenes_base_path = self.scenes_source_path(self.state.UPSCALE_STEP)
+        downscale_type = self.state.remixer_settings["scale_type_down"]
+        create_directory(self.state.upscale_path)
+        upscale_factor = self.upscale_factor_from_options()
+
+        def upscale(scene_name):
+            self.process_upscale_scene(upscaler, scene_name, scenes_base_path, upscale_factor,
+                                       downscale_type)
+        return [self._scene_step("upscale", "gpu", "Upscale", upscale)]
+
     def processed_content_complete(self, processing_step):
         expected_items = len(self.state.kept_scenes())
         if processing_step == self.state.RESIZE_STEP:
@@ -397,6 +533,28 @@ class VideoRemixerProcessor():
 
         return processing_path
 
+    def intermediate_frame_type(self) -> str:
+        """Get the file type for frames written by processing steps, which are only read back
+           by later steps and FFmpeg, defaulting to the project frame format if lossless, and
+           otherwise 'png'. Uncompressed 'bmp' frames are much faster to write and read than
+           'png'"""
+        frame_type = self.state.remixer_settings["intermediate_frame_type"]
+        if not frame_type:
+            frame_type = self.state.frame_format \
+                if self.state.frame_format in self.INTERMEDIATE_FRAME_TYPES else "png"
+        if frame_type not in self.INTERMEDIATE_FRAME_TYPES:
+            raise ValueError(f"intermediate frame type '{frame_type}' is not supported")
+        return frame_type
+
+    def scene_frame_type(self, scene_path) -> str:
+        """Get the file type of the frames in a scene path, which may be source frames in the
+           project frame format or processed frames in the intermediate frame type"""
+        files = sorted(get_files(scene_path))
+        if files:
+            _, _, frame_type = split_filepath(files[0], include_extension_dot=False)
+            return frame_type
+        return self.state.frame_format
+
     # get path to the furthest processed content
     def furthest_processed_path(self):
         if self.state.upscale_chosen():
@@ -427,82 +585,156 @@ class VideoRemixerProcessor():
                               adjust_for_inflation=False)
 
     def effect_scenes(self, kept_scenes):
+        self.processing_messages_context["operation"] = "Effects"
+        scenes_base_path = self.scenes_source_path(self.state.EFFECTS_STEP)
         output_base_path = self.state.effects_path
         create_directory(output_base_path)
-        working_input_path = self.scenes_source_path(self.state.EFFECTS_STEP)
+        scale_type, crop_type = self.get_project_resize_params()
 
-        working_paths = []
+        self.sticky_block_hints = []
+        self.block_animation_contexts = {}
+        self.saved_lens_hint = self.DEFAULT_LENS_HINT
+        self.saved_view = self.DEFAULT_VIEW
 
-        if self.state.effects_hint_chosen(self.state.EFFECTS_BLOCK_HINT):
-            operation = "Block FX"
-            self.processing_messages_context["operation"] = operation
-            working_output_path = os.path.join(output_base_path, "block_fx")
-            working_paths.append(working_output_path)
-            create_directory(working_output_path)
+        with Mtqdm().open_bar(total=len(kept_scenes), desc="Effects") as bar:
+            for scene_name in kept_scenes:
+                self.process_effects_scene(scenes_base_path, output_base_path, scene_name,
+                                           scale_type, crop_type)
+                Mtqdm().update_bar(bar)
 
-            self.process_block_effects(working_input_path, working_output_path, kept_scenes, operation, adjust_for_inflation=True)
-            working_input_path = working_output_path
+    def process_effects_scene(self, scenes_base_path, output_base_path, scene_name, scale_type,
+                              crop_type):
+        """Apply all the chosen effects to a scene in a single pass over its frames"""
+        self.processing_messages_context["scene_name"] = scene_name
+        operators = self.effects_operators(scene_name, scale_type, crop_type)
+        self.apply_scene_operators(scenes_base_path, output_base_path, scene_name, operators,
+                                   "Effects")
+
+    def effects_operators(self, scene_name, scale_type, crop_type):
+        """Get the frame operators for the chosen effects that apply to a scene, in order"""
+        operators = []
+        if self.state.effects_hint_chosen(self.state.EFFECTS_BLOCK_HINT):
+            self.processing_messages_context["operation"] = "Block FX"
+            operators.append(self.block_operator(scene_name, adjust_for_inflation=True))
 
         if self.state.effects_hint_chosen(self.state.EFFECTS_LENS_HINT):
-            operation = "Lens FX"
-            self.processing_messages_context["operation"] = operation
-            working_output_path = os.path.join(output_base_path, "lens_fx")
-            working_paths.append(working_output_path)
-            create_directory(working_output_path)
-
-            self.process_lens_effects(working_input_path, working_output_path, kept_scenes, operation, adjust_for_inflation=True)
-            working_input_path = working_output_path
+            self.processing_messages_context["operation"] = "Lens FX"
+            operators.append(self.lens_operator(scene_name, adjust_for_inflation=True))
 
         # view is processed after all other effects (except fade) to take into account all effects
         if self.state.effects_hint_chosen(self.state.EFFECTS_VIEW_HINT):
-            operation = "View FX"
-            self.processing_messages_context["operation"] = operation
-            working_output_path = os.path.join(output_base_path, "view_fx")
-            working_paths.append(working_output_path)
-            create_directory(working_output_path)
-
-            self.process_resizing(working_input_path, working_output_path,
-                                  self.state.EFFECTS_VIEW_HINT, kept_scenes, operation,
-                                  adjust_for_inflation=True)
-            working_input_path = working_output_path
+            self.processing_messages_context["operation"] = "View FX"
+            operators.append(self.resize_operator(self.state.EFFECTS_VIEW_HINT, scene_name,
+                                                  scale_type, crop_type,
+                                                  adjust_for_inflation=True))
 
         # Fade is processed last so the fade effect doesn't interfere with other effect processing
         if self.state.effects_hint_chosen(self.state.EFFECTS_FADE_HINT):
-            operation = "Fade FX"
-            self.processing_messages_context["operation"] = operation
-            working_output_path = os.path.join(output_base_path, "fade_fx")
-            working_paths.append(working_output_path)
-            create_directory(working_output_path)
-
-            self.process_fade(working_input_path, working_output_path, kept_scenes, operation, adjust_for_inflation=True)
-            working_input_path = working_output_path
+            self.processing_messages_context["operation"] = "Fade FX"
+            operators.append(self.fade_operator(scene_name, adjust_for_inflation=True))
 
-        # copy from last working input path to effects path
-        shutil.copytree(working_input_path, output_base_path, dirs_exist_ok=True)
+        return [operator for operator in operators if operator]
 
-        remove_directories(working_paths)
+    # Frame operators are functions taking a frame index and frame, returning the processed frame
 
-    def process_lens_effects(self, scenes_base_path, output_base_path, kept_scenes, desc,
-                             adjust_for_inflation):
-        self.saved_lens_hint = self.DEFAULT_LENS_HINT
+    def apply_scene_operators(self, scenes_base_path, output_base_path, scene_name, operators,
+                              desc):
+        self.processing_messages_context["scene_name"] = scene_name
+        scene_input_path = os.path.join(scenes_base_path, scene_name)
+        scene_output_path = os.path.join(output_base_path, scene_name)
+        self.apply_frame_operators(scene_input_path, scene_output_path, operators, desc)
 
-        with Mtqdm().open_bar(total=len(kept_scenes), desc=desc) as bar:
-            for scene_name in kept_scenes:
-                self.processing_messages_context["scene_name"] = scene_name
-
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(output_base_path, scene_name)
-                create_directory(scene_output_path)
+    def apply_frame_operators(self, scene_input_path, scene_output_path, operators, desc):
+        """Read each frame once, apply the frame operators in order, and write it once in the
+           intermediate frame type. The frames are copied as-is if there are no operators"""
+        create_directory(scene_output_path)
+        if not operators:
+            copy_files(scene_input_path, scene_output_path)
+            return
 
-                handled = self.process_lens_hint(scene_input_path, scene_output_path,
-                                                 scene_name, adjust_for_inflation)
-                if not handled:
-                    copy_files(scene_input_path, scene_output_path)
+        files = sorted(get_files(scene_input_path))
+        frame_type = self.intermediate_frame_type()
+
+        def read(file):
+            return cv2.imread(file)
+
+        def process(index, read_future):
+            frame = read_future.result()
+            for operator in operators:
+                frame = operator(index, frame)
+                # same as if written to and read back from an intermediate frame file
+                if frame.dtype != np.uint8:
+                    frame = frame.astype(np.uint8)
+            return frame
 
-                Mtqdm().update_bar(bar)
+        def write(file, process_future):
+            _, filename, _ = split_filepath(file)
+            output_path = os.path.join(scene_output_path, f"{filename}.{frame_type}")
+            write_frame(output_path, process_future.result())
+
+        # operators may carry state from frame to frame, in which case frames are processed in
+        # order on a single worker sharing this thread's scene state, otherwise on a pool of
+        # threads. Frames are read ahead and written by separate pools of threads, with a
+        # bounded number of frames in flight
+        scene_state = self.scene_state()
+        def enter_process_worker():
+            self.worker_local.scene_state = scene_state
+
+        # scenes may be processed concurrently by the scene workers, which share the CPUs
+        scene_workers = max(1, self.state.remixer_settings["scene_workers"])
+        threads = max(1, (os.cpu_count() or 1) // scene_workers)
+        stateless = all(getattr(operator, "stateless", False) for operator in operators)
+        process_threads = threads if stateless else 1
+        max_pending = threads * 2
+        with ThreadPoolExecutor(max_workers=threads) as read_pool,\
+             ThreadPoolExecutor(max_workers=process_threads,
+                                initializer=enter_process_worker) as process_pool,\
+             ThreadPoolExecutor(max_workers=threads) as write_pool:
+            pending = deque()
+            with Mtqdm().open_bar(total=len(files), desc=desc) as bar:
+                for index, file in enumerate(files):
+                    read_future = read_pool.submit(read, file)
+                    process_future = process_pool.submit(process, index, read_future)
+                    pending.append(write_pool.submit(write, file, process_future))
+                    if len(pending) >= max_pending:
+                        pending.popleft().result()
+                        Mtqdm().update_bar(bar)
+                while pending:
+                    pending.popleft().result()
+                    Mtqdm().update_bar(bar)
 
-    def process_lens_hint(self, scene_input_path, scene_output_path, scene_name,
-                          adjust_for_inflation):
+    def stateless_operator(self, operator):
+        """Mark a frame operator as keeping no state from frame to frame, so that frames can be
+           processed concurrently"""
+        operator.stateless = True
+        return operator
+
+    def guarded_operator(self, operator, hint, fallback_operator=None):
+        """Wrap a frame operator so that on an error the hint is skipped for the rest of the
+           scene, using the fallback operator if any, or passing the frames through as-is"""
+        operation = self.processing_messages_context.get("operation")
+        failed = False
+        def guarded(index, frame):
+            nonlocal failed
+            if not failed:
+                try:
+                    return operator(index, frame)
+                except Exception as error:
+                    failed = True
+                    self.report_hint_error(hint, error, operation)
+                    if self.state.remixer_settings.get("raise_on_error"):
+                        raise
+            return fallback_operator(index, frame) if fallback_operator else frame
+        return guarded
+
+    def report_hint_error(self, hint, error, operation):
+        self.processing_messages_context["operation"] = operation
+        message = f"Skipping processing of hint {hint} due to error: {error}"
+        self.add_processing_message(message)
+        self.log(message)
+
+    def lens_operator(self, scene_name, adjust_for_inflation):
+        """Get a frame operator for the scene's lens hint, or None if there isn't one"""
         message = None
         scene_label = self.state.scene_labels.get(scene_name)
         lens_hint = self.state.get_hint(scene_label, self.state.EFFECTS_LENS_HINT)
@@ -513,19 +745,18 @@ class VideoRemixerProcessor():
         if not lens_hint and self.saved_lens_hint != self.DEFAULT_LENS_HINT:
             lens_hint = self.saved_lens_hint
 
-        handled = False
+        operator = None
         if lens_hint:
             try:
-                handled = handled or \
-                    self.process_animated_lens_hint(lens_hint, scene_input_path, scene_output_path,
-                                                     scene_name, adjust_for_inflation)
+                operator = operator or \
+                    self.process_animated_lens_hint(lens_hint, scene_name, adjust_for_inflation)
 
-                handled = handled or \
-                    self.process_static_lens_hint(lens_hint, scene_input_path, scene_output_path)
+                operator = operator or \
+                    self.process_static_lens_hint(lens_hint)
 
             except Exception as error:
                 message = f"Skipping processing of hint {lens_hint} due to error: {error}"
-                handled = False
+                operator = None
                 if self.state.remixer_settings.get("raise_on_error"):
                     raise
 
@@ -533,9 +764,9 @@ class VideoRemixerProcessor():
             self.add_processing_message(message)
             self.log(message)
 
-        return handled
+        return self.guarded_operator(operator, lens_hint) if operator else None
 
-    def process_animated_lens_hint(self, lens_hint, scene_input_path, scene_output_path, scene_name, adjust_for_inflation):
+    def process_animated_lens_hint(self, lens_hint, scene_name, adjust_for_inflation):
         if self.ANIMATED_ZOOM_HINT in lens_hint:
             lens_hint = self.get_implied_lens_hint(lens_hint)
             self.log(f"get_implied_lens_hint() filtered lens hint: {lens_hint}")
@@ -551,24 +782,24 @@ class VideoRemixerProcessor():
                                                     type_to, param_to, frame_from, frame_to, schedule,
                                                     adjust_for_inflation)
 
-                self.animate_undistort_scene(scene_input_path,
-                                scene_output_path,
-                                context=context)
-                return True
-        return False
+                def animate_undistort_frame(index, frame):
+                    return self.undistort_frame(frame, self.animated_undistort_param(index, context),
+                                                quantize=True)
+                return animate_undistort_frame
+        return None
 
-    def process_static_lens_hint(self, lens_hint, scene_input_path, scene_output_path):
+    def process_static_lens_hint(self, lens_hint):
         type, param = self.get_lens_hint(lens_hint)
         param = float(param)
         if type == self.LENS_TYPE_UNDISTORT:
-            self.static_undistort_scene(scene_input_path, scene_output_path, param * -1.)
-            self.saved_lens_hint = lens_hint
-            return True
-        elif type == self.LENS_TYPE_DISTORT:
-            self.static_undistort_scene(scene_input_path, scene_output_path, param)
-            self.saved_lens_hint = lens_hint
-            return True
-        return False
+            param *= -1.
+        elif type != self.LENS_TYPE_DISTORT:
+            return None
+        self.saved_lens_hint = lens_hint
+
+        def static_undistort_frame(index, frame):
+            return self.undistort_frame(frame, param)
+        return static_undistort_frame
 
     def _get_lens_hint(self, hint, check_type):
         lens_type = None
@@ -596,11 +827,25 @@ class VideoRemixerProcessor():
         return None, None
 
     # https://stackoverflow.com/questions/26602981/correct-barrel-distortion-in-opencv-manually-without-chessboard-image
-    def undistort_frame(self, frame, param):
+    def undistort_frame(self, frame, param, quantize=False):
         if param == 0.0:
             return frame
 
         height, width = frame.shape[:2]
+        map1, map2 = self.get_undistort_maps(width, height, param, quantize)
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+
+    def get_undistort_maps(self, width, height, param, quantize=False):
+        """Get the cached undistortion maps for a frame size and distortion parameter
+           quantize: round the parameter so animated lens effects reuse maps between frames"""
+        if quantize:
+            param = round(param / self.UNDISTORT_PARAM_QUANTUM) * self.UNDISTORT_PARAM_QUANTUM
+        key = (width, height, param)
+        undistort_maps = self.undistort_maps
+        maps = undistort_maps.get(key)
+        if maps:
+            undistort_maps.move_to_end(key)
+            return maps
 
         distCoeff = np.zeros((4, 1), np.float64)
         distCoeff[0,0] = param; # negative to remove barrel distortion
@@ -622,21 +867,13 @@ class VideoRemixerProcessor():
         cam[0, 0] = focal_length # define focal length x
         cam[1, 1] = focal_length # define focal length y
 
-        # here the undistortion will be computed
-        return cv2.undistort(frame, cam, distCoeff)
-
-    def static_undistort_scene(self, scene_input_path, scene_output_path, param):
-        files = sorted(get_files(scene_input_path))
-        with Mtqdm().open_bar(total=len(files), desc="Distort FX") as bar:
-            for file in files:
-                _, filename, ext = split_filepath(file)
-                output_path = os.path.join(scene_output_path, filename + ext)
-
-                frame = cv2.imread(file)
-                frame = self.undistort_frame(frame, param)
-
-                cv2.imwrite(output_path, frame.astype(np.uint8))
-                Mtqdm().update_bar(bar)
+        # here the undistortion map will be computed, the same as done by cv2.undistort()
+        maps = cv2.initUndistortRectifyMap(cam, distCoeff, None, cam, (width, height),
+                                           cv2.CV_16SC2)
+        undistort_maps[key] = maps
+        if len(undistort_maps) > self.UNDISTORT_MAPS_CACHE_SIZE:
+            undistort_maps.popitem(last=False)
+        return maps
 
     def get_implied_lens_hint(self, hint):
         if self.ANIMATED_ZOOM_HINT in hint:
@@ -780,11 +1017,7 @@ class VideoRemixerProcessor():
         context["end_frame"] = frame_to
         return context
 
-    def animate_undistort_scene(self,
-                     scene_input_path,
-                     scene_output_path,
-                     context : any=None):
-
+    def animated_undistort_param(self, index, context : any):
         lens_from = context["lens_from"]
         step_lens = context["step_lens"]
         num_frames = context["num_frames"]
@@ -792,60 +1025,28 @@ class VideoRemixerProcessor():
         start_frame = context["start_frame"]
         end_frame = context["end_frame"]
 
-        files = sorted(get_files(scene_input_path))
-        with Mtqdm().open_bar(total=len(files), desc="Distort FX") as bar:
-            for index, file in enumerate(files):
-                _, filename, ext = split_filepath(file)
-                output_path = os.path.join(scene_output_path, filename + ext)
-
-                if index < start_frame:
-                    index = 0
-                elif index > end_frame:
-                    index = end_frame - start_frame
-                else:
-                    index -= start_frame
-
-                    accelerate = True
-                    index, float_carry = self._apply_animation_schedule(schedule, num_frames, index,
-                                                                        accelerate)
-                    if float_carry >= 0.5:
-                        index += 1
-
-                if index > num_frames:
-                    index = num_frames
-
-                param = lens_from + (step_lens * index)
-                if param < self.LENS_MIN_UNDISTORT:
-                    param = self.LENS_MIN_UNDISTORT
-                elif param > self.LENS_MAX_UNDISTORT:
-                    param = self.LENS_MAX_UNDISTORT
-
-                frame = cv2.imread(file)
-
-                frame = self.undistort_frame(frame, param)
-                cv2.imwrite(output_path, frame)
-
-                Mtqdm().update_bar(bar)
-
-    def process_block_effects(self, scenes_base_path, output_base_path, kept_scenes, desc,
-                     adjust_for_inflation):
-        self.sticky_block_hints = []
-        self.block_animation_contexts = {}
-
-        with Mtqdm().open_bar(total=len(kept_scenes), desc=desc) as bar:
-            for scene_name in kept_scenes:
-                self.processing_messages_context["scene_name"] = scene_name
+        if index < start_frame:
+            index = 0
+        elif index > end_frame:
+            index = end_frame - start_frame
+        else:
+            index -= start_frame
 
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(output_base_path, scene_name)
-                create_directory(scene_output_path)
+            accelerate = True
+            index, float_carry = self._apply_animation_schedule(schedule, num_frames, index,
+                                                                accelerate)
+            if float_carry >= 0.5:
+                index += 1
 
-                handled = self.process_block_hints(scene_input_path, scene_output_path,
-                                                  scene_name, adjust_for_inflation)
-                if not handled:
-                    copy_files(scene_input_path, scene_output_path)
+        if index > num_frames:
+            index = num_frames
 
-                Mtqdm().update_bar(bar)
+        param = lens_from + (step_lens * index)
+        if param < self.LENS_MIN_UNDISTORT:
+            param = self.LENS_MIN_UNDISTORT
+        elif param > self.LENS_MAX_UNDISTORT:
+            param = self.LENS_MAX_UNDISTORT
+        return param
 
     # have default arguments so this is more easily reused for showing a preview
     def process_block_hint(self, hint, frame, main_resize_w, main_resize_h, main_offset_x,
@@ -868,45 +1069,61 @@ class VideoRemixerProcessor():
 
         return hint_handled, frame
 
-    def process_block_hints(self, scene_input_path, scene_output_path, scene_name,
-                            adjust_for_inflation):
-        message = None
-        scene_handled = False
+    def block_operator(self, scene_name, adjust_for_inflation):
+        """Get a frame operator for the scene's block hints, including sticky hints from prior
+           scenes, or None if there aren't any"""
         hints = self.state.get_hint(self.state.scene_labels.get(scene_name),
                                         self.state.EFFECTS_BLOCK_HINT, allow_multiple=True)
-        hints = self.sticky_block_hints + hints if hints else self.sticky_block_hints
-
-        if hints:
-            content_width = self.state.video_details["content_width"]
-            content_height = self.state.video_details["content_height"]
-            main_resize_w, main_resize_h, main_crop_w, main_crop_h, main_offset_x, main_offset_y = \
-                self.setup_resize_hint(content_width, content_height, False)
-
-            files = sorted(get_files(scene_input_path))
-            with Mtqdm().open_bar(total=len(files), desc="Block FX") as bar:
-                for index, file in enumerate(files):
-                    _, filename, ext = split_filepath(file)
-                    output_path = os.path.join(scene_output_path, filename + ext)
-                    frame = cv2.imread(file)
-
-                    for hint in hints:
-                        try:
-                            hint_handled, frame = self.process_block_hint(hint, frame, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h, index, scene_name, adjust_for_inflation)
-                            scene_handled = scene_handled or hint_handled
-                        except Exception as error:
-                            message = f"Skipping processing of hint {hint} due to error: {error}"
-                            hint_handled = False
-                            if self.state.remixer_settings.get("raise_on_error"):
-                                raise
-
-                    cv2.imwrite(output_path, frame.astype(np.uint8))
-                    Mtqdm().update_bar(bar)
+        hints = self.sticky_block_hints + hints if hints else list(self.sticky_block_hints)
+        if not hints:
+            return None
 
-        if message:
-            self.add_processing_message(message)
-            self.log(message)
+        content_width = self.state.video_details["content_width"]
+        content_height = self.state.video_details["content_height"]
+        main_resize_w, main_resize_h, main_crop_w, main_crop_h, main_offset_x, main_offset_y = \
+            self.setup_resize_hint(content_width, content_height, False)
+        operation = self.processing_messages_context.get("operation")
+        failed_hints = set()
+
+        # resolve the state carried to following scenes now rather than as frames are processed
+        contexts = self.resolve_block_hints(hints, main_resize_w, main_resize_h, main_offset_x,
+                                            main_offset_y, main_crop_w, main_crop_h, scene_name,
+                                            adjust_for_inflation)
+
+        def block_frame(index, frame):
+            # the frames may be processed on another scene worker
+            self.block_animation_contexts.update(contexts)
+            for hint in hints:
+                try:
+                    _, frame = self.process_block_hint(hint, frame, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h, index, scene_name, adjust_for_inflation)
+                except Exception as error:
+                    if hint not in failed_hints:
+                        failed_hints.add(hint)
+                        self.report_hint_error(hint, error, operation)
+                    if self.state.remixer_settings.get("raise_on_error"):
+                        raise
+            return frame
+        return block_frame
 
-        return scene_handled
+    def resolve_block_hints(self, hints, main_resize_w, main_resize_h, main_offset_x,
+                            main_offset_y, main_crop_w, main_crop_h, scene_name,
+                            adjust_for_inflation):
+        """Get the animation contexts for the block hints, updating the sticky block hints the
+           same as processing a frame would. Errors are left to be reported on processing"""
+        contexts = {}
+        for hint in hints:
+            try:
+                context = self.animated_block_context(hint, main_resize_w, main_resize_h,
+                                                      main_offset_x, main_offset_y, main_crop_w,
+                                                      main_crop_h, scene_name,
+                                                      adjust_for_inflation)
+                if context:
+                    contexts[hint] = context
+                else:
+                    self.get_block_type(hint)
+            except Exception:
+                pass
+        return contexts
 
     def get_animated_block_hints(self, hint):
         if self.ANIMATED_ZOOM_HINT in hint:
@@ -932,11 +1149,10 @@ class VideoRemixerProcessor():
 
         return dummy_args(15)
 
-    def process_animated_block_hint(self, block_hint, frame,
-                                    main_resize_w, main_resize_h, main_offset_x, main_offset_y,
-                                    main_crop_w, main_crop_h,
-                                    index, scene_name, adjust_for_inflation):
-
+    def animated_block_context(self, block_hint, main_resize_w, main_resize_h, main_offset_x,
+                               main_offset_y, main_crop_w, main_crop_h, scene_name,
+                               adjust_for_inflation):
+        """Get the animation context for an animated block hint, or None if not animated"""
         from_block_type, from_block_param, to_block_type, to_block_param, \
                 from_type, from_param1, from_param2, from_param3, \
                 to_type, to_param1, to_param2, to_param3, \
@@ -971,7 +1187,15 @@ class VideoRemixerProcessor():
                         context["step_block_param"] = step_block_param
 
                     self.block_animation_contexts[block_hint] = context
+        return context
 
+    def process_animated_block_hint(self, block_hint, frame,
+                                    main_resize_w, main_resize_h, main_offset_x, main_offset_y,
+                                    main_crop_w, main_crop_h,
+                                    index, scene_name, adjust_for_inflation):
+        context = self.animated_block_context(block_hint, main_resize_w, main_resize_h,
+                                              main_offset_x, main_offset_y, main_crop_w,
+                                              main_crop_h, scene_name, adjust_for_inflation)
         if context:
             start_frame = context["start_frame"]
             end_frame = context["end_frame"]
@@ -1199,42 +1423,26 @@ class VideoRemixerProcessor():
                 # Mtqdm().update_bar(bar)
         return frame
 
-    def process_fade(self, scenes_base_path, output_base_path, kept_scenes, desc, adjust_for_inflation):
-        with Mtqdm().open_bar(total=len(kept_scenes), desc=desc) as bar:
-            for scene_name in kept_scenes:
-                self.processing_messages_context["scene_name"] = scene_name
-
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(output_base_path, scene_name)
-                create_directory(scene_output_path)
-
-                fade_handled = self.process_fade_hint(scene_input_path, scene_output_path, scene_name,
-                                       adjust_for_inflation)
-
-                if not fade_handled:
-                    copy_files(scene_input_path, scene_output_path)
-
-                Mtqdm().update_bar(bar)
-
-    def process_fade_hint(self, scene_input_path, scene_output_path, scene_name, adjust_for_inflation):
+    def fade_operator(self, scene_name, adjust_for_inflation):
+        """Get a frame operator for the scene's fade hint, or None if there isn't one"""
         message = None
         fade_hint = self.state.get_hint(self.state.scene_labels.get(scene_name), self.state.EFFECTS_FADE_HINT)
 
-        fade_handled = False
+        operator = None
         if fade_hint:
             try:
-                fade_handled = self._process_fade_hint(fade_hint, scene_input_path, scene_output_path, scene_name, adjust_for_inflation)
+                operator = self._process_fade_hint(fade_hint, scene_name, adjust_for_inflation)
             except Exception as error:
                 message = f"Skipping processing of hint {fade_hint} due to error: {error}"
-                fade_handled = False
+                operator = None
 
         if message:
             self.add_processing_message(message)
             self.log(message)
 
-        return fade_handled
+        return self.guarded_operator(operator, fade_hint) if operator else None
 
-    def _process_fade_hint(self, fade_hint, scene_input_path, scene_output_path, scene_name, adjust_for_inflation):
+    def _process_fade_hint(self, fade_hint, scene_name, adjust_for_inflation):
         fade_type, frame_from, frame_to, schedule = self.get_animated_fade_hints(fade_hint)
 
         if fade_type:
@@ -1243,11 +1451,12 @@ class VideoRemixerProcessor():
             context = self.compute_animated_fade(scene_name, num_frames, fade_type, frame_from,
                                                  frame_to, schedule, adjust_for_inflation)
 
-            self.fade_scene(scene_input_path,
-                            scene_output_path,
-                            context=context)
-            return True
-        return False
+            def fade_frame(index, frame):
+                data = np.array(frame, np.uint8)
+                value = data * self.animated_fade_value(index, context)
+                return value.astype(np.uint8)
+            return fade_frame
+        return None
 
     # TODO DRY
     def get_animated_fade_hints(self, hint):
@@ -1338,11 +1547,7 @@ class VideoRemixerProcessor():
         context["end_frame"] = frame_to
         return context
 
-    def fade_scene(self,
-                     scene_input_path,
-                     scene_output_path,
-                     context : any=None):
-
+    def animated_fade_value(self, index, context : any):
         # fade_type = context["fade_type"]
         fade_from = context["fade_from"]
         step_fade = context["step_fade"]
@@ -1351,77 +1556,84 @@ class VideoRemixerProcessor():
         start_frame = context["start_frame"]
         end_frame = context["end_frame"]
 
-        files = sorted(get_files(scene_input_path))
-        with Mtqdm().open_bar(total=len(files), desc="Fading") as bar:
-            for index, file in enumerate(files):
-                _, filename, ext = split_filepath(file)
-                output_path = os.path.join(scene_output_path, filename + ext)
-
-                if index < start_frame:
-                    index = 0
-                elif index > end_frame:
-                    index = end_frame - start_frame
-                else:
-                    index -= start_frame
-
-                    accelerate = True # this only applies to the "Z" schedule, not clear it's useful or not with fade
-                    index, float_carry = self._apply_animation_schedule(schedule, num_frames, index,
-                                                                        accelerate)
-                    if float_carry >= 0.5:
-                        index += 1
-
-                if index > num_frames:
-                    index = num_frames
+        if index < start_frame:
+            index = 0
+        elif index > end_frame:
+            index = end_frame - start_frame
+        else:
+            index -= start_frame
 
-                fade = fade_from + (step_fade * index)
-                if fade < 0.0:
-                    fade = 0.0
-                elif fade > 1.0:
-                    fade = 1.0
+            accelerate = True # this only applies to the "Z" schedule, not clear it's useful or not with fade
+            index, float_carry = self._apply_animation_schedule(schedule, num_frames, index,
+                                                                accelerate)
+            if float_carry >= 0.5:
+                index += 1
 
-                frame = cv2.imread(file)
-                data = np.array(frame, np.uint8)
-                percent = fade
-                value = data * percent
-                img = value.astype(np.uint8)
-                cv2.imwrite(output_path, img)
+        if index > num_frames:
+            index = num_frames
 
-                Mtqdm().update_bar(bar)
+        fade = fade_from + (step_fade * index)
+        if fade < 0.0:
+            fade = 0.0
+        elif fade > 1.0:
+            fade = 1.0
+        return fade
 
     def process_resizing(self, scenes_base_path, output_base_path, hint_type, kept_scenes, desc,
                          adjust_for_inflation):
-        content_width = self.state.video_details["content_width"]
-        content_height = self.state.video_details["content_height"]
-        scale_type, crop_type= self.get_resize_params(self.state.resize_w, self.state.resize_h,
-                                                      self.state.crop_w, self.state.crop_h,
-                                                      content_width, content_height)
+        scale_type, crop_type = self.get_project_resize_params()
         self.saved_view = self.DEFAULT_VIEW
 
         with Mtqdm().open_bar(total=len(kept_scenes), desc=desc) as bar:
             for scene_name in kept_scenes:
-                self.processing_messages_context["scene_name"] = scene_name
-
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(output_base_path, scene_name)
-                create_directory(scene_output_path)
-
-                resize_handled = self.process_resize_hint(hint_type, scene_input_path,
-                                                          scene_output_path, scene_name,
-                                                          adjust_for_inflation)
-                if not resize_handled:
-                    self.resize_scene(scene_input_path,
-                                      scene_output_path,
-                                      int(self.state.resize_w),
-                                      int(self.state.resize_h),
-                                      int(self.state.crop_w),
-                                      int(self.state.crop_h),
-                                      int(self.state.crop_offset_x),
-                                      int(self.state.crop_offset_y),
-                                      scale_type,
-                                      crop_type)
-
+                self.process_resizing_scene(scenes_base_path, output_base_path, hint_type,
+                                            scene_name, scale_type, crop_type,
+                                            adjust_for_inflation)
                 Mtqdm().update_bar(bar)
 
+    def get_project_resize_params(self):
+        content_width = self.state.video_details["content_width"]
+        content_height = self.state.video_details["content_height"]
+        return self.get_resize_params(self.state.resize_w, self.state.resize_h,
+                                      self.state.crop_w, self.state.crop_h,
+                                      content_width, content_height)
+
+    def process_resizing_scene(self, scenes_base_path, output_base_path, hint_type, scene_name,
+                               scale_type, crop_type, adjust_for_inflation):
+        operators = self.resizing_operators(hint_type, scene_name, scale_type, crop_type,
+                                            adjust_for_inflation)
+        self.apply_scene_operators(scenes_base_path, output_base_path, scene_name, operators,
+                                   "Resizing")
+
+    def resizing_operators(self, hint_type, scene_name, scale_type, crop_type,
+                           adjust_for_inflation):
+        """Get the frame operators for resizing a scene"""
+        self.processing_messages_context["scene_name"] = scene_name
+        operator = self.resize_operator(hint_type, scene_name, scale_type, crop_type,
+                                        adjust_for_inflation)
+        return [operator] if operator else []
+
+    def resize_operator(self, hint_type, scene_name, scale_type, crop_type, adjust_for_inflation):
+        """Get a frame operator for the scene's resize hint, or for the project resize settings
+           if not hinted. Returns None if the frames are to be used as-is"""
+        project_operator = None
+        if scale_type != "none" or crop_type != "none":
+            project_operator = self.frame_resizer(int(self.state.resize_w),
+                                                  int(self.state.resize_h),
+                                                  int(self.state.crop_w),
+                                                  int(self.state.crop_h),
+                                                  int(self.state.crop_offset_x),
+                                                  int(self.state.crop_offset_y),
+                                                  scale_type,
+                                                  crop_type)
+
+        resize_handled, operator = self.process_resize_hint(hint_type, scene_name,
+                                                            adjust_for_inflation,
+                                                            project_operator)
+        if not resize_handled:
+            return project_operator
+        return operator
+
     def get_resize_params(self, resize_w, resize_h, crop_w, crop_h, content_width, content_height):
         if resize_w == content_width and resize_h == content_height:
             scale_type = "none"
@@ -1473,7 +1685,42 @@ class VideoRemixerProcessor():
                                                         params_fn=params_fn,
                                                         params_context=params_context)
 
-    def process_resize_hint(self, hint_type, scene_input_path, scene_output_path, scene_name, adjust_for_inflation):
+    def frame_resizer(self,
+                      resize_w,
+                      resize_h,
+                      crop_w,
+                      crop_h,
+                      crop_offset_x,
+                      crop_offset_y,
+                      scale_type,
+                      crop_type,
+                      params_fn : Callable | None = None,
+                      params_context : any=None):
+        """Get a frame operator resizing and cropping frames the same as resize_scene()"""
+        resizer = ResizeFrames(None,
+                               None,
+                               resize_w,
+                               resize_h,
+                               scale_type,
+                               self.log_fn,
+                               crop_type=crop_type,
+                               crop_width=crop_w,
+                               crop_height=crop_h,
+                               crop_offset_x=crop_offset_x,
+                               crop_offset_y=crop_offset_y)
+        scale_type = resizer.get_scale_type(scale_type)
+        crop_type = resizer.get_crop_type(crop_type)
+
+        def resize_frame(index, frame):
+            return resizer.resize_frame(frame, index, scale_type, crop_type, params_fn,
+                                        params_context)
+        # animated resizing is left to be processed in frame order
+        return resize_frame if params_fn else self.stateless_operator(resize_frame)
+
+    def process_resize_hint(self, hint_type, scene_name, adjust_for_inflation,
+                            fallback_operator=None):
+        """Returns True if the scene has a resize hint, and its frame operator (None to use the
+           frames as-is)"""
         message = None
         scene_label = self.state.scene_labels.get(scene_name)
         resize_hint = self.state.get_hint(scene_label, hint_type)
@@ -1484,6 +1731,7 @@ class VideoRemixerProcessor():
             resize_hint = self.saved_view
 
         resize_handled = False
+        operator = None
         if resize_hint:
             content_width = self.state.video_details["content_width"]
             content_height = self.state.video_details["content_height"]
@@ -1491,48 +1739,41 @@ class VideoRemixerProcessor():
                 self.setup_resize_hint(content_width, content_height, True)
 
             try:
-                resize_handled = resize_handled or \
-                    self._process_no_action_hint(resize_hint, scene_input_path, scene_output_path)
+                if not resize_handled:
+                    resize_handled, operator = self._process_no_action_hint(resize_hint)
 
-                resize_handled = resize_handled or \
-                    self._process_animation_hint(resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h, scene_name, adjust_for_inflation)
+                if not resize_handled:
+                    resize_handled, operator = self._process_animation_hint(resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h, scene_name, adjust_for_inflation)
 
-                resize_handled = resize_handled or \
-                    self._process_combined_hint(resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h)
+                if not resize_handled:
+                    resize_handled, operator = self._process_combined_hint(resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h)
 
-                resize_handled = resize_handled or \
-                    self._process_quadrant_hint(resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h)
+                if not resize_handled:
+                    resize_handled, operator = self._process_quadrant_hint(resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h)
 
-                resize_handled = resize_handled or \
-                    self._process_percent_hint(resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h)
+                if not resize_handled:
+                    resize_handled, operator = self._process_percent_hint(resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h)
             except Exception as error:
                 message = f"Skipping processing of hint {resize_hint} due to error: {error}"
                 resize_handled = False
+                operator = None
 
         if message:
             self.add_processing_message(message)
             self.log(message)
 
-        return resize_handled
+        if operator:
+            operator = self.guarded_operator(operator, resize_hint, fallback_operator)
+        return resize_handled, operator
 
-    def _process_no_action_hint(self, resize_hint, scene_input_path, scene_output_path):
-        # disable resizing and instead copy source frames as-is
+    def _process_no_action_hint(self, resize_hint):
+        # disable resizing and instead use the source frames as-is
         # this allows the for_resizing_effects behavior access to the original detail
-        # copy the files using the resequencer
         if resize_hint == self.NO_ACTION_HINT:
-            ResequenceFiles(scene_input_path,
-                            self.state.frame_format,
-                            "scene_frame",
-                            1, 1,
-                            1, 0,
-                            -1,
-                            False,
-                            self.log_fn,
-                            output_path=scene_output_path).resequence()
-            return True
-        return False
+            return True, None
+        return False, None
 
-    def _process_animation_hint(self, resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h, scene_name, adjust_for_inflation):
+    def _process_animation_hint(self, resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h, scene_name, adjust_for_inflation):
         if self.ANIMATED_ZOOM_HINT in resize_hint:
             # interprent 'any-any' as animating from one to the other zoom factor
             resize_hint = self.get_implied_zoom(resize_hint)
@@ -1551,50 +1792,46 @@ class VideoRemixerProcessor():
                         adjust_for_inflation)
 
                 scale_type = self.state.remixer_settings["scale_type_up"]
-                self.resize_scene(scene_input_path,
-                                    scene_output_path,
-                                    None,
-                                    None,
-                                    main_crop_w,
-                                    main_crop_h,
-                                    None,
-                                    None,
-                                    scale_type,
-                                    crop_type="crop",
-                                    params_fn=self._resize_frame_param,
-                                    params_context=context)
-                return True
-        return False
-
-    def _process_combined_hint(self, resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h):
+                operator = self.frame_resizer(None,
+                                              None,
+                                              main_crop_w,
+                                              main_crop_h,
+                                              None,
+                                              None,
+                                              scale_type,
+                                              crop_type="crop",
+                                              params_fn=self._resize_frame_param,
+                                              params_context=context)
+                return True, operator
+        return False, None
+
+    def _process_combined_hint(self, resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h):
         if self.COMBINED_ZOOM_HINT in resize_hint:
             quadrant, quadrants, zoom_percent = self.get_combined_zoom(resize_hint)
             if quadrant and quadrants and zoom_percent:
                 resize_w, resize_h, center_x, center_y = \
                     self.compute_combined_zoom(quadrant, quadrants, zoom_percent,
-                                                main_resize_w, main_resize_h,
-                                                main_offset_x, main_offset_y,
-                                                main_crop_w, main_crop_h)
+                                                          main_resize_w, main_resize_h,
+                                                          main_offset_x, main_offset_y,
+                                                          main_crop_w, main_crop_h)
 
                 crop_offset_x = center_x - (main_crop_w / 2.0)
                 crop_offset_y = center_y - (main_crop_h / 2.0)
 
                 scale_type = self.state.remixer_settings["scale_type_up"]
-                self.resize_scene(scene_input_path,
-                                    scene_output_path,
-                                    int(resize_w),
-                                    int(resize_h),
-                                    int(main_crop_w),
-                                    int(main_crop_h),
-                                    int(crop_offset_x),
-                                    int(crop_offset_y),
-                                    scale_type,
-                                    crop_type="crop")
+                operator = self.frame_resizer(int(resize_w),
+                                              int(resize_h),
+                                              int(main_crop_w),
+                                              int(main_crop_h),
+                                              int(crop_offset_x),
+                                              int(crop_offset_y),
+                                              scale_type,
+                                              crop_type="crop")
                 self.saved_view = resize_hint
-                return True
-        return False
+                return True, operator
+        return False, None
 
-    def _process_quadrant_hint(self, resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h):
+    def _process_quadrant_hint(self, resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h):
         if self.QUADRANT_ZOOM_HINT in resize_hint:
             # interpret 'x/y' as x: quadrant, y: square-based number of quadrants
             # '5/9' and '13/25' would be the center squares of 3x3 and 5x5 grids
@@ -1603,53 +1840,49 @@ class VideoRemixerProcessor():
             if quadrant and quadrants:
                 resize_w, resize_h, center_x, center_y = \
                     self.compute_quadrant_zoom(quadrant, quadrants,
-                                                main_resize_w, main_resize_h,
-                                                main_offset_x, main_offset_y,
-                                                main_crop_w, main_crop_h)
+                                                          main_resize_w, main_resize_h,
+                                                          main_offset_x, main_offset_y,
+                                                          main_crop_w, main_crop_h)
 
                 scale_type = self.state.remixer_settings["scale_type_up"]
                 crop_offset_x = center_x - (main_crop_w / 2.0)
                 crop_offset_y = center_y - (main_crop_h / 2.0)
-                self.resize_scene(scene_input_path,
-                                    scene_output_path,
-                                    int(resize_w),
-                                    int(resize_h),
-                                    int(main_crop_w),
-                                    int(main_crop_h),
-                                    int(crop_offset_x),
-                                    int(crop_offset_y),
-                                    scale_type,
-                                    crop_type="crop")
+                operator = self.frame_resizer(int(resize_w),
+                                              int(resize_h),
+                                              int(main_crop_w),
+                                              int(main_crop_h),
+                                              int(crop_offset_x),
+                                              int(crop_offset_y),
+                                              scale_type,
+                                              crop_type="crop")
                 self.saved_view = resize_hint
-                return True
-        return False
+                return True, operator
+        return False, None
 
-    def _process_percent_hint(self, resize_hint, scene_input_path, scene_output_path, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h):
+    def _process_percent_hint(self, resize_hint, main_resize_w, main_resize_h, main_offset_x, main_offset_y, main_crop_w, main_crop_h):
         if self.PERCENT_ZOOM_HINT in resize_hint:
             # interpret z% as zoom percent to zoom into center
             zoom_percent = self.get_percent_zoom(resize_hint)
             if zoom_percent:
                 resize_w, resize_h, center_x, center_y = \
                     self.compute_percent_zoom(zoom_percent,
-                                                main_resize_w, main_resize_h,
-                                                main_offset_x, main_offset_y,
-                                                main_crop_w, main_crop_h)
+                                                          main_resize_w, main_resize_h,
+                                                          main_offset_x, main_offset_y,
+                                                          main_crop_w, main_crop_h)
                 scale_type = self.state.remixer_settings["scale_type_up"]
                 crop_offset_x = center_x - (main_crop_w / 2.0)
                 crop_offset_y = center_y - (main_crop_h / 2.0)
-                self.resize_scene(scene_input_path,
-                                    scene_output_path,
-                                    int(resize_w),
-                                    int(resize_h),
-                                    int(main_crop_w),
-                                    int(main_crop_h),
-                                    int(crop_offset_x),
-                                    int(crop_offset_y),
-                                    scale_type,
-                                    crop_type="crop")
+                operator = self.frame_resizer(int(resize_w),
+                                              int(resize_h),
+                                              int(main_crop_w),
+                                              int(main_crop_h),
+                                              int(crop_offset_x),
+                                              int(crop_offset_y),
+                                              scale_type,
+                                              crop_type="crop")
                 self.saved_view = resize_hint
-                return True
-        return False
+                return True, operator
+        return False, None
 
     # Resize Processing Hints
 
@@ -2234,41 +2467,20 @@ class VideoRemixerProcessor():
     # TODO dry up this code with same in resynthesize_video_ui - maybe a specific resynth script
     def one_pass_resynthesis(self, input_path, output_path, output_basename,
                              engine : InterpolateSeries):
-        file_list = sorted(get_files(input_path, extension=self.state.frame_format))
+        file_list = sorted(get_files(input_path, extension=self.scene_frame_type(input_path)))
+        frame_type = self.intermediate_frame_type()
         self.log(f"beginning series of frame recreations at {output_path}")
-        engine.interpolate_series(file_list, output_path, 1, "interframe", offset=2,
-                                  type=self.state.frame_format)
-
-        self.log(f"auto-resequencing recreated frames at {output_path}")
-        ResequenceFiles(output_path,
-                        self.state.frame_format,
-                        output_basename,
-                        1, 1, # start, step
-                        1, 0, # stride, offset
-                        -1,   # auto-zero fill
-                        True, # rename
-                        self.log_fn).resequence()
+        engine.interpolate_series(file_list, output_path, 1, output_basename, offset=2,
+                                  type=frame_type, interframes_only=True)
 
     def two_pass_resynth_pass(self, input_path, output_path, output_basename,
                               engine : InterpolateSeries):
-        file_list = sorted(get_files(input_path, extension=self.state.frame_format))
-        inflated_frames = os.path.join(output_path, "inflated_frames")
-        self.log(f"beginning series of interframe recreations at {inflated_frames}")
-        create_directory(inflated_frames)
-        engine.interpolate_series(file_list, inflated_frames, 1, "interframe",
-                                  type=self.state.frame_format)
-
-        self.log(f"selecting odd interframes only at {inflated_frames}")
-        ResequenceFiles(inflated_frames,
-                        self.state.frame_format,
-                        output_basename,
-                        1, 1,  # start, step
-                        2, 1,  # stride, offset
-                        -1,    # auto-zero fill
-                        False, # rename
-                        self.log_fn,
-                        output_path=output_path).resequence()
-        remove_directories([inflated_frames])
+        file_list = sorted(get_files(input_path, extension=self.scene_frame_type(input_path)))
+        frame_type = self.intermediate_frame_type()
+        # only the interframes are kept, already in sequence
+        self.log(f"beginning series of interframe recreations at {output_path}")
+        engine.interpolate_series(file_list, output_path, 1, output_basename,
+                                  type=frame_type, interframes_only=True)
 
     def two_pass_resynthesis(self, input_path, output_path, output_basename, engine,
                              one_pass_only=False):
@@ -2290,11 +2502,17 @@ class VideoRemixerProcessor():
             if not one_pass_only:
                 remove_directories([interframes])
 
-    def resynthesize_scenes(self, kept_scenes):
-        interpolater = Interpolate(self.engine.model, self.log_fn)
+    def create_series_interpolater(self) -> InterpolateSeries:
+        batch_size = self.engine_settings["batch_size"]
+        interpolater = Interpolate(self.engine.model, self.log_fn, batch_size=batch_size)
         use_time_step = self.engine_settings["use_time_step"]
-        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log_fn)
-        series_interpolater = InterpolateSeries(deep_interpolater, self.log_fn)
+        in_memory = self.engine_settings["in_memory_splits"]
+        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log_fn,
+                                            in_memory=in_memory)
+        return InterpolateSeries(deep_interpolater, self.log_fn)
+
+    def resynthesize_scenes(self, kept_scenes):
+        series_interpolater = self.create_series_interpolater()
         output_basename = "resynthesized_frames"
 
         scenes_base_path = self.scenes_source_path(self.state.RESYNTH_STEP)
@@ -2302,137 +2520,143 @@ class VideoRemixerProcessor():
 
         with Mtqdm().open_bar(total=len(kept_scenes), desc="Resynthesize") as bar:
             for scene_name in kept_scenes:
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(self.state.resynthesis_path, scene_name)
-                create_directory(scene_output_path)
-
-                resynth_type = self.state.resynth_option if self.state.resynthesize else None
-                resynth_hint = self.state.get_hint(self.state.scene_labels.get(scene_name),
-                                                   self.state.RESYNTHESIS_HINT)
-                if resynth_hint:
-                    if "C" in resynth_hint:
-                        resynth_type = "Clean"
-                    elif "S" in resynth_hint:
-                        resynth_type = "Scrub"
-                    elif "R" in resynth_hint:
-                        resynth_type = "Replace"
-                    elif "N" in resynth_hint:
-                        resynth_type = None
-
-                if resynth_type == "Replace":
-                    self.one_pass_resynthesis(scene_input_path, scene_output_path,
-                                              output_basename, series_interpolater)
-                elif resynth_type == "Clean" or resynth_type == "Scrub":
-                    one_pass_only = resynth_type == "Clean"
-                    self.two_pass_resynthesis(scene_input_path, scene_output_path,
-                                              output_basename, series_interpolater,
-                                              one_pass_only=one_pass_only)
-                else:
-                    # no need to resynthesize so just copy the files using the resequencer
-                    ResequenceFiles(scene_input_path,
-                                    self.state.frame_format,
-                                    output_basename,
-                                    1, 1,
-                                    1, 0,
-                                    -1,
-                                    False,
-                                    self.log_fn,
-                                    output_path=scene_output_path).resequence()
+                self.resynthesize_scene(scene_name, scenes_base_path, output_basename,
+                                        series_interpolater)
                 Mtqdm().update_bar(bar)
 
+    def resynthesize_scene(self, scene_name, scenes_base_path, output_basename,
+                           series_interpolater : InterpolateSeries):
+        scene_input_path = os.path.join(scenes_base_path, scene_name)
+        scene_output_path = os.path.join(self.state.resynthesis_path, scene_name)
+        create_directory(scene_output_path)
+
+        resynth_type = self.state.resynth_option if self.state.resynthesize else None
+        resynth_hint = self.state.get_hint(self.state.scene_labels.get(scene_name),
+                                           self.state.RESYNTHESIS_HINT)
+        if resynth_hint:
+            if "C" in resynth_hint:
+                resynth_type = "Clean"
+            elif "S" in resynth_hint:
+                resynth_type = "Scrub"
+            elif "R" in resynth_hint:
+                resynth_type = "Replace"
+            elif "N" in resynth_hint:
+                resynth_type = None
+
+        if resynth_type == "Replace":
+            self.one_pass_resynthesis(scene_input_path, scene_output_path,
+                                      output_basename, series_interpolater)
+        elif resynth_type == "Clean" or resynth_type == "Scrub":
+            one_pass_only = resynth_type == "Clean"
+            self.two_pass_resynthesis(scene_input_path, scene_output_path,
+                                      output_basename, series_interpolater,
+                                      one_pass_only=one_pass_only)
+        else:
+            # no need to resynthesize so just copy the files using the resequencer
+            ResequenceFiles(scene_input_path,
+                            self.scene_frame_type(scene_input_path),
+                            output_basename,
+                            1, 1,
+                            1, 0,
+                            -1,
+                            False,
+                            self.log_fn,
+                            output_path=scene_output_path).resequence()
+
 
     # Inflation Processing
 
     def inflate_scenes(self, kept_scenes):
-        interpolater = Interpolate(self.engine.model, self.log_fn)
-        use_time_step = self.engine_settings["use_time_step"]
-        deep_interpolater = DeepInterpolate(interpolater, use_time_step, self.log_fn)
-        series_interpolater = InterpolateSeries(deep_interpolater, self.log_fn)
+        series_interpolater = self.create_series_interpolater()
 
         scenes_base_path = self.scenes_source_path(self.state.INFLATE_STEP)
         create_directory(self.state.inflation_path)
 
         with Mtqdm().open_bar(total=len(kept_scenes), desc="Inflate") as bar:
             for scene_name in kept_scenes:
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(self.state.inflation_path, scene_name)
-                create_directory(scene_output_path)
+                self.inflate_scene(scene_name, scenes_base_path, series_interpolater)
+                Mtqdm().update_bar(bar)
 
-                num_splits = 0
-                disable_inflation = False
+    def inflate_scene(self, scene_name, scenes_base_path, series_interpolater : InterpolateSeries):
+        scene_input_path = os.path.join(scenes_base_path, scene_name)
+        scene_output_path = os.path.join(self.state.inflation_path, scene_name)
+        create_directory(scene_output_path)
 
+        num_splits = 0
+        disable_inflation = False
+
+        project_splits = 0
+        if self.state.inflate:
+            if self.state.inflate_by_option == "1X":
                 project_splits = 0
-                if self.state.inflate:
-                    if self.state.inflate_by_option == "1X":
-                        project_splits = 0
-                    if self.state.inflate_by_option == "2X":
-                        project_splits = 1
-                    elif self.state.inflate_by_option == "4X":
-                        project_splits = 2
-                    elif self.state.inflate_by_option == "8X":
-                        project_splits = 3
-                    elif self.state.inflate_by_option == "16X":
-                        project_splits = 4
-
-                # if it's for slow motion, the split should be relative to the
-                # project inflation rate
-
-                hinted_splits = 0
-                force_inflation, force_audio, force_inflate_by, force_silent =\
-                    self.compute_forced_inflation(scene_name)
-                if force_inflation:
-                    if force_inflate_by == "1X":
-                        disable_inflation = True
-                    elif force_inflate_by == "2X":
-                        hinted_splits = 1
-                    elif force_inflate_by == "4X":
-                        hinted_splits = 2
-                    elif force_inflate_by == "8X":
-                        hinted_splits = 3
-                    elif force_inflate_by == "16X":
-                        hinted_splits = 4
-
-                if hinted_splits:
-                    if force_audio or force_silent:
-                        # the figures for audio slow motion are relative to the project split rate
-                        # splits are really exponents of 2^n
-                        num_splits = project_splits + hinted_splits
-                    else:
-                        # if not for slow motion, force an exact split
-                        num_splits = hinted_splits
-                else:
-                    num_splits = 0 if disable_inflation else project_splits
-
-                if num_splits:
-                    # the scene needs inflating
-                    output_basename = "interpolated_frames"
-                    file_list = sorted(get_files(scene_input_path, extension=self.state.frame_format))
-                    series_interpolater.interpolate_series(file_list,
-                                                        scene_output_path,
-                                                        num_splits,
-                                                        output_basename,
-                                                        type=self.state.frame_format)
-                    ResequenceFiles(scene_output_path,
-                                    self.state.frame_format,
-                                    "inflated_frame",
-                                    1, 1,
-                                    1, 0,
-                                    -1,
-                                    True,
-                                    self.log_fn).resequence()
-                else:
-                    # no need to inflate so just copy the files using the resequencer
-                    ResequenceFiles(scene_input_path,
-                                    self.state.frame_format,
-                                    "inflated_frame",
-                                    1, 1,
-                                    1, 0,
-                                    -1,
-                                    False,
-                                    self.log_fn,
-                                    output_path=scene_output_path).resequence()
+            if self.state.inflate_by_option == "2X":
+                project_splits = 1
+            elif self.state.inflate_by_option == "4X":
+                project_splits = 2
+            elif self.state.inflate_by_option == "8X":
+                project_splits = 3
+            elif self.state.inflate_by_option == "16X":
+                project_splits = 4
 
-                Mtqdm().update_bar(bar)
+        # if it's for slow motion, the split should be relative to the
+        # project inflation rate
+
+        hinted_splits = 0
+        force_inflation, force_audio, force_inflate_by, force_silent =\
+            self.compute_forced_inflation(scene_name)
+        if force_inflation:
+            if force_inflate_by == "1X":
+                disable_inflation = True
+            elif force_inflate_by == "2X":
+                hinted_splits = 1
+            elif force_inflate_by == "4X":
+                hinted_splits = 2
+            elif force_inflate_by == "8X":
+                hinted_splits = 3
+            elif force_inflate_by == "16X":
+                hinted_splits = 4
+
+        if hinted_splits:
+            if force_audio or force_silent:
+                # the figures for audio slow motion are relative to the project split rate
+                # splits are really exponents of 2^n
+                num_splits = project_splits + hinted_splits
+            else:
+                # if not for slow motion, force an exact split
+                num_splits = hinted_splits
+        else:
+            num_splits = 0 if disable_inflation else project_splits
+
+        if num_splits:
+            # the scene needs inflating
+            output_basename = "interpolated_frames"
+            file_list = sorted(get_files(scene_input_path,
+                                         extension=self.scene_frame_type(scene_input_path)))
+            frame_type = self.intermediate_frame_type()
+            series_interpolater.interpolate_series(file_list,
+                                                scene_output_path,
+                                                num_splits,
+                                                output_basename,
+                                                type=frame_type)
+            ResequenceFiles(scene_output_path,
+                            frame_type,
+                            "inflated_frame",
+                            1, 1,
+                            1, 0,
+                            -1,
+                            True,
+                            self.log_fn).resequence()
+        else:
+            # no need to inflate so just copy the files using the resequencer
+            ResequenceFiles(scene_input_path,
+                            self.scene_frame_type(scene_input_path),
+                            "inflated_frame",
+                            1, 1,
+                            1, 0,
+                            -1,
+                            False,
+                            self.log_fn,
+                            output_path=scene_output_path).resequence()
 
     def inflate_factor_from_options(self) -> float:
         inflate_factor = 1.0
@@ -2461,50 +2685,20 @@ class VideoRemixerProcessor():
                       scene_input_path,
                       scene_output_path,
                       upscale_factor,
-                      downscale_type=DEFAULT_DOWNSCALE_TYPE):
+                      downscale_type=DEFAULT_DOWNSCALE_TYPE,
+                      frame_type=None):
+        frame_type = frame_type or self.state.frame_format
         self.log(f"creating scene output path {scene_output_path}")
         create_directory(scene_output_path)
 
-        working_path = os.path.join(scene_output_path, self.TEMP_UPSCALE_PATH)
-        create_directory(working_path)
-
-        # TODO make this logic general
-
-        # upscale first at the engine's native scale
+        # upscale at the engine's native scale, resizing each frame in memory to the final size
+        scale_type = ResizeFrames(None, None, None, None, downscale_type,
+                                  self.log_fn).get_scale_type(downscale_type)
         file_list = sorted(get_files(scene_input_path))
         output_basename = "upscaled_frames"
-        upscaler.upscale_series(file_list, working_path, self.FIXED_UPSCALE_FACTOR, output_basename,
-                                self.state.frame_format)
-
-        # get size of upscaled frames
-        upscaled_files = sorted(get_files(working_path))
-        width, height = image_size(upscaled_files[0])
-        self.log(f"size of upscaled images: {width} x {height}")
-
-        # compute downscale factor
-        downscale_factor = self.FIXED_UPSCALE_FACTOR / upscale_factor
-        self.log(f"downscale factor is {downscale_factor}")
-
-        downscaled_width = int(width / downscale_factor)
-        downscaled_height = int(height / downscale_factor)
-        self.log(f"size of downscaled images: {downscaled_width} x {downscaled_height}")
-
-        if downscaled_width != width or downscaled_height != height:
-            # downsample to final size
-            ResizeFrames(working_path,
-                        scene_output_path,
-                        downscaled_width,
-                        downscaled_height,
-                        downscale_type,
-                        self.log_fn).resize(type=self.state.frame_format)
-        else:
-            self.log("copying instead of unneeded downscaling")
-            copy_files(working_path, scene_output_path)
-
-        try:
-            shutil.rmtree(working_path)
-        except OSError as error:
-            self.log(f"ignoring error deleting working path: {error}")
+        self.log(f"upscaling by {upscale_factor} with {downscale_type} resizing")
+        upscaler.upscale_series(file_list, scene_output_path, upscale_factor, output_basename,
+                                frame_type, scale_type=scale_type)
 
     def upscale_scenes(self, kept_scenes):
         upscaler = self.get_upscaler()
@@ -2516,49 +2710,56 @@ class VideoRemixerProcessor():
 
         with Mtqdm().open_bar(total=len(kept_scenes), desc="Upscale") as bar:
             for scene_name in kept_scenes:
-                scene_input_path = os.path.join(scenes_base_path, scene_name)
-                scene_output_path = os.path.join(self.state.upscale_path, scene_name)
-                create_directory(scene_output_path)
+                self.process_upscale_scene(upscaler, scene_name, scenes_base_path,
+                                           upscale_factor, downscale_type)
+                Mtqdm().update_bar(bar)
 
-                upscale_handled = False
-                upscale_hint = self.state.get_hint(self.state.scene_labels.get(scene_name), self.state.UPSCALE_HINT)
+    def process_upscale_scene(self, upscaler, scene_name, scenes_base_path, upscale_factor,
+                              downscale_type):
+        scene_input_path = os.path.join(scenes_base_path, scene_name)
+        scene_output_path = os.path.join(self.state.upscale_path, scene_name)
+        create_directory(scene_output_path)
 
-                if upscale_hint and not self.state.upscale:
-                    # only apply the hint if not already upscaling, otherwise the
-                    # frames may have mismatched sizes
-                    try:
-                        # for now ignore the hint value and upscale just at 1X, to clean up zooming
-                        self.upscale_scene(upscaler,
-                                           scene_input_path,
-                                           scene_output_path,
-                                           1.0,
-                                           downscale_type=downscale_type)
-                        upscale_handled = True
-
-                    except Exception as error:
-                        self.log(
+        upscale_handled = False
+        upscale_hint = self.state.get_hint(self.state.scene_labels.get(scene_name), self.state.UPSCALE_HINT)
+
+        if upscale_hint and not self.state.upscale:
+            # only apply the hint if not already upscaling, otherwise the
+            # frames may have mismatched sizes
+            try:
+                # for now ignore the hint value and upscale just at 1X, to clean up zooming
+                self.upscale_scene(upscaler,
+                                   scene_input_path,
+                                   scene_output_path,
+                                   1.0,
+                                   downscale_type=downscale_type,
+                                   frame_type=self.intermediate_frame_type())
+                upscale_handled = True
+
+            except Exception as error:
+                self.log(
 f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping processing: {error}")
-                        upscale_handled = False
-
-                if not upscale_handled:
-                    if self.state.upscale:
-                        self.upscale_scene(upscaler,
-                                           scene_input_path,
-                                           scene_output_path,
-                                           upscale_factor,
-                                           downscale_type=downscale_type)
-                    else:
-                        # no need to upscale so just copy the files using the resequencer
-                        ResequenceFiles(scene_input_path,
-                                        self.state.frame_format,
-                                        "upscaled_frames",
-                                        1, 1,
-                                        1, 0,
-                                        -1,
-                                        False,
-                                        self.log_fn,
-                                        output_path=scene_output_path).resequence()
-                Mtqdm().update_bar(bar)
+                upscale_handled = False
+
+        if not upscale_handled:
+            if self.state.upscale:
+                self.upscale_scene(upscaler,
+                                   scene_input_path,
+                                   scene_output_path,
+                                   upscale_factor,
+                                   downscale_type=downscale_type,
+                                   frame_type=self.intermediate_frame_type())
+            else:
+                # no need to upscale so just copy the files using the resequencer
+                ResequenceFiles(scene_input_path,
+                                self.scene_frame_type(scene_input_path),
+                                "upscaled_frames",
+                                1, 1,
+                                1, 0,
+                                -1,
+                                False,
+                                self.log_fn,
+                                output_path=scene_output_path).resequence()
 
     def get_upscaler(self, size : int | None=None):
         """Get Real-ESRGAN upscaler. 'size' is pixels W x H and used for auto-tiling"""
@@ -2566,6 +2767,13 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
         gpu_ids = self.realesrgan_settings["gpu_ids"]
         fp32 = self.realesrgan_settings["fp32"]
 
+        # tiles are sized to fit the budget for each series' frame size when set
+        tile_budget = self.realesrgan_settings["tile_budget"]
+        if tile_budget:
+            return UpscaleSeries(model_name, gpu_ids, fp32, 0,
+                                 self.realesrgan_settings["tile_pad"], self.log_fn,
+                                 tile_budget=tile_budget)
+
         # determine if cropped image size is above memory threshold requiring tiling
         use_tiling_over = self.state.remixer_settings["use_tiling_over"]
 
@@ -2709,7 +2917,7 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
         # TODO this may be not needed
         edge_trim = 1 if self.state.resynthesize else 0
 
-        SliceVideo(self.state.source_audio,
+        slicer = SliceVideo(self.state.source_audio,
                     self.state.project_fps,
                     self.state.scenes_path,
                     self.state.audio_clips_path,
@@ -2722,7 +2930,14 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
                     0.0,
                     0.0,
                     self.log_fn,
-                    global_options=self.global_options).slice()
+                    global_options=self.global_options)
+        if self.state.sound_format == "wav":
+            # decode the source audio once and split it at the exact scene frame boundaries
+            sample_rate = int(self.state.video_details.get("sample_rate") or 48000)
+            channels = int(self.state.video_details.get("channels") or 2)
+            slicer.split_audio(sample_rate, channels)
+        else:
+            slicer.slice(max_jobs=self.state.remixer_settings["ffmpeg_jobs"])
         self.state.audio_clips = sorted(get_files(self.state.audio_clips_path))
 
     def compute_audio_options(self,
@@ -2794,33 +3009,24 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
         source_name = simple_sanitize_filename(source_name)
 
         scenes_base_path = self.furthest_processed_path()
-        with Mtqdm().open_bar(total=len(kept_scenes), desc="Video Clips") as bar:
+        with FFmpegJobPool(self.state.remixer_settings["ffmpeg_jobs"], self.log_fn) as pool:
             for scene_name in kept_scenes:
                 scene_input_path = os.path.join(scenes_base_path, scene_name)
                 scene_output_filepath = os.path.join(self.state.video_clips_path,
                                                      f"{source_name}_[{scene_name}].mp4")
 
                 video_clip_fps, fps_factor = self.compute_scene_fps(scene_name)
+                frame_type = self.scene_frame_type(scene_input_path)
 
-                ResequenceFiles(scene_input_path,
-                                self.state.frame_format,
-                                "processed_frame",
-                                1,
-                                1,
-                                1,
-                                0,
-                                -1,
-                                True,
-                                self.log_fn).resequence()
-
-                PNGtoMP4(scene_input_path,
-                                None,
-                                video_clip_fps,
-                                scene_output_filepath,
-                                crf=self.state.output_quality,
-                                global_options=self.global_options,
-                                type=self.state.frame_format)
-                Mtqdm().update_bar(bar)
+                pool.submit(scene_name,
+                            FramesToMP4,
+                            sorted(get_files(scene_input_path, frame_type)),
+                            video_clip_fps,
+                            scene_output_filepath,
+                            crf=self.state.output_quality,
+                            global_options=self.global_options,
+                            type=frame_type)
+            pool.wait(desc="Video Clips")
 
         self.state.video_clips = sorted(get_files(self.state.video_clips_path))
 
@@ -2890,7 +3096,7 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
             # FFmpeg requires forward slashes in font file path
             font_file = font_file.replace(r"\\", "/").replace("\\", "/")
 
-        with Mtqdm().open_bar(total=len(kept_scenes), desc="Video Clips") as bar:
+        with FFmpegJobPool(self.state.remixer_settings["ffmpeg_jobs"], self.log_fn) as pool:
             for index, scene_name in enumerate(kept_scenes):
                 scene_input_path = os.path.join(scenes_base_path, scene_name)
                 scene_output_filepath = os.path.join(self.state.video_clips_path,
@@ -2929,25 +3135,17 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
                             .replace("<LABEL>", f"[{error}]")
 
                 video_clip_fps, fps_factor = self.compute_scene_fps(scene_name)
+                frame_type = self.scene_frame_type(scene_input_path)
 
-                ResequenceFiles(scene_input_path,
-                                self.state.frame_format,
-                                "processed_frame",
-                                1,
-                                1,
-                                1,
-                                0,
-                                -1,
-                                True,
-                                self.log_fn).resequence()
-                PNGtoCustom(scene_input_path,
-                            None,
+                pool.submit(scene_name,
+                            FramesToCustom,
+                            sorted(get_files(scene_input_path, frame_type)),
                             video_clip_fps,
                             scene_output_filepath,
                             global_options=self.global_options,
                             custom_options=use_custom_video_options,
-                            type=self.state.frame_format)
-                Mtqdm().update_bar(bar)
+                            type=frame_type)
+            pool.wait(desc="Video Clips")
         self.state.video_clips = sorted(get_files(self.state.video_clips_path))
 
     def compute_inflated_fps(self, force_inflation, force_audio, force_inflate_by, force_silent):
@@ -3013,7 +3211,7 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
 
     def create_scene_clips(self, kept_scenes):
         if self.state.video_details["has_audio"]:
-            with Mtqdm().open_bar(total=len(kept_scenes), desc="Remix Clips") as bar:
+            with FFmpegJobPool(self.state.remixer_settings["ffmpeg_jobs"], self.log_fn) as pool:
                 for index, scene_name in enumerate(kept_scenes):
                     scene_video_path = self.state.video_clips[index]
                     scene_audio_path = self.state.audio_clips[index]
@@ -3033,12 +3231,14 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
                                                                 force_inflate_by,
                                                                 force_silent,
                                                                 volume=self.state.output_volume)
-                    combine_video_audio(scene_video_path,
-                                        scene_audio_path,
-                                        scene_output_filepath,
-                                        global_options=self.global_options,
-                                        output_options=output_options)
-                    Mtqdm().update_bar(bar)
+                    pool.submit(scene_name,
+                                combine_video_audio,
+                                scene_video_path,
+                                scene_audio_path,
+                                scene_output_filepath,
+                                global_options=self.global_options,
+                                output_options=output_options)
+                pool.wait(desc="Remix Clips")
             self.state.clips = sorted(get_files(self.state.clips_path))
         else:
             self.state.clips = sorted(get_files(self.state.video_clips_path))
@@ -3049,7 +3249,7 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
                                   custom_ext,
                                   volume):
         if self.state.video_details["has_audio"]:
-            with Mtqdm().open_bar(total=len(kept_scenes), desc="Remix Clips") as bar:
+            with FFmpegJobPool(self.state.remixer_settings["ffmpeg_jobs"], self.log_fn) as pool:
                 for index, scene_name in enumerate(kept_scenes):
                     scene_video_path = self.state.video_clips[index]
                     scene_audio_path = self.state.audio_clips[index]
@@ -3066,10 +3266,14 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
                                                                 force_silent=force_silent,
                                                                 volume=volume)
 
-                    combine_video_audio(scene_video_path, scene_audio_path,
-                                        scene_output_filepath, global_options=self.global_options,
-                                        output_options=output_options)
-                    Mtqdm().update_bar(bar)
+                    pool.submit(scene_name,
+                                combine_video_audio,
+                                scene_video_path,
+                                scene_audio_path,
+                                scene_output_filepath,
+                                global_options=self.global_options,
+                                output_options=output_options)
+                pool.wait(desc="Remix Clips")
             self.state.clips = sorted(get_files(self.state.clips_path))
         else:
             self.state.clips = sorted(get_files(self.state.video_clips_path))
@@ -3131,3 +3335,14 @@ f"Error in upscale_scenes() handling processing hint {upscale_hint} - skipping p
             assembly.append(map_scene_name_to_clip[scene_name])
 
         return assembly
+
+class SceneState():
+    """Processing state carried from one scene to the next"""
+    def __init__(self):
+        self.saved_view = VideoRemixerProcessor.DEFAULT_VIEW
+        self.saved_lens_hint = VideoRemixerProcessor.DEFAULT_LENS_HINT
+        self.noise_dampening = None
+        self.sticky_block_hints = []
+        self.block_animation_contexts = {}
+        self.processing_messages_context = {}
+        self.undistort_maps = OrderedDict()
@@ -0,0 +1,288 @@
+"""Classes and functions for measuring differences between frames to find duplicates"""
+import os
+import glob
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+import cv2
+import numpy as np
+from .mtqdm import Mtqdm
+from .video_utils import group_duplicate_frames
+
+# the measured difference between two frames is the largest sum of absolute differences (SAD)
+# of any 8x8 block, checked at 4 pixel intervals on each plane of the frames in YUV, the same
+# as FFmpeg's mpdecimate filter. With mpdecimate's 'hi' and 'lo' both set to the threshold
+# and 'frac' set to 1, a frame is a duplicate if no block differs by more than the threshold.
+
+def frame_planes(frame : np.ndarray) -> np.ndarray:
+    """Convert a BGR frame read with cv2.imread() to limited range BT.601 YUV 4:4:4
+       as used by FFmpeg when filtering RGB images. Returns an int16 H x W x 3 array"""
+    bgr = frame.astype(np.float32)
+    b, g, r = bgr[:, :, 0], bgr[:, :, 1], bgr[:, :, 2]
+    y = 16.0 + 0.256788 * r + 0.504129 * g + 0.097906 * b
+    u = 128.0 - 0.148223 * r - 0.290993 * g + 0.439216 * b
+    v = 128.0 + 0.439216 * r - 0.367788 * g - 0.071427 * b
+    return np.rint(np.dstack((y, u, v))).astype(np.int16)
+
+def block_differences(planes_a : np.ndarray, planes_b : np.ndarray) -> np.ndarray:
+    """Compute the SAD of each 8x8 block checked by mpdecimate, for each plane
+       Returns a blocks-high x blocks-wide x planes array"""
+    height, width = planes_a.shape[:2]
+    cells_h, cells_w = height // 4, width // 4
+    if cells_h < 2 or cells_w < 4:
+        return np.zeros((0, 0, planes_a.shape[2]), dtype=np.int32)
+
+    # sum the differences in 4x4 cells, then combine each 2x2 group of cells into an 8x8 block
+    diff = np.abs(planes_a[:cells_h * 4, :cells_w * 4] - planes_b[:cells_h * 4, :cells_w * 4])
+    cells = diff.reshape(cells_h, 4, cells_w, 4, -1).sum(axis=(1, 3), dtype=np.int32)
+    blocks = cells[:-1, :-1] + cells[1:, :-1] + cells[:-1, 1:] + cells[1:, 1:]
+
+    # mpdecimate skips the first 8 columns
+    return blocks[:, 2:]
+
+def frame_difference(planes_a : np.ndarray, planes_b : np.ndarray) -> int:
+    """Compute the largest 8x8 block SAD between two frames converted with frame_planes()"""
+    blocks = block_differences(planes_a, planes_b)
+    return int(blocks.max()) if blocks.size else 0
+
+def decimate_difference(planes_ref : np.ndarray, planes_frame : np.ndarray, hi : int, lo : int,
+                        frac : float):
+    """Decide if a frame is a duplicate of the reference frame the same as mpdecimate
+       A frame is not a duplicate if any 8x8 block differs by more than hi, or if the
+       number of blocks differing by more than lo exceeds frac of the frame on any plane
+       Returns True if the frame is a duplicate, the largest 8x8 block SAD
+    """
+    blocks = block_differences(planes_ref, planes_frame)
+    if not blocks.size:
+        return True, 0
+    score = int(blocks.max())
+    if score > hi:
+        return False, score
+    height, width = planes_ref.shape[:2]
+    limit = int((width // 16) * (height // 16) * frac)
+    over_lo = (blocks > lo).sum(axis=(0, 1))
+    return not bool((over_lo > limit).any()), score
+
+def read_frame_planes(filenames : list, threads : int=0):
+    """Read frame files with a pool of threads, yielding frame_planes() for each in order
+       threads: number of reader threads, 0 for one per CPU core up to 8
+    """
+    threads = threads or min(8, os.cpu_count() or 1)
+    read_ahead = threads * 2
+    def read(filename):
+        frame = cv2.imread(filename)
+        if frame is None:
+            raise ValueError(f"unable to read frame file {filename}")
+        return frame_planes(frame)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque()
+        for filename in filenames:
+            pending.append(executor.submit(read, filename))
+            if len(pending) >= read_ahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class NativeDecimate():
+    """Find duplicate frames in-process with the same semantics as FFmpeg's mpdecimate filter
+       Frames are read in parallel and compared over a sliding window holding only the last
+       kept frame and the current frame.
+    """
+    def __init__(self,
+                 input_path : str,
+                 hi : int,
+                 lo : int,
+                 frac : float=1.0,
+                 type : str="png",
+                 threads : int=0,
+                 log_fn : Callable | None=None):
+        if not os.path.exists(input_path):
+            raise ValueError(f"path does not exist: {input_path}")
+        if hi < 0 or lo < 0:
+            raise ValueError("'hi' and 'lo' must be positive")
+        self.input_path = input_path
+        self.hi = hi
+        self.lo = lo
+        self.frac = frac
+        self.type = type
+        self.threads = threads
+        self.log_fn = log_fn
+        self.filenames = sorted(glob.glob(os.path.join(input_path, f"*.{type}")))
+        # for each frame, the index of the kept frame it was compared with (None for the first)
+        # and the largest 8x8 block SAD found between them
+        self.references = []
+        self.scores = []
+
+    def find_duplicates(self, desc : str="Detecting") -> list:
+        """Compare the frames, recording the per-frame scores
+           Returns a list of True for each duplicate frame
+        """
+        self.references = []
+        self.scores = []
+        is_dupe_map = []
+        ref_index, ref_planes = None, None
+
+        with Mtqdm().open_bar(total=len(self.filenames), desc=desc) as bar:
+            for index, planes in enumerate(read_frame_planes(self.filenames, self.threads)):
+                if ref_planes is None:
+                    is_dupe, score = False, 0
+                else:
+                    if planes.shape != ref_planes.shape:
+                        raise ValueError(
+                            f"frame size mismatch at {self.filenames[index]}")
+                    is_dupe, score = decimate_difference(ref_planes, planes, self.hi,
+                                                         self.lo, self.frac)
+                self.references.append(ref_index)
+                self.scores.append(score)
+                is_dupe_map.append(is_dupe)
+                if not is_dupe:
+                    ref_index, ref_planes = index, planes
+                Mtqdm().update_bar(bar)
+
+        self.log(f"found {is_dupe_map.count(True)} duplicates in {len(is_dupe_map)} frames")
+        return is_dupe_map
+
+    def get_duplicate_frames(self, max_dupes_per_group : int):
+        """Get duplicate frame groups, same as video_utils.get_duplicate_frames()
+           Returns array of duplicate frame groups, array of frame filenames
+        """
+        if max_dupes_per_group < 0:
+            max_dupes_per_group = 0
+        is_dupe_map = self.find_duplicates()
+        return group_duplicate_frames(is_dupe_map, self.filenames, max_dupes_per_group),\
+            self.filenames
+
+    def log(self, message):
+        """Logging"""
+        if self.log_fn:
+            self.log_fn(message)
+
+class FrameDifferences():
+    """Encapsulates measuring and caching differences between a directory of frame files
+       Duplicate frames for any threshold are found from the measurements, with frames
+       decoded only when a needed difference hasn't been measured before.
+    """
+    CACHE_VERSION = 2
+    CACHE_PREFIX = "frame_differences"
+
+    def __init__(self,
+                 input_path : str,
+                 type : str="png",
+                 cache_path : str | None=None,
+                 log_fn : Callable | None=None):
+        if not os.path.exists(input_path):
+            raise ValueError(f"path does not exist: {input_path}")
+        self.input_path = input_path
+        self.type = type
+        self.cache_path = cache_path
+        self.log_fn = log_fn
+        self.filenames = sorted(glob.glob(os.path.join(input_path, f"*.{type}")))
+        self.differences = {}
+        self.cache_filepath = None
+        self.cache_dirty = False
+        if cache_path:
+            # one cache file is kept per input path, replaced when the frame files change
+            path_key = hashlib.sha256(os.path.abspath(input_path).encode("UTF-8")).hexdigest()[:32]
+            self.cache_filepath = os.path.join(cache_path, f"{self.CACHE_PREFIX}-{path_key}.json")
+            self.load_cache()
+
+    def contents_key(self) -> str:
+        """Compute a key identifying the current contents of the frame files directory"""
+        contents = [self.CACHE_VERSION]
+        for filename in self.filenames:
+            stat = os.stat(filename)
+            contents.append([os.path.basename(filename), stat.st_size, stat.st_mtime_ns])
+        return hashlib.sha256(json.dumps(contents).encode("UTF-8")).hexdigest()[:32]
+
+    def load_cache(self):
+        """Load previously measured differences if cached for the same directory contents"""
+        if os.path.exists(self.cache_filepath):
+            try:
+                with open(self.cache_filepath, encoding="UTF-8") as file:
+                    cached = json.load(file)
+                if cached["contents_key"] != self.contents_key():
+                    self.log(f"ignoring out of date frame differences cache {self.cache_filepath}")
+                    return
+                self.differences = {(ref, index) : difference
+                                    for ref, index, difference in cached["differences"]}
+                self.log(f"loaded {len(self.differences)} frame differences from {self.cache_filepath}")
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                self.log(f"ignoring unusable frame differences cache {self.cache_filepath}: {error}")
+                self.differences = {}
+
+    def save_cache(self):
+        """Save the measured differences if any are new"""
+        if self.cache_filepath and self.cache_dirty:
+            os.makedirs(self.cache_path, exist_ok=True)
+            cached = {
+                "input_path" : self.input_path,
+                "contents_key" : self.contents_key(),
+                "differences" : [[ref, index, difference]
+                                 for (ref, index), difference in self.differences.items()]}
+            with open(self.cache_filepath, "w", encoding="UTF-8") as file:
+                json.dump(cached, file)
+            self.cache_dirty = False
+            self.log(f"saved {len(self.differences)} frame differences to {self.cache_filepath}")
+
+    def difference(self, ref : int, index : int, decoded : dict) -> int:
+        """Get the difference between two frames by index, measuring it if needed
+           decoded is a dict of frame index to frame_planes() for reuse"""
+        key = (ref, index)
+        difference = self.differences.get(key)
+        if difference is None:
+            for frame_index in key:
+                if frame_index not in decoded:
+                    decoded[frame_index] = frame_planes(cv2.imread(self.filenames[frame_index]))
+            difference = frame_difference(decoded[ref], decoded[index])
+            self.differences[key] = difference
+            self.cache_dirty = True
+        return difference
+
+    def find_duplicates(self, thresholds : list, desc : str="Analyzing") -> dict:
+        """Find the duplicate frames for each threshold in a single pass over the frames
+           Returns a dict of threshold to list of True for each duplicate frame
+        """
+        # as with mpdecimate, each frame is compared with the last kept frame, which depends
+        # on the threshold, but thresholds with the same kept frame share the measurement
+        refs = {threshold : None for threshold in thresholds}
+        is_dupe_maps = {threshold : [False] * len(self.filenames) for threshold in thresholds}
+        decoded = {}
+
+        with Mtqdm().open_bar(total=len(self.filenames), desc=desc) as bar:
+            for index in range(len(self.filenames)):
+                active_refs = set(ref for ref in refs.values() if ref is not None)
+                for frame_index in list(decoded.keys()):
+                    if frame_index not in active_refs:
+                        del decoded[frame_index]
+
+                differences = {ref : self.difference(ref, index, decoded) for ref in active_refs}
+                for threshold in thresholds:
+                    ref = refs[threshold]
+                    if ref is not None and differences[ref] <= threshold:
+                        is_dupe_maps[threshold][index] = True
+                    else:
+                        refs[threshold] = index
+                Mtqdm().update_bar(bar)
+
+        self.save_cache()
+        return is_dupe_maps
+
+    def get_duplicate_frames(self, threshold : int, max_dupes_per_group : int):
+        """Get duplicate frame groups for a threshold, same as video_utils.get_duplicate_frames()
+           Returns array of duplicate frame groups, array of frame filenames
+        """
+        if threshold < 0:
+            raise ValueError("'threshold' must be positive")
+        if max_dupes_per_group < 0:
+            max_dupes_per_group = 0
+        is_dupe_map = self.find_duplicates([threshold])[threshold]
+        return group_duplicate_frames(is_dupe_map, self.filenames, max_dupes_per_group),\
+            self.filenames
+
+    def log(self, message):
+        """Logging"""
+        if self.log_fn:
+            self.log_fn(message)
@@ -0,0 +1,162 @@
+"""Functions and classes for computing scene and black frame signals from decoded frames"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from .file_utils import get_files
+from .image_utils import average_lightness
+from .mtqdm import Mtqdm
+
+def scene_mafd(frame : np.ndarray, previous : np.ndarray) -> float:
+    """Mean absolute frame difference as computed by FFmpeg's select filter, in percent"""
+    sad = cv2.norm(frame, previous, cv2.NORM_L1)
+    return sad * 100.0 / frame.size / 256.0
+
+def scene_score(mafd : float, previous_mafd : float) -> float:
+    """Scene change score between 0.0 and 1.0 as computed by FFmpeg's select filter"""
+    return min(max(min(mafd, abs(mafd - previous_mafd)) / 100.0, 0.0), 1.0)
+
+def black_ratio(frame : np.ndarray, pixel_threshold : float=0.10) -> float:
+    """Portion of the frame's pixels that are black as computed by FFmpeg's blackdetect filter
+       pixel_threshold: luminance between 0.0 and 1.0 of the video range at or below which a
+        pixel is considered black"""
+    # blackdetect compares limited range luma to 16 + threshold * (235 - 16)
+    # convert that to the full range luma that OpenCV computes
+    limited_threshold = int(16 + pixel_threshold * (235 - 16))
+    full_threshold = int((limited_threshold - 16) * 255 / 219)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.countNonZero(cv2.compare(gray, full_threshold, cv2.CMP_LE)) / gray.size
+
+class SceneDetector():
+    """Encapsulates detecting scene changes from a series of frame scene scores
+       Matches the results of get_detected_scenes() for the same frames
+    """
+    def __init__(self, threshold : float):
+        if threshold < 0.0 or threshold > 1.0:
+            raise ValueError("'threshold' must be between 0.0 and 1.0")
+        self.threshold = threshold
+
+    def add(self, score : float) -> bool:
+        """Returns True if the frame with the score starts a new scene"""
+        return score > self.threshold
+
+class BreakDetector():
+    """Encapsulates detecting breaks (runs of black frames) from a series of frame black ratios
+       Matches the results of get_detected_breaks() for the same frames
+    """
+    # get_detected_breaks() ignores shorter breaks
+    MIN_BREAK_FRAMES = 2
+
+    def __init__(self, duration : float, ratio : float):
+        """duration: minimum count of black frames for a detectable break
+           ratio: portion 0.0 to 1.0 of a frame that must be black for it to be black"""
+        if duration < 0.0:
+            raise ValueError("'duration' must be >= 0.0")
+        if ratio < 0.0 or ratio > 1.0:
+            raise ValueError("'ratio' must be between 0.0 and 1.0")
+        self.duration = duration
+        self.ratio = ratio
+        self.index = 0
+        self.black_start = None
+
+    def add(self, black_ratio : float) -> int | None:
+        """Returns the index of the frame at the middle of a break when the frame with the black
+           ratio ends one, None otherwise. A break still going at the last frame is not detected."""
+        index = self.index
+        self.index += 1
+        if black_ratio >= self.ratio:
+            if self.black_start is None:
+                self.black_start = index
+            return None
+
+        if self.black_start is not None:
+            start = self.black_start
+            self.black_start = None
+            if (index - start) >= max(self.duration, self.MIN_BREAK_FRAMES):
+                # break at the midpoint
+                return int((start + index) / 2)
+        return None
+
+class FrameSignalIndex():
+    """Encapsulates the scene change score, black ratio and average lightness of each frame
+       of a video, computed once so scenes, breaks and dark frames can be found for any
+       settings without decoding the frames again
+    """
+    def __init__(self):
+        self.scene_scores = []
+        self.black_ratios = []
+        self.lightness = []
+        self.previous = None
+        self.previous_mafd = 0.0
+
+    def __len__(self):
+        return len(self.scene_scores)
+
+    def add(self, frame : np.ndarray) -> tuple[float, float, float]:
+        """Add the signals for the next frame, a BGR array
+           Returns the frame's scene score, black ratio and average lightness"""
+        score = 0.0
+        if self.previous is not None and self.previous.shape == frame.shape:
+            mafd = scene_mafd(frame, self.previous)
+            score = scene_score(mafd, self.previous_mafd)
+            self.previous_mafd = mafd
+        self.previous = frame
+
+        ratio = black_ratio(frame)
+        lightness = average_lightness(frame[:, :, ::-1])
+        self.scene_scores.append(score)
+        self.black_ratios.append(ratio)
+        self.lightness.append(lightness)
+        return score, ratio, lightness
+
+    def scenes(self, threshold : float) -> list:
+        """Get the indexes of frames that start new scenes, like get_detected_scenes()"""
+        detector = SceneDetector(threshold)
+        return [index for index, score in enumerate(self.scene_scores) if detector.add(score)]
+
+    def breaks(self, duration : float, ratio : float) -> list:
+        """Get the indexes of frames at the middle of breaks, like get_detected_breaks()"""
+        detector = BreakDetector(duration, ratio)
+        breaks = [detector.add(black_ratio) for black_ratio in self.black_ratios]
+        return [index for index in breaks if index is not None]
+
+    def save(self, filepath : str) -> None:
+        """Save the index to a .npz file"""
+        np.savez(filepath,
+                 scene_scores=np.array(self.scene_scores, dtype=np.float64),
+                 black_ratios=np.array(self.black_ratios, dtype=np.float64),
+                 lightness=np.array(self.lightness, dtype=np.float64))
+
+    @classmethod
+    def load(cls, filepath : str) -> "FrameSignalIndex":
+        """Load an index saved with save()"""
+        if not os.path.exists(filepath):
+            raise ValueError(f"frame signal index does not exist: {filepath}")
+        index = cls()
+        with np.load(filepath) as data:
+            index.scene_scores = data["scene_scores"].tolist()
+            index.black_ratios = data["black_ratios"].tolist()
+            index.lightness = data["lightness"].tolist()
+        return index
+
+    @classmethod
+    def from_directory(cls, input_path : str, type : str="png",
+                       desc : str="Frame Signals") -> "FrameSignalIndex":
+        """Create an index for the frame files in a directory, in filename order"""
+        files = sorted(get_files(input_path, type))
+        index = cls()
+        workers = os.cpu_count() or 1
+        # read ahead on worker threads, keeping a bounded number of frames in memory
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            with Mtqdm().open_bar(total=len(files), desc=desc) as bar:
+                for file in files:
+                    pending.append(executor.submit(cv2.imread, file))
+                    if len(pending) > workers * 2:
+                        index.add(pending.popleft().result())
+                        Mtqdm().update_bar(bar)
+                while pending:
+                    index.add(pending.popleft().result())
+                    Mtqdm().update_bar(bar)
+        return index
@@ -0,0 +1,68 @@
+"""Classes for persisting computed file hashes between runs"""
+import os
+import sqlite3
+
+class HashIndex():
+    """Encapsulates an on-disk SQLite index of file hashes keyed by absolute path
+       An entry is only used while the file's size and modification time are unchanged
+    """
+    SCHEMA = """CREATE TABLE IF NOT EXISTS file_hashes (
+                    abspath TEXT PRIMARY KEY,
+                    bytes INTEGER NOT NULL,
+                    modified INTEGER NOT NULL,
+                    sample TEXT,
+                    hash TEXT)"""
+
+    def __init__(self, index_path : str):
+        if not index_path:
+            raise ValueError("'index_path' must be specified")
+        path = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(path, exist_ok=True)
+        self.index_path = index_path
+        self.connection = sqlite3.connect(index_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(self.SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def lookup(self, abspath : str, bytes : int, modified : int) -> tuple[str | None, str | None]:
+        """Get the stored sample hash and full hash for a file
+           Returns None, None if not indexed or if the file has changed since it was indexed
+        """
+        row = self.connection.execute(
+            "SELECT bytes, modified, sample, hash FROM file_hashes WHERE abspath = ?",
+            (abspath,)).fetchone()
+        if row is None:
+            return None, None
+        if row[0] != bytes or row[1] != modified:
+            self.connection.execute("DELETE FROM file_hashes WHERE abspath = ?", (abspath,))
+            return None, None
+        return row[2], row[3]
+
+    def store(self, entries : list) -> None:
+        """Store (abspath, bytes, modified, sample, hash) entries, replacing any existing"""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO file_hashes (abspath, bytes, modified, sample, hash)" +\
+            " VALUES (?, ?, ?, ?, ?)", entries)
+        self.connection.commit()
+
+    def remove_missing(self) -> int:
+        """Remove entries for files that no longer exist
+           Returns the count of removed entries"""
+        abspaths = [row[0] for row in self.connection.execute("SELECT abspath FROM file_hashes")]
+        missing = [(abspath,) for abspath in abspaths if not os.path.exists(abspath)]
+        self.connection.executemany("DELETE FROM file_hashes WHERE abspath = ?", missing)
+        self.connection.commit()
+        return len(missing)
+
+    def close(self) -> None:
+        """Commit pending changes and close the index"""
+        if self.connection:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
@@ -1,5 +1,7 @@
 """Functions for dealing with images"""
 import os
+import cv2
+import numpy as np
 from .file_utils import is_safe_path
 from PIL import Image
 
@@ -44,23 +46,56 @@ def gif_frame_count(filepath : str):
     if gif:
         return gif.n_frames
 
-def get_average_lightness(image_path : str, stride : int = 1) -> int:
+def average_lightness(pixels : np.ndarray, stride : int = 1) -> float:
+    """Average perceived brightness of an array of RGB or single channel pixels,
+       sampling every stride-th pixel in row order"""
+    # https://stackoverflow.com/questions/596216/formula-to-determine-perceived-brightness-of-rgb-color
+    if pixels.ndim == 3:
+        pixels = pixels.reshape(-1, pixels.shape[2])[::stride]
+        samples = np.floor(0.299 * pixels[:, 0] + 0.587 * pixels[:, 1] + 0.114 * pixels[:, 2])
+    else:
+        samples = pixels.reshape(-1)[::stride]
+    return float(samples.mean())
+
+def get_average_lightness(image_path : str, stride : int = 1) -> float:
     with Image.open(image_path) as img:
-        pixels = img.getdata()
-        total = 0
-        pixel_count = 0
-        pixels = list(pixels)
-        color = isinstance(pixels[0], tuple)
+        return average_lightness(np.asarray(img), stride)
 
-        for pixel in pixels[::stride]:
-            if color: # https://stackoverflow.com/questions/596216/formula-to-determine-perceived-brightness-of-rgb-color
-                sample = int(0.299 * pixel[0] + 0.587 * pixel[1] + 0.114 * pixel[2])
-            else:
-                sample = pixel
+def scaled_size(width : int, height : int, scale : float) -> tuple[int, int]:
+    """Size of an image scaled like FFmpeg's scale=iw*scale:-2 (even height, same aspect)"""
+    scaled_width = max(int(width * scale), 1)
+    scaled_height = int(round(scaled_width * height / (width * 2))) * 2
+    return scaled_width, max(scaled_height, 2)
 
-            # assume the sampled pixel is an average representative of the stride range
-            total += sample * stride
-            pixel_count += 1
+def write_frame(filepath : str, frame : np.ndarray):
+    """Write a frame with OpenCV, raising RuntimeError if it could not be written"""
+    if not cv2.imwrite(filepath, frame):
+        raise RuntimeError(f"unable to write frame file {filepath}")
+
+def create_scaled_jpg(image_path : str, filepath : str, scale : float, quality : int=95):
+    """Create a scaled JPG copy of an image"""
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        img.resize(scaled_size(img.width, img.height, scale), Image.BICUBIC).save(
+            filepath, quality=quality)
 
-        average = total / (pixel_count * stride)
-        return average
+def create_scaled_gif(images : list, filepath : str, scale : float, duration : float,
+                      end_delay : float=0.0):
+    """Create a scaled animated GIF from a list of image files
+       duration: seconds to show each frame
+       end_delay: seconds to show the last frame, if not zero"""
+    if not images:
+        raise ValueError("'images' must be a non-empty list")
+    frames = []
+    for image in images:
+        with Image.open(image) as img:
+            img = img.convert("RGB")
+            frames.append(img.resize(scaled_size(img.width, img.height, scale), Image.BICUBIC))
+    durations = [int(duration * 1000)] * len(frames)
+    if end_delay:
+        durations[-1] = int(end_delay * 1000)
+    if len(frames) == 1:
+        frames[0].save(filepath)
+    else:
+        frames[0].save(filepath, save_all=True, append_images=frames[1:],
+            optimize=False, duration=durations, loop=0)
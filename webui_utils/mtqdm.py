@@ -1,5 +1,6 @@
 """Multiple TQDM progress bar manager singleton class"""
 import random
+import threading
 from contextlib import contextmanager
 from tqdm import tqdm
 
@@ -167,6 +168,9 @@ class Mtqdm():
         self.bar_auto_total = [False for n in range(Mtqdm.MAX_BARS)]
         self.bar_updates = [0 for n in range(Mtqdm.MAX_BARS)]
 
+        # tracks threads whose bars are hidden
+        self.thread_local = threading.local()
+
     def reset(self):
         for index in range(Mtqdm.MAX_BARS - 1, -1, -1):
             if self.entered_bars[index]:
@@ -183,6 +187,9 @@ class Mtqdm():
 
     def enter_bar(self, total=100, desc="Calming...", leave=False, auto_total=False):
         """Open a new bar"""
+        if getattr(self.thread_local, "quiet", False):
+            # bars opened by worker threads would interleave with the nested bars
+            return tqdm(total=total, desc=desc, disable=True)
         if self.entered_count >= self.MAX_BARS:
             raise ValueError(f"The maximum number of bars {self.MAX_BARS} has been reached")
         position = self._enter_position()
@@ -229,6 +236,10 @@ class Mtqdm():
             self.bar_auto_total[position] = False
             self.bar_updates[position] = 0
 
+    def set_thread_quiet(self, quiet : bool):
+        """True to hide bars opened by the current thread, for use by worker threads"""
+        self.thread_local.quiet = quiet
+
     def set_use_color(self, use_color):
         """True to use colorful bars, False to use default bars,
         set at the singleton level for newly opened bars"""
@@ -244,6 +255,8 @@ class Mtqdm():
 
     def message(self, bar, message=""):
         position = self._find_bar_position(bar)
+        if position is None:
+            return
         self.bar_message[position] = position + 1
         if self.use_color:
             palette = self._get_palette(self.current_palette)
@@ -254,6 +267,8 @@ class Mtqdm():
     def update_bar(self, bar, steps=1):
         """Update a bar's progress"""
         position = self._find_bar_position(bar)
+        if position is None:
+            return
         current_progress = self.bar_updates[position]
         new_progress = current_progress + steps
         progress_diff = new_progress - current_progress
@@ -336,10 +351,11 @@ class Mtqdm():
 
     # bar display position is managed to be the same as the index into bar lists
     def _find_bar_position(self, bar):
-        try:
-            return self.entered_bars.index(bar)
-        except ValueError:
-            return None
+        # compare by identity, tqdm's equality fails against unentered (None) positions
+        for position, entered_bar in enumerate(self.entered_bars):
+            if entered_bar is bar:
+                return position
+        return None
 
     RGBSTART = "\x1b[38;2;"
     RGBEND = "m"
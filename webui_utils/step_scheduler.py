@@ -0,0 +1,90 @@
+"""Classes for running a series of processing steps on independent items concurrently"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+from .mtqdm import Mtqdm
+
+class StepScheduler():
+    """Encapsulates running a series of steps on each item of a list using pools of threads
+       Each item moves on to its next step as soon as its previous step finishes. Each step
+       runs on a named pool, for example a single worker to serialize GPU use. A step marked
+       'ordered' runs on an item only after it has finished on the previous item, for steps
+       that carry state from one item to the next (these should use a single-worker pool).
+    """
+    def __init__(self,
+                 pools : dict,
+                 initializer : Callable | None=None,
+                 log_fn : Callable | None=None):
+        """pools: dict of pool name to number of worker threads
+           initializer: called once in each new worker thread"""
+        if not pools:
+            raise ValueError("'pools' must be specified")
+        for name, workers in pools.items():
+            if workers < 1:
+                raise ValueError(f"pool '{name}' must have at least one worker")
+        self.pools = pools
+        self.initializer = initializer
+        self.log_fn = log_fn
+
+    def run(self, items : list, steps : list, desc : str="Processing") -> None:
+        """Run the steps on each item
+           steps: list of dicts with keys:
+            - name: step name for logging
+            - pool: name of the pool to run on
+            - fn: function taking an item
+            - ordered: True if items must pass through the step in order
+           Raises the first error from a step after waiting for running steps to finish
+        """
+        for step in steps:
+            if step["pool"] not in self.pools:
+                raise ValueError(f"step '{step['name']}' uses unknown pool '{step['pool']}'")
+        if not items or not steps:
+            return
+
+        executors = {name : ThreadPoolExecutor(max_workers=workers, initializer=self.initializer,
+                                               thread_name_prefix=f"step_scheduler_{name}")
+                     for name, workers in self.pools.items()}
+        futures = {}
+        # for ordered steps, the index of the next item allowed to run, and held items
+        next_ordered = [0] * len(steps)
+        held = [set() for _ in steps]
+
+        def submit(item_index, step_index):
+            step = steps[step_index]
+            if step.get("ordered") and next_ordered[step_index] != item_index:
+                held[step_index].add(item_index)
+                return
+            future = executors[step["pool"]].submit(step["fn"], items[item_index])
+            futures[future] = (item_index, step_index)
+
+        try:
+            with Mtqdm().open_bar(total=len(items) * len(steps), desc=desc) as bar:
+                for item_index in range(len(items)):
+                    submit(item_index, 0)
+
+                while futures:
+                    done, _ = wait(futures.keys(), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item_index, step_index = futures.pop(future)
+                        future.result()
+                        self.log(
+                            f"finished step '{steps[step_index]['name']}' for {items[item_index]}")
+                        Mtqdm().update_bar(bar)
+
+                        if steps[step_index].get("ordered"):
+                            next_ordered[step_index] = item_index + 1
+                            if item_index + 1 in held[step_index]:
+                                held[step_index].remove(item_index + 1)
+                                submit(item_index + 1, step_index)
+
+                        if step_index + 1 < len(steps):
+                            submit(item_index, step_index + 1)
+        finally:
+            for future in futures:
+                future.cancel()
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+
+    def log(self, message):
+        """Logging"""
+        if self.log_fn:
+            self.log_fn(message)
@@ -0,0 +1,76 @@
+import numpy as np
+import cv2
+from .frame_difference import *
+from .video_utils import group_duplicate_frames
+
+def test_frame_difference():
+    planes_a = np.zeros((32, 48, 3), dtype=np.int16)
+    planes_b = planes_a.copy()
+    assert frame_difference(planes_a, planes_b) == 0
+
+    # a single differing pixel is seen by up to four overlapping blocks
+    planes_b[12, 20, 0] = 10
+    assert frame_difference(planes_a, planes_b) == 10
+    assert (block_differences(planes_a, planes_b) == 10).sum() == 4
+
+    # mpdecimate doesn't check the first 8 columns
+    planes_c = planes_a.copy()
+    planes_c[12, 4, 0] = 10
+    assert frame_difference(planes_a, planes_c) == 0
+
+def test_frame_planes():
+    black = frame_planes(np.zeros((8, 8, 3), dtype=np.uint8))
+    white = frame_planes(np.full((8, 8, 3), 255, dtype=np.uint8))
+    assert tuple(black[0, 0]) == (16, 128, 128)
+    assert tuple(white[0, 0]) == (235, 128, 128)
+
+def test_group_duplicate_frames():
+    filenames = [f"{index}.png" for index in range(6)]
+    is_dupe_map = [False, True, True, False, False, True]
+    groups = group_duplicate_frames(is_dupe_map, filenames, 0)
+    assert groups == [{0 : "0.png", 1 : "1.png", 2 : "2.png"}, {4 : "4.png", 5 : "5.png"}]
+
+def test_decimate_difference():
+    planes_a = np.zeros((64, 64, 3), dtype=np.int16)
+    planes_b = planes_a.copy()
+    planes_b[32, 32, 0] = 20
+    assert decimate_difference(planes_a, planes_b, 20, 20, 1.0) == (True, 20)
+    assert decimate_difference(planes_a, planes_b, 19, 19, 1.0) == (False, 20)
+
+    # blocks over 'lo' only count against the 'frac' limit of (64/16)*(64/16)*frac
+    assert decimate_difference(planes_a, planes_b, 100, 10, 1.0) == (True, 20)
+    assert decimate_difference(planes_a, planes_b, 100, 10, 0.2) == (False, 20)
+
+def write_fixture_frames(path, values):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 200, (32, 48, 3), dtype=np.uint8)
+    for index, value in enumerate(values):
+        frame = base.copy()
+        frame[8:16, 16:24] += np.uint8(value)
+        cv2.imwrite(str(path / f"frame{index:02}.png"), frame)
+
+def test_frame_differences_native_decimate_parity(tmp_path):
+    write_fixture_frames(tmp_path, [0, 0, 1, 3, 3, 10, 12, 30, 30, 31, 50])
+    thresholds = [0, 50, 100, 200, 400, 800, 1600, 3200]
+    is_dupe_maps = FrameDifferences(str(tmp_path)).find_duplicates(thresholds)
+    for threshold in thresholds:
+        decimate = NativeDecimate(str(tmp_path), threshold, threshold, 1.0)
+        assert is_dupe_maps[threshold] == decimate.find_duplicates()
+
+def test_frame_differences_cache(tmp_path):
+    frames_path = tmp_path / "frames"
+    cache_path = tmp_path / "cache"
+    frames_path.mkdir()
+    write_fixture_frames(frames_path, [0, 0, 5, 20])
+    is_dupe_maps = FrameDifferences(str(frames_path), cache_path=str(cache_path))\
+        .find_duplicates([100])
+    cached = FrameDifferences(str(frames_path), cache_path=str(cache_path))
+    assert cached.differences
+    assert cached.find_duplicates([100]) == is_dupe_maps
+
+    # changed frame files replace the cache file for the input path rather than adding one
+    write_fixture_frames(frames_path, [0, 0, 5, 20, 40])
+    changed = FrameDifferences(str(frames_path), cache_path=str(cache_path))
+    assert not changed.differences
+    changed.find_duplicates([100])
+    assert len(list(cache_path.iterdir())) == 1
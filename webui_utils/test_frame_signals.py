@@ -0,0 +1,46 @@
+import os
+import cv2
+import numpy as np
+from .frame_signals import SceneDetector, BreakDetector, FrameSignalIndex, black_ratio
+
+def solid(value, height=8, width=8):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+def test_black_ratio():
+    assert black_ratio(solid(0)) == 1.0
+    assert black_ratio(solid(255)) == 0.0
+    frame = solid(255)
+    frame[:4] = 0
+    assert black_ratio(frame) == 0.5
+
+def test_scene_detector():
+    detector = SceneDetector(0.6)
+    assert [detector.add(score) for score in [0.0, 0.5, 0.6, 0.7]] == [False, False, False, True]
+
+def test_break_detector():
+    ratios = [0.0, 1.0, 1.0, 1.0, 1.0, 0.0, 1.0, 0.0, 1.0, 1.0, 1.0]
+    detector = BreakDetector(2.0, 0.98)
+    assert [detector.add(ratio) for ratio in ratios] == \
+        [None, None, None, None, None, 3, None, None, None, None, None]
+
+def test_frame_signal_index(tmp_path):
+    values = [0, 0, 255, 255, 250, 0, 0, 0, 255]
+    index = FrameSignalIndex()
+    for value in values:
+        index.add(solid(value))
+    assert len(index) == len(values)
+    assert index.scenes(0.6) == [2, 5, 8]
+    assert index.breaks(2.0, 0.98) == [1, 6]
+    assert index.lightness[:3] == [0.0, 0.0, 255.0]
+
+    filepath = os.path.join(tmp_path, "signals.npz")
+    index.save(filepath)
+    loaded = FrameSignalIndex.load(filepath)
+    assert loaded.scene_scores == index.scene_scores
+    assert loaded.breaks(2.0, 0.98) == [1, 6]
+
+    frames_path = os.path.join(tmp_path, "frames")
+    os.makedirs(frames_path)
+    for frame_index, value in enumerate(values):
+        cv2.imwrite(os.path.join(frames_path, f"frame{frame_index}.png"), solid(value))
+    assert FrameSignalIndex.from_directory(frames_path).scene_scores == index.scene_scores
@@ -0,0 +1,23 @@
+import os
+from .hash_index import HashIndex
+
+def test_hash_index(tmp_path):
+    index_path = os.path.join(tmp_path, "index", "hashes.sqlite3")
+    file_path = os.path.join(tmp_path, "file.txt")
+    with open(file_path, "w", encoding="UTF-8") as file:
+        file.write("text")
+
+    with HashIndex(index_path) as index:
+        assert index.lookup(file_path, 4, 100) == (None, None)
+        index.store([(file_path, 4, 100, "sample", "hash")])
+
+    with HashIndex(index_path) as index:
+        assert index.lookup(file_path, 4, 100) == ("sample", "hash")
+        # a changed file invalidates the entry
+        assert index.lookup(file_path, 4, 200) == (None, None)
+        assert index.lookup(file_path, 4, 100) == (None, None)
+
+        index.store([(file_path, 4, 100, "sample", None),
+                     (os.path.join(tmp_path, "missing.txt"), 1, 1, "sample", "hash")])
+        assert index.lookup(file_path, 4, 100) == ("sample", None)
+        assert index.remove_missing() == 1
@@ -62,3 +62,17 @@ def test_create_gif():
     for bad_args, match_text in BAD_CREATE_GIF_ARGS:
         with pytest.raises(ValueError, match=match_text):
             create_gif(*bad_args)
+
+def test_scaled_size():
+    assert scaled_size(1920, 1080, 0.5) == (960, 540)
+    assert scaled_size(161, 90, 0.5) == (80, 44)
+    assert scaled_size(720, 481, 0.25) == (180, 120)
+    assert scaled_size(100, 1, 0.5) == (50, 2)
+
+def test_write_frame(tmp_path):
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    filepath = os.path.join(tmp_path, "frame.png")
+    write_frame(filepath, frame)
+    assert os.path.exists(filepath)
+    with pytest.raises(RuntimeError, match="unable to write frame file"):
+        write_frame(os.path.join(tmp_path, "doesnotexist", "frame.png"), frame)
@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest # pylint: disable=import-error
+from .step_scheduler import StepScheduler
+
+def test_step_scheduler():
+    lock = threading.Lock()
+    events = []
+    running = {"gpu" : 0}
+    max_running = {"gpu" : 0}
+
+    def record(step):
+        def fn(item):
+            with lock:
+                events.append((step, item))
+        return fn
+
+    def gpu(item):
+        with lock:
+            running["gpu"] += 1
+            max_running["gpu"] = max(max_running["gpu"], running["gpu"])
+        time.sleep(0.01)
+        with lock:
+            running["gpu"] -= 1
+            events.append(("gpu", item))
+
+    def unordered(item):
+        # later items finish first
+        time.sleep(0.01 * (5 - item))
+        record("unordered")(item)
+
+    items = list(range(5))
+    steps = [
+        {"name" : "first", "pool" : "cpu", "fn" : unordered},
+        {"name" : "second", "pool" : "gpu", "fn" : gpu},
+        {"name" : "third", "pool" : "ordered", "fn" : record("ordered"), "ordered" : True}]
+    StepScheduler({"cpu" : 4, "gpu" : 1, "ordered" : 1}).run(items, steps)
+
+    assert max_running["gpu"] == 1
+    assert [item for step, item in events if step == "ordered"] == items
+    for item in items:
+        # each item passes through its steps in order
+        item_steps = [step for step, event_item in events if event_item == item]
+        assert item_steps == ["unordered", "gpu", "ordered"]
+
+def test_step_scheduler_error():
+    def fail(item):
+        if item == 2:
+            raise RuntimeError("step failed")
+
+    steps = [{"name" : "fail", "pool" : "cpu", "fn" : fail}]
+    with pytest.raises(RuntimeError, match="step failed"):
+        StepScheduler({"cpu" : 2}).run(list(range(5)), steps)
+
+    with pytest.raises(ValueError, match="unknown pool"):
+        StepScheduler({"cpu" : 2}).run([1], [{"name" : "x", "pool" : "gpu", "fn" : fail}])
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest # pylint: disable=import-error
+torch = pytest.importorskip("torch")
+pytest.importorskip("realesrgan")
+from realesrgan import RealESRGANer # pylint: disable=import-error
+from upscale_series import UpscaleSeries
+
+class OutOfMemoryModel(torch.nn.Module):
+    """Upscales by 2 with nearest neighbor, running out of memory on inputs over max_size"""
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+
+    def forward(self, x):
+        if max(x.shape[2:]) > self.max_size:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+        return torch.nn.functional.interpolate(x, scale_factor=2, mode="nearest")
+
+def test_enhance_retries_tile_out_of_memory(tmp_path, monkeypatch):
+    model_path = str(tmp_path / "model.pth")
+    torch.save({"params" : {}}, model_path)
+
+    def load_upscaler(model_name, gpu_ids, fp32, tiling, tile_pad):
+        return RealESRGANer(scale=2, model_path=model_path, model=OutOfMemoryModel(52),
+                            tile=tiling, tile_pad=tile_pad, pre_pad=0, half=False)
+    monkeypatch.setattr(UpscaleSeries, "load_upscaler", staticmethod(load_upscaler))
+    UpscaleSeries.clear_cache()
+    try:
+        # 64 pixel tiles run out of memory inside Real-ESRGAN's tile loop
+        upscaler = UpscaleSeries("test_model", None, True, 64, 10, None)
+        img = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        output = upscaler.enhance(img, None)
+        assert upscaler.tile_size == 32
+        assert np.array_equal(output, img.repeat(2, axis=0).repeat(2, axis=1))
+    finally:
+        UpscaleSeries.clear_cache()
@@ -22,3 +22,68 @@ def test_decode_aspect():
     for bad_arg, match_text in BAD_DECODE_ASPECT_ARGS:
         with pytest.raises(ValueError, match=match_text):
             decode_aspect(bad_arg)
+
+def test_ffmpeg_job_pool():
+    def job(value):
+        if value == 3:
+            raise FFRuntimeError("ffmpeg", 1, b"", b"")
+        return f"ffmpeg {value}"
+
+    messages = []
+    with FFmpegJobPool(2, messages.append) as pool:
+        for value in range(5):
+            pool.submit(str(value), job, value)
+        errors = pool.wait(stop_on_error=False)
+    assert [list(error.keys()) for error in errors] == [["3"]]
+    assert "FFmpeg job '0' command line: ffmpeg 0" in messages
+
+    with FFmpegJobPool(1) as pool:
+        pool.submit("3", job, 3)
+        with pytest.raises(RuntimeError, match="FFmpeg job '3' failed"):
+            pool.wait()
+        with pytest.raises(RuntimeError, match="cancelled"):
+            pool.submit("4", job, 4)
+
+def test_ffmpeg_args():
+    inputs = {"-" : "-f image2pipe -c:v png -framerate 30"}
+    outputs = {"out put.mp4" : "-r 30 -pix_fmt yuv420p -c:v libx264 -crf 28"}
+    global_options = "-y -hide_banner -loglevel error"
+    args = ffmpeg_args(inputs, outputs, global_options)
+    assert args[:2] == ["ffmpeg", "-y"]
+    assert args[-1] == "out put.mp4"
+    assert subprocess.list2cmdline(args) == \
+        FFmpeg(inputs=inputs, outputs=outputs, global_options=global_options).cmd
+
+def test_write_wav_segments(tmp_path):
+    import io
+    import wave
+    # 10 samples of 2-channel s16le audio, sample n holds the value n in both channels
+    samples = np.repeat(np.arange(10, dtype=np.int16), 2)
+    stream = io.BytesIO(samples.tobytes())
+    segments = [(os.path.join(tmp_path, "b.wav"), 0.4, 1.2),
+                (os.path.join(tmp_path, "a.wav"), 0.0, 0.4),
+                (os.path.join(tmp_path, "c.wav"), 1.2, 1.5)]
+    write_wav_segments(stream, segments, 10, chunk_seconds=0.3)
+
+    def read_wav(filename):
+        with wave.open(os.path.join(tmp_path, filename), "rb") as wav:
+            assert wav.getnchannels() == 2 and wav.getframerate() == 10
+            return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)[::2].tolist()
+    assert read_wav("a.wav") == [0, 1, 2, 3]
+    assert read_wav("b.wav") == [4, 5, 6, 7, 8, 9]
+    assert read_wav("c.wav") == []
+
+def test_write_wav_segments_mono(tmp_path):
+    import io
+    import wave
+    samples = np.arange(10, dtype=np.int16)
+    stream = io.BytesIO(samples.tobytes())
+    segments = [(os.path.join(tmp_path, "a.wav"), 0.0, 0.5),
+                (os.path.join(tmp_path, "b.wav"), 0.5, 1.0)]
+    write_wav_segments(stream, segments, 10, channels=1)
+
+    for filename, expected in [("a.wav", [0, 1, 2, 3, 4]), ("b.wav", [5, 6, 7, 8, 9])]:
+        with wave.open(os.path.join(tmp_path, filename), "rb") as wav:
+            assert wav.getnchannels() == 1
+            assert np.frombuffer(wav.readframes(wav.getnframes()),
+                                 dtype=np.int16).tolist() == expected
@@ -1,15 +1,23 @@
 """Functions for dealing with video using FFmpeg"""
 import os
 import glob
+import shlex
 import subprocess
+import tempfile
 import json
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed, CancelledError
 from fractions import Fraction
+from typing import Callable
+import numpy as np
 from PIL import Image
 from ffmpy import FFmpeg, FFprobe, FFRuntimeError
 from .image_utils import gif_frame_count
 from .file_utils import split_filepath, get_directories, is_safe_path, directory_has_ext
 from .simple_utils import seconds_to_hms, get_frac_str_as_float
 from .jot import Jot
+from .mtqdm import Mtqdm
 
 QUALITY_NEAR_LOSSLESS = 17
 QUALITY_SMALLER_SIZE = 28
@@ -62,6 +70,70 @@ def PNGtoMP4(input_path : str, # pylint: disable=invalid-name
     ffcmd.run()
     return cmd
 
+# FFmpeg image2pipe decoders for frame file types
+PIPE_CODECS = {"png" : "png", "jpg" : "mjpeg", "jpeg" : "mjpeg", "bmp" : "bmp", "gif" : "gif"}
+
+def ffmpeg_args(inputs : dict, outputs : dict, global_options : str="") -> list:
+    """Build the argument list for an FFmpeg command the same way as ffmpy's FFmpeg, for
+       running FFmpeg with pipes, which FFmpeg.run() doesn't support"""
+    args = ["ffmpeg"] + shlex.split(global_options)
+    for path, options in inputs.items():
+        args += shlex.split(options or "") + ["-i", path]
+    for path, options in outputs.items():
+        args += shlex.split(options or "") + [path]
+    return args
+
+def pipe_files(args : list, files : list):
+    """Run an FFmpeg command from ffmpeg_args(), feeding it the contents of a list of files in
+       order over stdin"""
+    process = subprocess.Popen(args, stdin=subprocess.PIPE)
+    try:
+        for file in files:
+            with open(file, "rb") as input_file:
+                process.stdin.write(input_file.read())
+    except BrokenPipeError:
+        # FFmpeg has exited early, its return code reports the error
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+    if process.wait() != 0:
+        raise FFRuntimeError(subprocess.list2cmdline(args), process.returncode, None, None)
+
+def FramesToMP4(files : list, # pylint: disable=invalid-name
+                frame_rate : float,
+                output_filepath : str,
+                crf : int=QUALITY_DEFAULT,
+                global_options : str="",
+                type : str="png"):
+    """Encode frame files to MP4 in list order, piping them to FFmpeg
+       The same as PNGtoMP4 but with no need for a sequential filename pattern"""
+    args = ffmpeg_args(
+        inputs= {"-" : f"-f image2pipe -c:v {PIPE_CODECS[type]} -framerate {frame_rate}"},
+        outputs={output_filepath : f"-r {frame_rate} -pix_fmt yuv420p -c:v libx264 -crf {crf}"},
+        global_options="-y " + global_options)
+    cmd = subprocess.list2cmdline(args)
+    pipe_files(args, files)
+    return cmd
+
+def FramesToCustom(files : list, # pylint: disable=invalid-name
+                   frame_rate : float,
+                   output_filepath : str,
+                   global_options : str="",
+                   custom_options : str="",
+                   type : str="png"):
+    """Encode frame files in list order with custom options, piping them to FFmpeg
+       The same as PNGtoCustom but with no need for a sequential filename pattern"""
+    args = ffmpeg_args(
+        inputs= {"-" : f"-f image2pipe -c:v {PIPE_CODECS[type]} -framerate {frame_rate}"},
+        outputs={output_filepath : f"-r {frame_rate} -pix_fmt yuv420p {custom_options}"},
+        global_options="-y " + global_options)
+    cmd = subprocess.list2cmdline(args)
+    pipe_files(args, files)
+    return cmd
+
 def PNGtoCustom(input_path : str, # pylint: disable=invalid-name
                 filename_pattern : str,
                 frame_rate : float,
@@ -105,6 +177,43 @@ def MP4toPNG(input_path : str,  # pylint: disable=invalid-name
     ffcmd.run()
     return cmd
 
+def MP4toFrames(input_path : str,  # pylint: disable=invalid-name
+                frame_rate : float,
+                width : int,
+                height : int,
+                deinterlace : bool = False,
+                global_options : str = ""):
+    """Decode a video through an FFmpeg rawvideo pipe, yielding the same frames as MP4toPNG
+       one at a time as BGR arrays, without writing any files"""
+    if deinterlace:
+        filter = f"bwdif=mode=send_field:parity=auto:deint=all,fps={frame_rate}"
+    else:
+        filter = f"fps={frame_rate}"
+
+    args = ffmpeg_args(inputs= {input_path : None},
+        outputs={"-" : f"-filter:v {filter} -f rawvideo -pix_fmt bgr24"},
+        global_options="-y -loglevel error " + global_options)
+    frame_bytes = width * height * 3
+    # stderr goes to a file so FFmpeg can't block on a full pipe while frames are being read
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=stderr)
+        try:
+            while True:
+                buffer = process.stdout.read(frame_bytes)
+                if len(buffer) < frame_bytes:
+                    break
+                yield np.frombuffer(buffer, dtype=np.uint8).reshape((height, width, 3))
+            process.stdout.close()
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise FFRuntimeError(subprocess.list2cmdline(args), process.returncode, None,
+                                     stderr.read())
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
 # making a high quality GIF from images requires first creating a color palette,
 # then supplying it to the conversion command
 # https://stackoverflow.com/questions/58832085/colors-messed-up-distorted-when-making-a-gif-from-png-files-using-ffmpeg
@@ -389,6 +498,17 @@ def get_duplicate_frames(input_path : str, threshold : int, max_dupes_per_group
         raise ValueError(
     f"frame count mismatch FFmpeg ({len(keep_drop_lines)}) vs found files ({len(filenames)})")
 
+    groups = group_duplicate_frames(is_dupe_map, filenames, max_dupes_per_group)
+    return groups, filenames, decimate_lines
+
+def group_duplicate_frames(is_dupe_map : list, filenames : list, max_dupes_per_group : int):
+    """Gather duplicate frames into groups
+        - is_dupe_map: True for each frame found to be a duplicate (mpdecimate "drop")
+        - filenames: the frame filenames
+        - max_dupes_per_group: raises RuntimeError if more frames are added to a group
+          set to 0 to disable
+       Returns array of duplicate frame groups: dicts with frame index keys and filename values
+    """
     groups = []
     group = {}
     is_in_group = False
@@ -414,7 +534,7 @@ f"max_dupes_per_group exceeded: {len(group)+1} in group #{len(groups)+1}, duplic
                 is_in_group = False
     if is_in_group:
         groups.append(group)
-    return groups, filenames, decimate_lines
+    return groups
 
 def compute_report_stats(duplicate_frame_groups, filenames):
     group_count = len(duplicate_frame_groups)
@@ -460,11 +580,18 @@ def get_duplicate_frames_report(input_path : str,
                                 max_dupes_per_group : int,
                                 type : str="png") -> str:
     """Create a human-readable report of duplicate frame groups"""
-    separator = ""
     duplicate_frame_groups, filenames, _ = get_duplicate_frames(input_path,
                                                                 threshold,
                                                                 max_dupes_per_group,
                                                                 type)
+    return format_duplicate_frames_report(input_path, threshold, duplicate_frame_groups, filenames)
+
+def format_duplicate_frames_report(input_path : str,
+                                   threshold : int,
+                                   duplicate_frame_groups : list,
+                                   filenames : list) -> str:
+    """Create a human-readable report of already found duplicate frame groups"""
+    separator = ""
     stats = compute_report_stats(duplicate_frame_groups, filenames)
     report = []
     report.append("[Duplicate Frames Report]")
@@ -622,6 +749,16 @@ def group_files(input_path, file_ext, group_name):
     _group_path = group_path(input_path, group_name)
     return sorted(glob.glob(os.path.join(_group_path, f"*.{file_ext}")))
 
+def sliced_filename(input_path : str,
+                    num_width : int,
+                    first_frame : int,
+                    last_frame : int,
+                    type : str) -> str:
+    """Get the default filename for a slice of a video"""
+    _, default_filename, _ = split_filepath(input_path)
+    return \
+f"{default_filename}[{str(first_frame).zfill(num_width)}-{str(last_frame).zfill(num_width)}].{type}"
+
 def slice_video(input_path : str,
                 fps : float,
                 output_path : str,
@@ -644,9 +781,7 @@ def slice_video(input_path : str,
     if output_filename:
         filename = f"{output_filename}.{type}"
     else:
-        _, default_filename, _ = split_filepath(input_path)
-        filename =\
-f"{default_filename}[{str(first_frame).zfill(num_width)}-{str(last_frame).zfill(num_width)}].{type}"
+        filename = sliced_filename(input_path, num_width, first_frame, last_frame, type)
     output_filepath = os.path.join(output_path, filename)
 
     start_second = first_frame / fps
@@ -720,6 +855,92 @@ f"{default_filename}[{str(first_frame).zfill(num_width)}-{str(last_frame).zfill(
     ffcmd.run()
     return cmd
 
+def write_wav_segments(stream,
+                       segments : list,
+                       sample_rate : int,
+                       channels : int=2,
+                       chunk_seconds : float=1.0):
+    """Write 16-bit WAV files for (output_filepath, start_second, end_second) segments of raw
+       s16le audio read from a binary stream, in a single pass over the stream
+       Segment boundaries are rounded to the nearest sample. Segments past the end of the
+       stream are written as empty WAV files."""
+    sample_bytes = channels * 2
+    chunk_samples = max(1, int(sample_rate * chunk_seconds))
+    ranges = sorted([(int(round(start_second * sample_rate)),
+                      int(round(end_second * sample_rate)),
+                      output_filepath) for output_filepath, start_second, end_second in segments])
+
+    def open_wav(output_filepath):
+        wav = wave.open(output_filepath, "wb")
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        return wav
+
+    next_range = 0
+    # [start sample, end sample, open wave file] for segments being written
+    open_segments = []
+    position = 0
+    try:
+        while True:
+            buffer = stream.read(chunk_samples * sample_bytes)
+            count = len(buffer) // sample_bytes
+            if count == 0:
+                break
+            chunk_end = position + count
+            while next_range < len(ranges) and ranges[next_range][0] < chunk_end:
+                start, end, output_filepath = ranges[next_range]
+                open_segments.append([start, end, open_wav(output_filepath)])
+                next_range += 1
+
+            still_open = []
+            for segment in open_segments:
+                start, end, wav = segment
+                first = max(start, position) - position
+                last = min(end, chunk_end) - position
+                if last > first:
+                    wav.writeframes(buffer[first * sample_bytes : last * sample_bytes])
+                if end <= chunk_end:
+                    wav.close()
+                else:
+                    still_open.append(segment)
+            open_segments = still_open
+            position = chunk_end
+
+        for _, _, output_filepath in ranges[next_range:]:
+            open_wav(output_filepath).close()
+    finally:
+        for _, _, wav in open_segments:
+            wav.close()
+
+def split_audio(input_path : str,
+                segments : list,
+                sample_rate : int,
+                channels : int=2,
+                global_options : str=""):
+    """Decode the audio of a media file once through an FFmpeg PCM pipe and write a WAV file
+       for each (output_filepath, start_second, end_second) segment, sample-accurately
+       Returns the FFmpeg command line"""
+    args = ffmpeg_args(inputs= {input_path : None},
+        outputs={"-" : f"-vn -ac {channels} -ar {sample_rate} -f s16le -acodec pcm_s16le"},
+        global_options="-y -loglevel error " + global_options)
+    cmd = subprocess.list2cmdline(args)
+    # stderr goes to a file so FFmpeg can't block on a full pipe while audio is being read
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=stderr)
+        try:
+            write_wav_segments(process.stdout, segments, sample_rate, channels)
+            process.stdout.close()
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise FFRuntimeError(cmd, process.returncode, None, stderr.read())
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+    return cmd
+
 def slice_video_frames(input_path : str,
                 fps : float,
                 output_path : str,
@@ -916,3 +1137,79 @@ def split_color_alpha(color_alpha : str, default_color="#000000", default_alpha=
 def join_color_alpha(color : str, alpha : str="1.0"):
     """Join a color value and alpha like `#FFFFFF` and `0.9` into an FFmpeg color string like `#FFFFFF@0.9`"""
     return f"{color}@{alpha}"
+
+class FFmpegJobPool():
+    """Encapsulates running FFmpeg jobs concurrently, with at most max_jobs running at once
+       A job is a function that runs FFmpeg and returns its command line, like PNGtoMP4()
+       or combine_video_audio(). Jobs should write to different output files.
+    """
+    def __init__(self, max_jobs : int=0, log_fn : Callable | None=None):
+        """max_jobs: maximum concurrent jobs, 0 to use the CPU count"""
+        if max_jobs < 0:
+            raise ValueError("'max_jobs' must be >= 0")
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.log_fn = log_fn
+        self.executor = ThreadPoolExecutor(max_workers=self.max_jobs,
+                                           thread_name_prefix="ffmpeg_job")
+        self.jobs = {}
+        self.cancelled = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type:
+            self.cancel()
+        self.executor.shutdown(wait=True)
+
+    def submit(self, name : str, job : Callable, *args, **kwargs) -> None:
+        """Queue a job to run as soon as a slot is free"""
+        if self.cancelled.is_set():
+            raise RuntimeError("the FFmpeg job pool has been cancelled")
+        future = self.executor.submit(self._run, name, job, *args, **kwargs)
+        self.jobs[future] = name
+
+    def _run(self, name, job, *args, **kwargs):
+        if self.cancelled.is_set():
+            raise CancelledError()
+        result = job(*args, **kwargs)
+        # some jobs return a tuple of command line and FFmpeg output
+        cmd = result[0] if isinstance(result, tuple) else result
+        self.log(f"FFmpeg job '{name}' command line: {cmd}")
+        return result
+
+    def wait(self, desc : str="FFmpeg Jobs", stop_on_error : bool=True) -> list:
+        """Wait for the submitted jobs to finish
+           Returns a list of dicts of job name to error message for failed jobs
+           stop_on_error: cancel waiting jobs after the first error, and raise a RuntimeError
+            with all the errors once running jobs finish"""
+        errors = []
+        with Mtqdm().open_bar(total=len(self.jobs), desc=desc) as bar:
+            for future in as_completed(list(self.jobs.keys())):
+                name = self.jobs[future]
+                try:
+                    future.result()
+                except CancelledError:
+                    pass
+                except (FFRuntimeError, RuntimeError, ValueError, OSError) as error:
+                    message = f"FFmpeg job '{name}' failed: {error}"
+                    self.log(message)
+                    errors.append({name : message})
+                    if stop_on_error:
+                        self.cancel()
+                Mtqdm().update_bar(bar)
+        self.jobs = {}
+        if errors and stop_on_error:
+            raise RuntimeError("\r\n".join([list(error.values())[0] for error in errors]))
+        return errors
+
+    def cancel(self) -> None:
+        """Cancel jobs that have not started, running jobs are allowed to finish"""
+        self.cancelled.set()
+        for future in self.jobs:
+            future.cancel()
+
+    def log(self, message : str) -> None:
+        """Logging"""
+        if self.log_fn:
+            self.log_fn(message)